@@ -0,0 +1,260 @@
+"""Запуск бота несколькими процессами (кластерами)
+
+Шарды делятся на непрерывные диапазоны, каждый диапазон обслуживает
+отдельный процесс со своим AutoShardedBot. Процессы общаются только
+через общее хранилище (SQLite) и отчеты о состоянии, которые лаунчер
+собирает в data/cluster_health.json.
+
+    python cluster.py --clusters 4
+    python cluster.py --clusters 4 --shards 16
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import queue
+import signal
+import time
+
+import aiohttp
+
+import main
+from storage.files import atomic_write_json
+from utils.cluster import HEALTH_INTERVAL, shard_ranges
+
+# Кластер без отчетов дольше этого времени считается зависшим
+STALE_AFTER = HEALTH_INTERVAL * 4
+# Сколько ждать готовности кластера, прежде чем запускать следующий
+READY_TIMEOUT = 120.0
+# Discord разрешает одну авторизацию шарда в 5 секунд на каждый слот max_concurrency
+IDENTIFY_INTERVAL = 5.0
+# Пауза перед перезапуском упавшего кластера (удваивается при повторных падениях)
+RESTART_BASE_DELAY = 5.0
+RESTART_MAX_DELAY = 300.0
+# Как долго ждать корректной остановки процесса
+STOP_TIMEOUT = 30.0
+
+GATEWAY_URL = "https://discord.com/api/v10/gateway/bot"
+
+async def fetch_gateway_info(token: str) -> dict:
+    """Рекомендуемое число шардов и max_concurrency от Discord"""
+    async with aiohttp.ClientSession() as session:
+        async with session.get(GATEWAY_URL, headers={"Authorization": f"Bot {token}"}) as response:
+            response.raise_for_status()
+            data = await response.json()
+    return {
+        "shards": data["shards"],
+        "max_concurrency": data.get("session_start_limit", {}).get("max_concurrency", 1)
+    }
+
+class Cluster:
+    """Процесс кластера и его последнее состояние"""
+    def __init__(self, cluster_id: int, shard_ids: list):
+        self.cluster_id = cluster_id
+        self.shard_ids = shard_ids
+        self.process = None
+        self.started_at = None
+        self.health = None
+        self.restarts = 0
+        self.restart_at = None
+
+    @property
+    def alive(self) -> bool:
+        return self.process is not None and self.process.is_alive()
+
+    @property
+    def ready(self) -> bool:
+        return self.alive and bool(self.health and self.health.get("ready"))
+
+    def summary(self) -> dict:
+        return {
+            "cluster_id": self.cluster_id,
+            "shards": [self.shard_ids[0], self.shard_ids[-1]],
+            "alive": self.alive,
+            "restarts": self.restarts,
+            "health": self.health
+        }
+
+class ClusterLauncher:
+    """Запуск, наблюдение и перезапуск процессов кластеров"""
+    def __init__(self, shard_count: int, clusters: int, max_concurrency: int = 1,
+                 health_path: str = "data/cluster_health.json"):
+        self.shard_count = shard_count
+        self.max_concurrency = max(1, max_concurrency)
+        self.health_path = health_path
+
+        self._context = multiprocessing.get_context("spawn")
+        self._queue = self._context.Queue()
+        self._stopping = False
+        self.clusters = [
+            Cluster(index, shard_ids)
+            for index, shard_ids in enumerate(shard_ranges(shard_count, clusters))
+        ]
+
+    def run(self):
+        signal.signal(signal.SIGINT, self._request_stop)
+        signal.signal(signal.SIGTERM, self._request_stop)
+
+        print(f"🚀 Запуск {len(self.clusters)} кластеров, шардов: {self.shard_count}")
+        try:
+            # Кластеры запускаются по очереди, чтобы не превысить лимит авторизаций шардов
+            for cluster in self.clusters:
+                if self._stopping:
+                    break
+                self._start(cluster)
+                self._wait_ready(cluster)
+
+            last_write = 0.0
+            while not self._stopping:
+                self._drain(timeout=1.0)
+                if not self._stopping:
+                    self._supervise()
+                if time.monotonic() - last_write >= HEALTH_INTERVAL:
+                    self._write_health()
+                    last_write = time.monotonic()
+        finally:
+            self._stop_all()
+            self._write_health()
+
+    def _start(self, cluster: Cluster):
+        cluster.process = self._context.Process(
+            target=main.run_cluster,
+            args=(cluster.cluster_id, cluster.shard_ids, self.shard_count, self._queue),
+            name=f"cluster-{cluster.cluster_id}"
+        )
+        cluster.process.start()
+        cluster.started_at = time.monotonic()
+        cluster.health = None
+        cluster.restart_at = None
+        print(f"✅ Кластер {cluster.cluster_id} запущен (PID {cluster.process.pid}), "
+              f"шарды {cluster.shard_ids[0]}-{cluster.shard_ids[-1]}")
+
+    def _wait_ready(self, cluster: Cluster):
+        # Авторизация шардов кластера занимает около IDENTIFY_INTERVAL на шард
+        timeout = READY_TIMEOUT + IDENTIFY_INTERVAL * len(cluster.shard_ids) / self.max_concurrency
+        deadline = time.monotonic() + timeout
+        while not self._stopping and time.monotonic() < deadline:
+            self._drain(timeout=1.0)
+            if cluster.ready:
+                return
+            if not cluster.alive:
+                print(f"❌ Кластер {cluster.cluster_id} завершился при запуске (код {cluster.process.exitcode})")
+                return
+        if not self._stopping:
+            print(f"⚠️ Кластер {cluster.cluster_id} не готов за {timeout:.0f} с, запускаем следующий")
+
+    def _drain(self, timeout: float):
+        """Прием отчетов о состоянии от процессов"""
+        try:
+            report = self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return
+        while True:
+            cluster_id = report.get("cluster_id")
+            if cluster_id is not None and 0 <= cluster_id < len(self.clusters):
+                self.clusters[cluster_id].health = report
+            try:
+                report = self._queue.get_nowait()
+            except queue.Empty:
+                return
+
+    def _supervise(self):
+        """Перезапуск упавших и зависших кластеров"""
+        now = time.monotonic()
+        for cluster in self.clusters:
+            if cluster.restart_at is not None:
+                if now >= cluster.restart_at:
+                    self._start(cluster)
+                continue
+
+            if not cluster.alive:
+                reason = f"завершился с кодом {cluster.process.exitcode}"
+            elif self._is_stale(cluster, now):
+                reason = "не присылает отчеты"
+                self._stop(cluster)
+            else:
+                continue
+
+            delay = min(RESTART_BASE_DELAY * 2 ** cluster.restarts, RESTART_MAX_DELAY)
+            cluster.restarts += 1
+            cluster.restart_at = now + delay
+            print(f"❌ Кластер {cluster.cluster_id} {reason}, перезапуск через {delay:.0f} с")
+
+    def _is_stale(self, cluster: Cluster, now: float) -> bool:
+        if cluster.health is None:
+            # Еще запускается
+            timeout = READY_TIMEOUT + IDENTIFY_INTERVAL * len(cluster.shard_ids) / self.max_concurrency
+            return now - cluster.started_at > timeout
+        return time.time() - cluster.health["time"] > STALE_AFTER
+
+    def _write_health(self):
+        data = {
+            "time": time.time(),
+            "shard_count": self.shard_count,
+            "clusters": [cluster.summary() for cluster in self.clusters]
+        }
+        try:
+            atomic_write_json(self.health_path, data)
+        except OSError as e:
+            print(f"❌ Не удалось записать состояние кластеров: {e}")
+
+        ready = sum(1 for cluster in self.clusters if cluster.ready)
+        guilds = sum((cluster.health or {}).get("guilds", 0) for cluster in self.clusters)
+        print(f"📊 Кластеров готово: {ready}/{len(self.clusters)}, серверов: {guilds}")
+
+    def _request_stop(self, signum, frame):
+        if not self._stopping:
+            print("\n🛑 Остановка кластеров...")
+        self._stopping = True
+
+    def _stop(self, cluster: Cluster):
+        if not cluster.alive:
+            return
+        process = cluster.process
+        # SIGTERM: бот закрывает соединение и сохраняет данные
+        process.terminate()
+        process.join(STOP_TIMEOUT)
+        if process.is_alive():
+            process.kill()
+            process.join()
+
+    def _stop_all(self):
+        for cluster in self.clusters:
+            if cluster.alive:
+                cluster.process.terminate()
+        deadline = time.monotonic() + STOP_TIMEOUT
+        for cluster in self.clusters:
+            if cluster.process is None:
+                continue
+            cluster.process.join(max(0.0, deadline - time.monotonic()))
+            if cluster.process.is_alive():
+                cluster.process.kill()
+                cluster.process.join()
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Запуск бота несколькими процессами")
+    parser.add_argument("--clusters", type=int, default=int(os.getenv("CLUSTER_COUNT", os.cpu_count() or 1)),
+                        help="количество процессов (по умолчанию CLUSTER_COUNT или число ядер)")
+    parser.add_argument("--shards", type=int, default=None,
+                        help="общее количество шардов (по умолчанию SHARD_COUNT или рекомендация Discord)")
+    parser.add_argument("--health-file", default="data/cluster_health.json",
+                        help="файл с состоянием кластеров")
+    return parser.parse_args()
+
+if __name__ == "__main__":
+    args = parse_args()
+
+    # Процессы должны видеть изменения друг друга: JSON-хранилище для этого не подходит
+    backend = os.getenv("STORAGE_BACKEND", "sqlite").lower()
+    if backend != "sqlite":
+        print("❌ Режим кластеров работает только с STORAGE_BACKEND=sqlite")
+        raise SystemExit(1)
+    os.environ["STORAGE_BACKEND"] = "sqlite"
+
+    gateway = asyncio.run(fetch_gateway_info(main.TOKEN))
+    shard_count = args.shards
+    if shard_count is None:
+        env_shards = os.getenv("SHARD_COUNT", "auto")
+        shard_count = gateway["shards"] if env_shards.lower() == "auto" else int(env_shards)
+
+    ClusterLauncher(shard_count, args.clusters, gateway["max_concurrency"], args.health_file).run()
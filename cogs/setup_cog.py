@@ -1,13 +1,13 @@
 import discord
 from discord.ext import commands
 from discord import app_commands
-from utils.config_handler import ConfigHandler
-from views.setup_views import SetupView
+from utils.config_handler import get_config_handler
+from utils.templates import get_template_cache
 
 class SetupCog(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.config = ConfigHandler()
+        self.config = get_config_handler()
     
     @app_commands.command(name="setup", description="Настройка системы тикетов")
     @app_commands.default_permissions(administrator=True)
@@ -28,6 +28,9 @@ class SetupCog(commands.Cog):
         
         embed.set_footer(text="Настройте сначала основные параметры, затем интерфейс")
         
+        # Меню настройки нужно редко, поэтому модуль загружается при первом вызове
+        from views.setup_views import SetupView
+        
         await interaction.response.send_message(
             embed=embed,
             view=SetupView(self.config),
@@ -38,27 +41,8 @@ class SetupCog(commands.Cog):
     @app_commands.default_permissions(administrator=True)
     async def ticket_panel_command(self, interaction: discord.Interaction):
         """Создание панели тикетов"""
-        settings = self.config.get_guild_settings(interaction.guild.id)
-        
-        embed = discord.Embed(
-            title=settings.get("ticket_title", "Оставьте свой отзыв"),
-            description=settings.get("ticket_subtitle", "С вами мы становимся лучше"),
-            color=discord.Color.from_str(settings.get("embed_color", "#3498db"))
-        )
-        
-        embed.set_footer(text="Нажмите кнопку ниже, чтобы создать тикет")
-        
-        # Импорт здесь чтобы избежать циклического импорта
-        from views.ticket_views import CreateTicketView
-        from models.ticket_models import TicketManager
-        
-        ticket_manager = TicketManager()
-        view = CreateTicketView(self.config, ticket_manager)
-        
-        # Обновляем текст кнопки
-        for child in view.children:
-            if child.custom_id == "create_ticket_button":
-                child.label = settings.get("button_label", "Оставить отзыв")
+        # Embed и View панели собираются один раз на настройки сервера
+        embed, view = get_template_cache().panel(interaction.guild.id)
         
         await interaction.response.send_message(embed=embed, view=view)
 
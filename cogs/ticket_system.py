@@ -1,15 +1,55 @@
+from typing import Literal, Optional
 import discord
-from discord.ext import commands
-from models.ticket_models import TicketManager
-from utils.config_handler import ConfigHandler
-from utils.logger import TicketLogger
+from discord import app_commands
+from discord.ext import commands, tasks
+from models.ticket_models import get_ticket_manager, STATUS_DELETED
+from utils.config_handler import get_config_handler
+from utils.logger import get_ticket_logger
+from utils.rest_scheduler import get_rest_scheduler, route, PRIORITY_LOGS
+from utils.deadline_scheduler import get_deadline_scheduler
+from utils.guild_cache import get_guild_cache
+from utils.channel_pool import get_channel_pool
+from utils.templates import get_template_cache
+from utils.interactions import get_interaction_pipeline, respond
+from utils.transcript_export import get_transcript_exporter
+from storage.search_index import MAX_ROWID
+from utils.cluster import owns_guild
+from views.ticket_views import close_ticket_channel, delete_ticket_channel
 
 class TicketSystemCog(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.ticket_manager = TicketManager()
-        self.config = ConfigHandler()
-        self.logger = TicketLogger(bot)
+        self.ticket_manager = get_ticket_manager()
+        self.config = get_config_handler()
+        self.logger = get_ticket_logger(bot)
+        self.deadlines = get_deadline_scheduler()
+        self.guild_cache = get_guild_cache()
+        self.templates = get_template_cache()
+        self.channel_pool = get_channel_pool()
+        self.deadlines.register("close_ticket", self._deadline_close_ticket)
+        self.deadlines.register("delete_channel", self._deadline_delete_channel)
+    
+    async def cog_load(self):
+        """Восстановление тикетов из хранилища до подключения к Discord"""
+        # В режиме кластеров загружаем только тикеты серверов своих шардов
+        await self.ticket_manager.load(lambda guild_id: owns_guild(self.bot, guild_id))
+        print(f"📂 Восстановлено тикетов: {len(self.ticket_manager.active_tickets)}")
+        self.compact_journal.start()
+    
+    async def cog_unload(self):
+        self.compact_journal.cancel()
+        self.channel_pool.stop()
+        await get_interaction_pipeline().stop()
+        get_transcript_exporter().stop()
+        await self.deadlines.stop()
+    
+    @tasks.loop(minutes=10)
+    async def compact_journal(self):
+        """Периодическое сворачивание журнала тикетов"""
+        try:
+            await self.ticket_manager.compact()
+        except Exception as e:
+            print(f"❌ Ошибка сворачивания журнала тикетов: {e}")
     
     @commands.Cog.listener()
     async def on_ready(self):
@@ -17,14 +57,44 @@ class TicketSystemCog(commands.Cog):
         print(f"✅ Бот {self.bot.user} готов к работе!")
         print(f"📊 Загружено серверов: {len(self.bot.guilds)}")
         
-        # Устанавливаем статус бота
-        await self.bot.change_presence(
-            activity=discord.Activity(
-                type=discord.ActivityType.watching,
-                name="тикеты"
-            ),
-            status=discord.Status.online
-        )
+        await self._reconcile_tickets()
+        if self.channel_pool.enabled:
+            for guild in self.bot.guilds:
+                self.channel_pool.adopt(guild, self.ticket_manager)
+        # Отложенные действия запускаем, когда кэш каналов уже заполнен
+        self.deadlines.start()
+    
+    async def _reconcile_tickets(self):
+        """Сверка восстановленных тикетов с каналами после перезапуска"""
+        for ticket in list(self.ticket_manager.active_tickets.values()):
+            guild = self.bot.get_guild(ticket.guild_id)
+            # Канал удалили, пока бот был выключен
+            if guild and not guild.get_channel(ticket.channel_id):
+                self.ticket_manager.transition(ticket.channel_id, STATUS_DELETED)
+    
+    async def _deadline_close_ticket(self, payload):
+        """Отложенное закрытие тикета"""
+        channel = self.bot.get_channel(payload["channel_id"])
+        if channel:
+            await close_ticket_channel(channel)
+        elif self._owns_deadline(payload):
+            self.ticket_manager.transition(payload["channel_id"], STATUS_DELETED)
+    
+    async def _deadline_delete_channel(self, payload):
+        """Отложенное удаление канала закрытого тикета"""
+        channel = self.bot.get_channel(payload["channel_id"])
+        if channel:
+            await delete_ticket_channel(channel)
+        elif self._owns_deadline(payload):
+            self.ticket_manager.transition(payload["channel_id"], STATUS_DELETED)
+    
+    def _owns_deadline(self, payload) -> bool:
+        """Канала нет в кэше: удален или сервер обслуживает другой кластер"""
+        guild_id = payload.get("guild_id")
+        if guild_id is None or owns_guild(self.bot, guild_id):
+            return True
+        print(f"⚠️ Отложенное действие для канала {payload['channel_id']} пропущено: сервер обслуживает другой кластер")
+        return False
     
     @commands.Cog.listener()
     async def on_guild_join(self, guild):
@@ -49,7 +119,11 @@ class TicketSystemCog(commands.Cog):
                 )
                 
                 try:
-                    await channel.send(embed=embed)
+                    await get_rest_scheduler().run(
+                        route("send_message", channel.id),
+                        lambda: channel.send(embed=embed),
+                        PRIORITY_LOGS
+                    )
                 except:
                     continue
                 break
@@ -65,19 +139,218 @@ class TicketSystemCog(commands.Cog):
     @commands.Cog.listener()
     async def on_message(self, message):
         """Обработка сообщений в тикетах"""
-        # Игнорируем сообщения ботов
+        # Сообщения ботов не сохраняем, но запоминаем, что видели их
         if message.author.bot:
+            self.ticket_manager.mark_seen(message.channel.id, message.id)
             return
         
-        # Проверяем, находится ли сообщение в тикете
-        ticket = self.ticket_manager.get_ticket(message.channel.id)
-        if ticket:
-            # Добавляем сообщение в историю тикета
-            ticket.add_message(
-                message.author.id,
-                message.content,
-                message.created_at
+        # Добавляем сообщение в историю тикета (если канал является тикетом)
+        self.ticket_manager.add_message(
+            message.channel.id,
+            message.author.id,
+            message.content,
+            message.created_at,
+            message.id
+        )
+    
+    @commands.Cog.listener()
+    async def on_guild_channel_delete(self, channel):
+        """Канал тикета удален (ботом или вручную)"""
+        self.guild_cache.on_channel_changed(channel)
+        self.channel_pool.discard(channel)
+        if self.ticket_manager.transition(channel.id, STATUS_DELETED):
+            self.deadlines.cancel("close_ticket", channel.id)
+            self.deadlines.cancel("delete_channel", channel.id)
+    
+    @commands.Cog.listener()
+    async def on_guild_channel_update(self, before, after):
+        self.guild_cache.on_channel_changed(after)
+    
+    # Роль админа ищется по имени, поэтому сбрасываем кэш и при появлении
+    # роли с этим именем, и при переименовании
+    @commands.Cog.listener()
+    async def on_guild_role_create(self, role):
+        self.guild_cache.on_role_changed(role)
+    
+    @commands.Cog.listener()
+    async def on_guild_role_update(self, before, after):
+        self.guild_cache.on_role_changed(before)
+        self.guild_cache.on_role_changed(after)
+    
+    @commands.Cog.listener()
+    async def on_guild_role_delete(self, role):
+        self.guild_cache.on_role_changed(role)
+    
+    @commands.Cog.listener()
+    async def on_guild_remove(self, guild):
+        self.guild_cache.invalidate(guild.id)
+        self.templates.invalidate(guild.id)
+    
+    # Используем raw-события: обычные on_message_edit/on_message_delete
+    # не приходят для сообщений, которых нет в кэше (например, после перезапуска)
+    @commands.Cog.listener()
+    async def on_raw_message_edit(self, payload: discord.RawMessageUpdateEvent):
+        """Запись правок сообщений в истории тикета"""
+        content = payload.data.get("content")
+        author = payload.data.get("author") or {}
+        if content is None or author.get("bot"):
+            return
+        self.ticket_manager.edit_message(payload.channel_id, payload.message_id, content)
+    
+    @commands.Cog.listener()
+    async def on_raw_message_delete(self, payload: discord.RawMessageDeleteEvent):
+        """Запись удаления сообщений в истории тикета"""
+        self.ticket_manager.edit_message(payload.channel_id, payload.message_id, None)
+    
+    @commands.Cog.listener()
+    async def on_raw_bulk_message_delete(self, payload: discord.RawBulkMessageDeleteEvent):
+        for message_id in payload.message_ids:
+            self.ticket_manager.edit_message(payload.channel_id, message_id, None)
+    
+    @app_commands.command(name="ticket_transcript", description="Выгрузить историю тикета файлом")
+    @app_commands.guild_only()
+    @app_commands.rename(fmt="format")
+    @app_commands.describe(ticket="ID канала тикета (по умолчанию текущий канал)", fmt="Формат файла")
+    async def ticket_transcript_command(self, interaction: discord.Interaction, ticket: Optional[str] = None,
+                                       fmt: Literal["html", "json"] = "html"):
+        """Экспорт истории тикета: открытого, закрытого или уже удаленного (из архива)"""
+        if not self.guild_cache.is_admin(interaction.user):
+            await interaction.response.send_message("❌ У вас нет прав для управления тикетами!", ephemeral=True)
+            return
+        try:
+            channel_id = int(ticket) if ticket else interaction.channel.id
+        except ValueError:
+            await interaction.response.send_message("❌ Укажите ID канала тикета.", ephemeral=True)
+            return
+        
+        # Поиск в архиве и рендеринг занимают время, ответ откладывается
+        await get_interaction_pipeline().handle(
+            interaction, "ticket_transcript", lambda: self._send_transcript(interaction, channel_id, fmt),
+            ephemeral=True, thinking=True
+        )
+    
+    async def _send_transcript(self, interaction: discord.Interaction, channel_id: int, fmt: str):
+        found = await self.ticket_manager.transcript_source(channel_id)
+        # Историю тикетов других серверов не отдаем
+        if found is None or found[0]["guild_id"] != interaction.guild.id:
+            await respond(interaction, "❌ История тикета не найдена!", ephemeral=True)
+            return
+        
+        ticket, source = found
+        path, messages = await get_transcript_exporter().export(ticket, source, fmt)
+        try:
+            size = path.stat().st_size
+            if size > interaction.guild.filesize_limit:
+                await respond(
+                    interaction,
+                    f"❌ История слишком большая для вложения ({size / 1024 / 1024:.1f} МБ).",
+                    ephemeral=True
+                )
+                return
+            # discord.File читает файл с диска при отправке
+            await respond(
+                interaction,
+                f"📄 История тикета <#{channel_id}>, сообщений: {messages}",
+                file=discord.File(path, filename=f"ticket-{channel_id}.{fmt}"),
+                ephemeral=True
             )
+        finally:
+            path.unlink(missing_ok=True)
+    
+    @app_commands.command(name="ticket_search", description="Поиск по сообщениям тикетов")
+    @app_commands.guild_only()
+    @app_commands.describe(
+        query="Слова для поиска (слово* - поиск по началу слова)",
+        author="Автор сообщения",
+        since="С даты (ДД.ММ.ГГГГ, UTC)",
+        until="По дату включительно (ДД.ММ.ГГГГ, UTC)"
+    )
+    async def ticket_search_command(self, interaction: discord.Interaction, query: str,
+                                    author: Optional[discord.User] = None, since: Optional[str] = None,
+                                    until: Optional[str] = None):
+        """Полнотекстовый поиск по сообщениям тикетов сервера"""
+        if not self.guild_cache.is_admin(interaction.user):
+            await interaction.response.send_message("❌ У вас нет прав для управления тикетами!", ephemeral=True)
+            return
+        if self.ticket_manager.search is None:
+            await interaction.response.send_message("❌ Поиск по тикетам отключен.", ephemeral=True)
+            return
+        
+        # Модуль окна поиска загружается при первом вызове
+        from views.search_views import SearchResultsView, date_to_snowflake
+        try:
+            after_id = date_to_snowflake(since) if since else 0
+            before_id = date_to_snowflake(until, end_of_day=True) if until else MAX_ROWID
+        except ValueError:
+            await interaction.response.send_message("❌ Дата указывается в формате ДД.ММ.ГГГГ.", ephemeral=True)
+            return
+        
+        view = SearchResultsView(
+            self.ticket_manager.search, interaction.guild.id, query, author.id if author else None, after_id, before_id
+        )
+        await get_interaction_pipeline().handle(
+            interaction, "ticket_search", lambda: self._send_search(interaction, view), ephemeral=True, thinking=True
+        )
+    
+    async def _send_search(self, interaction: discord.Interaction, view):
+        await view.load()
+        await respond(interaction, embed=view.embed(), view=view, ephemeral=True)
+    
+    @app_commands.command(name="ticket_stats", description="Статистика тикетов сервера")
+    @app_commands.guild_only()
+    @app_commands.describe(days="За сколько последних дней показать тикеты по дням")
+    async def ticket_stats_command(self, interaction: discord.Interaction, days: app_commands.Range[int, 1, 30] = 7):
+        """Сводка по тикетам из накопленной статистики (без перебора тикетов)"""
+        if not self.guild_cache.is_admin(interaction.user):
+            await interaction.response.send_message("❌ У вас нет прав для управления тикетами!", ephemeral=True)
+            return
+        if self.ticket_manager.stats is None:
+            await interaction.response.send_message("❌ Статистика тикетов отключена.", ephemeral=True)
+            return
+        
+        summary = self.ticket_manager.stats.summary(interaction.guild.id, days)
+        embed = discord.Embed(title="📊 Статистика тикетов", color=discord.Color.blue())
+        
+        ratio = summary["published_ratio"]
+        embed.add_field(
+            name="🎫 Всего",
+            value=f"**Открыто:** {summary['opened']}\n"
+                  f"**Закрыто:** {summary['closed']}\n"
+                  f"**Опубликовано:** {summary['published']}"
+                  + (f" ({ratio:.0%} закрытых)" if ratio is not None else "")
+                  + (f"\n**Удалено без закрытия:** {summary['deleted']}" if summary["deleted"] else ""),
+            inline=True
+        )
+        
+        close_time = summary["close_time"]
+        embed.add_field(
+            name="⏱️ Время до закрытия",
+            value="\n".join(
+                f"**p{round(q * 100)}:** {_format_duration(value)}" for q, value in close_time.items()
+            ) if summary["closed"] else "Закрытых тикетов еще нет",
+            inline=True
+        )
+        
+        lines = ["Дата   Откр. Закр. Публ."]
+        for date, opened, closed, published in summary["daily"]:
+            lines.append(f"{date:%d.%m} {opened:6} {closed:5} {published:5}")
+        embed.add_field(name=f"📅 По дням (UTC), последние {days}", value="```\n" + "\n".join(lines) + "\n```", inline=False)
+        
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+
+def _format_duration(seconds: float) -> str:
+    """Длительность для сводки: 45 с, 12 мин, 3 ч 5 мин, 2 д 4 ч"""
+    seconds = int(round(seconds))
+    if seconds < 60:
+        return f"{seconds} с"
+    minutes, seconds = divmod(seconds, 60)
+    if minutes < 60:
+        return f"{minutes} мин"
+    hours, minutes = divmod(minutes, 60)
+    if hours < 24:
+        return f"{hours} ч {minutes} мин"
+    days, hours = divmod(hours, 24)
+    return f"{days} д {hours} ч"
 
 async def setup(bot):
     await bot.add_cog(TicketSystemCog(bot))
\ No newline at end of file
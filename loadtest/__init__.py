@@ -0,0 +1 @@
+"""Нагрузочный тест бота без подключения к Discord (python -m loadtest)"""
@@ -0,0 +1,335 @@
+"""Нагрузочный тест кнопок тикетов на заглушке Discord
+
+Настоящие кнопки (views/ticket_views.py) и ког тикетов работают с
+серверами и каналами из loadtest/fake_discord.py. Каждая сессия -
+пользователь, который создает тикет, пишет несколько сообщений, после
+чего админ публикует или закрывает тикет; затем отложенные действия
+закрывают и удаляют канал. Данные пишутся во временную папку.
+
+    python -m loadtest --guilds 5000 --rate 50 --duration 60
+    python -m loadtest --latency 0.1 --route-limit 5/5 --json results.json
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from collections import Counter
+from pathlib import Path
+
+# Модули бота импортируются и после смены рабочей папки (хранилища - лениво)
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from loadtest.fake_discord import FakeBot, FakeInteraction, FakeRest
+from utils.rest_scheduler import get_rest_scheduler
+
+def parse_limit(value: str):
+    """Лимит вида "5/5" (запросов/секунд) или "off" """
+    if value.lower() == "off":
+        return None
+    count, _, period = value.partition("/")
+    return int(count), float(period or 1)
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Нагрузочный тест тикетов без Discord")
+    parser.add_argument("--guilds", type=int, default=5000, help="количество серверов")
+    parser.add_argument("--rate", type=float, default=50.0, help="нажатий кнопок в секунду (по 2 на сессию)")
+    parser.add_argument("--duration", type=float, default=30.0, help="сколько секунд подавать нагрузку")
+    parser.add_argument("--messages", type=int, default=3, help="сообщений пользователя в тикете")
+    parser.add_argument("--think", type=float, default=0.5, help="средняя пауза между действиями пользователя (с)")
+    parser.add_argument("--publish-ratio", type=float, default=0.5, help="доля тикетов, которые публикуются")
+    parser.add_argument("--double-click-ratio", type=float, default=0.0,
+                        help="доля двойных нажатий на кнопку создания тикета")
+    parser.add_argument("--latency", type=float, default=0.05, help="задержка запроса к API (с)")
+    parser.add_argument("--jitter", type=float, default=0.02, help="разброс задержки (с)")
+    parser.add_argument("--gateway-latency", type=float, default=0.02, help="задержка событий шлюза (с)")
+    parser.add_argument("--route-limit", type=parse_limit, default=(5, 5.0), help="лимит маршрута, например 5/5")
+    parser.add_argument("--global-limit", type=parse_limit, default=(50, 1.0), help="глобальный лимит или off")
+    parser.add_argument("--max-ratelimit-timeout", type=float, default=5.0,
+                        help="дольше этого ожидание лимита отдается планировщику запросов")
+    parser.add_argument("--pool-size", type=int, default=0,
+                        help="свободных каналов на сервер в пуле (TICKET_POOL_SIZE), 0 - без пула")
+    parser.add_argument("--pool-refill-interval", type=float, default=0.2, help="пауза между созданием каналов пула (с)")
+    parser.add_argument("--close-delay", type=float, default=0.5, help="задержка закрытия тикета (с)")
+    parser.add_argument("--delete-delay", type=float, default=1.0, help="время жизни закрытого канала (с)")
+    parser.add_argument("--drain-timeout", type=float, default=120.0,
+                        help="сколько ждать завершения тикетов после подачи нагрузки (с)")
+    parser.add_argument("--storage", choices=("json", "sqlite"), default=os.getenv("STORAGE_BACKEND", "json"))
+    parser.add_argument("--seed", type=int, default=1, help="зерно генератора случайных чисел")
+    parser.add_argument("--workdir", default=None, help="папка для данных (по умолчанию временная)")
+    parser.add_argument("--json", dest="json_path", default=None, help="записать результаты в файл JSON ('-' - в stdout)")
+    return parser.parse_args(argv)
+
+def percentile(values, q: float) -> float:
+    """Перцентиль q (0-100) по ближайшему рангу"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(q / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+class LoadTest:
+    def __init__(self, args):
+        self.args = args
+        self.rng = random.Random(args.seed)
+        self.rest = FakeRest(
+            latency=args.latency,
+            jitter=args.jitter,
+            route_limit=args.route_limit,
+            global_limit=args.global_limit,
+            max_ratelimit_timeout=args.max_ratelimit_timeout,
+            rng=random.Random(args.seed + 1),
+            on_headers=get_rest_scheduler().observe_headers
+        )
+        self.bot = FakeBot(self.rest, args.gateway_latency)
+        self.guilds = []
+        self.latencies = {}  # действие -> [секунды]
+        self.acks = {}  # действие -> [секунды до подтверждения]
+        self.outcomes = Counter()  # (действие, итог) -> количество
+        self.sessions = 0
+        self.tickets = 0
+        self._members = 0
+
+    async def setup(self):
+        # Импорт здесь: общие объекты бота создаются уже в рабочей папке теста
+        from cogs.ticket_system import TicketSystemCog
+        from utils.config_handler import get_config_handler
+
+        self.cog = TicketSystemCog(self.bot)
+        await self.cog.cog_load()
+        self.bot.add_listener("message", self.cog.on_message)
+        self.bot.add_listener("guild_channel_delete", self.cog.on_guild_channel_delete)
+
+        config = get_config_handler()
+        for index in range(self.args.guilds):
+            guild = self.bot.add_guild(f"Сервер {index}")
+            admin_role = guild.add_role("Админ")
+            guild.admin = guild.add_member(f"admin{index}", roles=[admin_role])
+            guild.panel = guild.add_text_channel("тикеты")
+            config.update_guild_settings(
+                guild.id,
+                ticket_category_id=guild.add_category("Тикеты").id,
+                closed_category_id=guild.add_category("Закрытые").id,
+                log_channel_id=guild.add_text_channel("логи").id,
+                publish_channel_id=guild.add_text_channel("отзывы").id,
+                admin_role_name=admin_role.name
+            )
+            self.guilds.append(guild)
+        await config.flush()
+        self.cog.deadlines.start()
+
+    async def click(self, action: str, item, interaction):
+        started = time.perf_counter()
+        outcome = "ok"
+        try:
+            # callback возвращается после подтверждения нажатия, а обработка
+            # завершается позже (Future конвейера взаимодействий)
+            done = await item.callback(interaction)
+            self.acks.setdefault(action, []).append(time.perf_counter() - started)
+            if done is not None and not await done:
+                outcome = "error"
+        except Exception as e:
+            outcome = "error"
+            print(f"❌ {action}: {type(e).__name__}: {e}")
+        self.latencies.setdefault(action, []).append(time.perf_counter() - started)
+        self.outcomes[action, outcome] += 1
+
+    async def session(self):
+        from models.ticket_models import get_ticket_manager
+        from views.ticket_views import CloseTicketButton, CreateTicketButton, PublishTicketButton
+
+        self.sessions += 1
+        self._members += 1
+        guild = self.rng.choice(self.guilds)
+        user = guild.add_member(f"user{self._members}")
+
+        clicks = [self.click("create_ticket", CreateTicketButton(), FakeInteraction(self.bot, user, guild, guild.panel))]
+        if self.rng.random() < self.args.double_click_ratio:
+            clicks.append(self.click("create_ticket", CreateTicketButton(),
+                                     FakeInteraction(self.bot, user, guild, guild.panel)))
+        await asyncio.gather(*clicks)
+
+        ticket = get_ticket_manager().get_open_ticket(user.id, guild.id)
+        channel = self.bot.get_channel(ticket.channel_id) if ticket else None
+        if channel is None:
+            return
+        self.tickets += 1
+
+        for number in range(self.args.messages):
+            await asyncio.sleep(self.rng.expovariate(1 / self.args.think) if self.args.think > 0 else 0)
+            channel.post(user, f"Сообщение {number + 1} от {user.name}: " + "отзыв " * self.rng.randint(1, 40))
+        await asyncio.sleep(self.args.think)
+
+        if self.rng.random() < self.args.publish_ratio:
+            action, item = "publish_ticket", PublishTicketButton(user.id)
+        else:
+            action, item = "close_ticket", CloseTicketButton()
+        await self.click(action, item, FakeInteraction(self.bot, guild.admin, guild, channel))
+
+    async def run(self) -> dict:
+        from models.ticket_models import get_ticket_manager
+        from utils.config_handler import get_config_handler
+        from utils.logger import get_ticket_logger
+
+        setup_started = time.perf_counter()
+        await self.setup()
+        setup_seconds = time.perf_counter() - setup_started
+        print(f"✅ Подготовлено серверов: {len(self.guilds)} за {setup_seconds:.1f} с")
+
+        # Сессии приходят пуассоновским потоком, в каждой два нажатия
+        session_rate = self.args.rate / 2
+        tasks = []
+        started = time.perf_counter()
+        next_at = started
+        while True:
+            next_at += self.rng.expovariate(session_rate)
+            if next_at - started >= self.args.duration:
+                break
+            await asyncio.sleep(max(0.0, next_at - time.perf_counter()))
+            tasks.append(asyncio.ensure_future(self.session()))
+        await asyncio.gather(*tasks)
+        load_seconds = time.perf_counter() - started
+        print(f"✅ Сессий завершено: {len(tasks)} за {load_seconds:.1f} с, ожидание закрытия тикетов...")
+
+        # Отложенные закрытия и удаления каналов
+        ticket_manager = get_ticket_manager()
+        drain_deadline = time.perf_counter() + self.args.drain_timeout
+        while (ticket_manager.active_tickets or self.cog.deadlines.pending()) and time.perf_counter() < drain_deadline:
+            await asyncio.sleep(0.1)
+        await self.bot.wait_idle()
+        total_seconds = time.perf_counter() - started
+
+        logger = get_ticket_logger(self.bot)
+        await logger.flush()
+        await self.cog.cog_unload()
+        await ticket_manager.flush()
+        await get_config_handler().flush()
+
+        return self.report(setup_seconds, load_seconds, total_seconds, get_rest_scheduler().stats(), logger.dropped)
+
+    def report(self, setup_seconds, load_seconds, total_seconds, scheduler, log_dropped) -> dict:
+        from models.ticket_models import get_ticket_manager
+        from utils.channel_pool import get_channel_pool
+
+        pool = get_channel_pool()
+
+        clicks = {}
+        for action, values in sorted(self.latencies.items()):
+            clicks[action] = {
+                "count": len(values),
+                "errors": self.outcomes[action, "error"],
+                "p50_ms": round(percentile(values, 50) * 1000, 2),
+                "p99_ms": round(percentile(values, 99) * 1000, 2),
+                "max_ms": round(max(values) * 1000, 2),
+                "ack_p50_ms": round(percentile(self.acks.get(action, []), 50) * 1000, 2),
+                "ack_p99_ms": round(percentile(self.acks.get(action, []), 99) * 1000, 2)
+            }
+        all_latencies = [value for values in self.latencies.values() for value in values]
+        all_acks = [value for values in self.acks.values() for value in values]
+        calls = dict(sorted(self.rest.calls.items()))
+        total_calls = sum(calls.values())
+        api_calls = total_calls - calls.get("interaction_response", 0) - calls.get("followup", 0)
+        per_ticket = self.tickets or 1
+
+        return {
+            "config": {key: value for key, value in vars(self.args).items() if key not in ("json_path", "workdir")},
+            "setup_seconds": round(setup_seconds, 2),
+            "load_seconds": round(load_seconds, 2),
+            "total_seconds": round(total_seconds, 2),
+            "sessions": self.sessions,
+            "tickets": self.tickets,
+            "tickets_left_open": len(get_ticket_manager().active_tickets),
+            "throughput": {
+                "clicks_per_second": round(len(all_latencies) / load_seconds, 2) if load_seconds else 0.0,
+                "tickets_per_second": round(self.tickets / load_seconds, 2) if load_seconds else 0.0
+            },
+            "latency": {
+                "p50_ms": round(percentile(all_latencies, 50) * 1000, 2),
+                "p99_ms": round(percentile(all_latencies, 99) * 1000, 2),
+                "ack_p50_ms": round(percentile(all_acks, 50) * 1000, 2),
+                "ack_p99_ms": round(percentile(all_acks, 99) * 1000, 2)
+            },
+            "clicks": clicks,
+            "rest": {
+                "calls": calls,
+                "total": total_calls,
+                "per_ticket": round(total_calls / per_ticket, 2),
+                "api_per_ticket": round(api_calls / per_ticket, 2),
+                "ratelimit_waits": self.rest.waits,
+                "rate_limited": self.rest.rate_limited,
+                "scheduler": scheduler
+            },
+            "pool": {"hits": pool.hits, "misses": pool.misses, "idle": pool.idle()},
+            "log_dropped": log_dropped,
+            "event_errors": dict(self.bot.errors)
+        }
+
+def print_report(result: dict):
+    print("\n📊 Результаты нагрузочного теста")
+    print(f"  Сессий: {result['sessions']}, тикетов: {result['tickets']}, "
+          f"осталось открытых: {result['tickets_left_open']}")
+    throughput = result["throughput"]
+    print(f"  Пропускная способность: {throughput['clicks_per_second']} нажатий/с, "
+          f"{throughput['tickets_per_second']} тикетов/с")
+    latency = result["latency"]
+    print(f"  Задержка нажатий: p50 {latency['p50_ms']} мс, p99 {latency['p99_ms']} мс "
+          f"(подтверждение: p50 {latency['ack_p50_ms']} мс, p99 {latency['ack_p99_ms']} мс)")
+    for action, stats in result["clicks"].items():
+        print(f"    {action}: {stats['count']} (ошибок {stats['errors']}), "
+              f"p50 {stats['p50_ms']} мс, p99 {stats['p99_ms']} мс, max {stats['max_ms']} мс, "
+              f"подтверждение p99 {stats['ack_p99_ms']} мс")
+    rest = result["rest"]
+    print(f"  Запросов к API на тикет: {rest['api_per_ticket']} (с ответами на взаимодействия {rest['per_ticket']})")
+    print(f"    {', '.join(f'{method}: {count}' for method, count in rest['calls'].items())}")
+    if result["pool"]["hits"] or result["pool"]["misses"]:
+        pool = result["pool"]
+        print(f"  Пул каналов: выдано {pool['hits']}, промахов {pool['misses']}, свободно {pool['idle']}")
+    print(f"  Ожиданий лимита: {rest['ratelimit_waits']}, ограничений для планировщика: {rest['rate_limited']}")
+
+def main(argv=None):
+    args = parse_args(argv)
+    os.environ["STORAGE_BACKEND"] = args.storage
+    os.environ["TICKET_POOL_SIZE"] = str(args.pool_size)
+    os.environ["TICKET_POOL_REFILL_INTERVAL"] = str(args.pool_refill_interval)
+    json_path = args.json_path
+    if json_path and json_path != "-":
+        json_path = Path(json_path).resolve()
+
+    # С --json - в stdout идет только документ JSON, отчет и вывод бота - в stderr
+    output = sys.stdout
+    with contextlib.redirect_stdout(sys.stderr if json_path == "-" else output):
+        # Все файлы бота (data/, config.json) создаются в рабочей папке теста
+        workdir = args.workdir or tempfile.mkdtemp(prefix="ticketbot-loadtest-")
+        os.makedirs(workdir, exist_ok=True)
+        os.chdir(workdir)
+        print(f"📁 Рабочая папка: {workdir}")
+
+        # Короткие задержки закрытия, чтобы тикеты успели пройти весь путь
+        import views.ticket_views as ticket_views
+        ticket_views.CLOSE_DELAY = args.close_delay
+        ticket_views.PUBLISH_CLOSE_DELAY = args.close_delay
+        ticket_views.CLOSED_CHANNEL_TTL = args.delete_delay
+
+        from storage import get_storage
+
+        try:
+            result = asyncio.run(LoadTest(args).run())
+        finally:
+            get_storage().close()
+
+        print_report(result)
+        if json_path == "-":
+            output.write(json.dumps(result, ensure_ascii=False, indent=2) + "\n")
+        elif json_path:
+            with open(json_path, 'w', encoding='utf-8') as f:
+                json.dump(result, f, ensure_ascii=False, indent=2)
+            print(f"💾 Результаты записаны в {json_path}")
+
+if __name__ == "__main__":
+    main()
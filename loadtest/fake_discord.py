@@ -0,0 +1,420 @@
+"""Заглушка Discord для нагрузочного теста
+
+Серверы, участники, роли, каналы и взаимодействия живут в памяти. Все
+изменяющие вызовы проходят через FakeRest: он добавляет задержку сети,
+считает запросы и ограничивает их так же, как Discord (лимит маршрута
+и глобальный лимит). Короткие ожидания лимита, как и discord.py,
+выполняются внутри запроса, длинные (больше max_ratelimit_timeout)
+пробрасываются как discord.RateLimited в планировщик запросов бота.
+Остаток лимита маршрута передается в on_headers заголовками X-RateLimit-*,
+как их получает трассировка HTTP-клиента бота.
+"""
+import asyncio
+import itertools
+import random
+from collections import Counter
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import discord
+
+class FakeRest:
+    """REST API: задержка, лимиты и учет запросов по методам"""
+    def __init__(self, latency: float = 0.05, jitter: float = 0.02, route_limit=(5, 5.0),
+                 global_limit=(50, 1.0), max_ratelimit_timeout: float = 5.0, rng=None, on_headers=None):
+        self.latency = latency
+        self.jitter = jitter
+        self.route_limit = route_limit  # (запросов, секунд) на маршрут
+        self.global_limit = global_limit  # (запросов, секунд) на все маршруты
+        self.max_ratelimit_timeout = max_ratelimit_timeout
+        self.rng = rng or random.Random()
+        self.on_headers = on_headers  # функция от заголовков ответа
+
+        self._buckets = {}  # ключ -> [токены, время обновления]
+        self.calls = Counter()  # метод -> количество запросов
+        self.waits = 0  # ожидания лимита внутри запроса
+        self.rate_limited = 0  # длинные ограничения, отданные планировщику
+
+    async def request(self, method: str, major_id=None, limited: bool = True):
+        """Один запрос к API; бросает discord.RateLimited при длинном ограничении"""
+        if limited:
+            wait = self._reserve(method, major_id)
+            if wait > 0:
+                self.waits += 1
+                await asyncio.sleep(wait)
+        self.calls[method] += 1
+        await asyncio.sleep(self._delay())
+        if limited and self.on_headers is not None:
+            self.on_headers(self._headers(method, major_id))
+
+    def _headers(self, method: str, major_id) -> dict:
+        """Заголовки лимита маршрута, как в ответе Discord"""
+        limit, period = self.route_limit
+        tokens, updated = self._buckets[f"{method}:{major_id}"]
+        tokens = min(float(limit), tokens + (asyncio.get_running_loop().time() - updated) * limit / period)
+        remaining = max(0, int(tokens))
+        return {
+            "X-RateLimit-Limit": str(limit),
+            "X-RateLimit-Remaining": str(remaining),
+            # Через столько секунд маршрут снова полностью свободен
+            "X-RateLimit-Reset-After": f"{(limit - tokens) * period / limit:.3f}"
+        }
+
+    def _delay(self) -> float:
+        return max(0.0, self.latency + self.rng.uniform(-self.jitter, self.jitter))
+
+    def _reserve(self, method: str, major_id) -> float:
+        """Резерв места в лимитах маршрута и глобальном, возвращает время ожидания"""
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        buckets = [(f"{method}:{major_id}", self.route_limit)]
+        if self.global_limit:
+            buckets.append(("global", self.global_limit))
+
+        wait = 0.0
+        taken = []
+        for key, (limit, period) in buckets:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = [float(limit), now]
+            rate = limit / period
+            bucket[0] = min(float(limit), bucket[0] + (now - bucket[1]) * rate)
+            bucket[1] = now
+            bucket[0] -= 1
+            taken.append(bucket)
+            if bucket[0] < 0:
+                wait = max(wait, -bucket[0] / rate)
+
+        if wait > self.max_ratelimit_timeout:
+            # Запрос не выполнен: возвращаем зарезервированные места
+            for bucket in taken:
+                bucket[0] += 1
+            self.rate_limited += 1
+            raise discord.RateLimited(wait)
+        return wait
+
+def _not_found(message: str) -> discord.NotFound:
+    return discord.NotFound(SimpleNamespace(status=404, reason="Not Found"), message)
+
+class FakeRole:
+    def __init__(self, guild, role_id: int, name: str):
+        self.guild = guild
+        self.id = role_id
+        self.name = name
+
+    @property
+    def mention(self) -> str:
+        return f"<@&{self.id}>"
+
+    def __eq__(self, other):
+        return isinstance(other, FakeRole) and other.id == self.id
+
+    def __hash__(self):
+        return self.id >> 22
+
+class FakeMember:
+    def __init__(self, guild, member_id: int, name: str, roles=(), administrator: bool = False, bot: bool = False):
+        self.guild = guild
+        self.id = member_id
+        self.name = name
+        self.display_name = name
+        self.bot = bot
+        self.avatar = None
+        self.roles = list(roles)
+        self.guild_permissions = discord.Permissions.all() if administrator else discord.Permissions.none()
+
+    @property
+    def mention(self) -> str:
+        return f"<@{self.id}>"
+
+    def get_role(self, role_id: int):
+        for role in self.roles:
+            if role.id == role_id:
+                return role
+        return None
+
+    def __str__(self):
+        return self.name
+
+    def __eq__(self, other):
+        return isinstance(other, FakeMember) and other.id == self.id
+
+    def __hash__(self):
+        return self.id >> 22
+
+class FakeCategory(discord.CategoryChannel):
+    """Категория; наследует CategoryChannel, чтобы проходить проверки isinstance"""
+    def __init__(self, guild, channel_id: int, name: str):
+        self.guild = guild
+        self.id = channel_id
+        self.name = name
+
+    def __repr__(self):
+        return f"<FakeCategory id={self.id} name={self.name!r}>"
+
+class FakeMessage:
+    def __init__(self, message_id: int, channel, author, content: str = None, embeds=()):
+        self.id = message_id
+        self.channel = channel
+        self.guild = channel.guild
+        self.author = author
+        self.content = content or ""
+        self.embeds = list(embeds)
+        self.created_at = discord.utils.snowflake_time(message_id)
+
+class FakeTextChannel:
+    def __init__(self, guild, channel_id: int, name: str, category=None, overwrites=None, topic: str = None):
+        self.guild = guild
+        self.id = channel_id
+        self.name = name
+        self.category = category
+        self.overwrites = dict(overwrites or {})
+        self.topic = topic
+        self.messages = []
+        self.last_message_id = None
+
+    @property
+    def mention(self) -> str:
+        return f"<#{self.id}>"
+
+    def permissions_for(self, member):
+        return discord.Permissions.all()
+
+    async def send(self, content=None, embed=None, embeds=None, view=None):
+        await self.guild.client.rest.request("send_message", self.id)
+        embeds = [embed] if embed is not None else (embeds or [])
+        return self._append(self.guild.me, content, embeds)
+
+    def post(self, author, content: str):
+        """Сообщение участника: приходит боту только событием шлюза, без запроса к API"""
+        return self._append(author, content, ())
+
+    async def edit(self, **fields):
+        await self.guild.client.rest.request("edit_channel", self.id)
+        for name in ("name", "category", "overwrites", "topic"):
+            if name in fields:
+                setattr(self, name, fields[name])
+
+    async def delete(self):
+        client = self.guild.client
+        await client.rest.request("delete_channel", self.id)
+        if self.guild.remove_channel(self) is None:
+            raise _not_found("Unknown Channel")
+        client.dispatch("guild_channel_delete", self)
+
+    async def history(self, limit: int = 100, after=None, oldest_first: bool = True):
+        await self.guild.client.rest.request("history", self.id)
+        messages = self.messages
+        if after is not None:
+            messages = [message for message in messages if message.id > after.id]
+        if not oldest_first:
+            messages = list(reversed(messages))
+        for message in messages[:limit]:
+            yield message
+
+    def _append(self, author, content, embeds):
+        message = FakeMessage(self.guild.client.next_id(), self, author, content, embeds)
+        self.messages.append(message)
+        self.last_message_id = message.id
+        self.guild.client.dispatch("message", message)
+        return message
+
+    def __eq__(self, other):
+        return isinstance(other, FakeTextChannel) and other.id == self.id
+
+    def __hash__(self):
+        return self.id >> 22
+
+class FakeGuild:
+    def __init__(self, client, guild_id: int, name: str):
+        self.client = client
+        self.id = guild_id
+        self.name = name
+        self._roles = {}
+        self._channels = {}
+        self._members = {}
+        self.default_role = self.add_role("@everyone", role_id=guild_id)
+        self.me = self.add_member(client.user.name, member_id=client.user.id, administrator=True, bot=True)
+
+    @property
+    def roles(self) -> list:
+        return list(self._roles.values())
+
+    @property
+    def channels(self) -> list:
+        return list(self._channels.values())
+
+    @property
+    def text_channels(self) -> list:
+        return [channel for channel in self._channels.values() if isinstance(channel, FakeTextChannel)]
+
+    @property
+    def members(self) -> list:
+        return list(self._members.values())
+
+    def get_role(self, role_id: int):
+        return self._roles.get(role_id)
+
+    def get_channel(self, channel_id: int):
+        return self._channels.get(channel_id)
+
+    def get_member(self, member_id: int):
+        return self._members.get(member_id)
+
+    async def fetch_member(self, member_id: int):
+        await self.client.rest.request("fetch_member", self.id)
+        member = self._members.get(member_id)
+        if member is None:
+            raise _not_found("Unknown Member")
+        return member
+
+    def add_role(self, name: str, role_id: int = None) -> FakeRole:
+        role = FakeRole(self, role_id or self.client.next_id(), name)
+        self._roles[role.id] = role
+        return role
+
+    def add_member(self, name: str, member_id: int = None, roles=(), administrator: bool = False,
+                   bot: bool = False) -> FakeMember:
+        member = FakeMember(self, member_id or self.client.next_id(), name, roles, administrator, bot)
+        self._members[member.id] = member
+        return member
+
+    def add_category(self, name: str) -> FakeCategory:
+        return self._add_channel(FakeCategory(self, self.client.next_id(), name))
+
+    def add_text_channel(self, name: str, category=None) -> FakeTextChannel:
+        return self._add_channel(FakeTextChannel(self, self.client.next_id(), name, category))
+
+    async def create_text_channel(self, name: str, category=None, overwrites=None, topic: str = None):
+        await self.client.rest.request("create_channel", self.id)
+        channel = FakeTextChannel(self, self.client.next_id(), name, category, overwrites, topic)
+        return self._add_channel(channel)
+
+    def remove_channel(self, channel):
+        removed = self._channels.pop(channel.id, None)
+        if removed is not None:
+            self.client.forget_channel(channel.id)
+        return removed
+
+    def _add_channel(self, channel):
+        self._channels[channel.id] = channel
+        self.client.remember_channel(channel)
+        return channel
+
+    def __str__(self):
+        return self.name
+
+class FakeResponse:
+    """interaction.response: на взаимодействие можно ответить один раз"""
+    def __init__(self, interaction):
+        self._interaction = interaction
+        self._done = False
+
+    def is_done(self) -> bool:
+        return self._done
+
+    async def send_message(self, content=None, *, embed=None, embeds=None, view=None, ephemeral: bool = False):
+        await self._respond()
+
+    async def defer(self, *, ephemeral: bool = False, thinking: bool = False):
+        await self._respond()
+
+    async def edit_message(self, **fields):
+        await self._respond()
+
+    async def _respond(self):
+        if self._done:
+            raise discord.InteractionResponded(self._interaction)
+        # Ответ на взаимодействие не подчиняется лимитам маршрутов
+        await self._interaction.client.rest.request("interaction_response", self._interaction.id, limited=False)
+        self._done = True
+
+class FakeFollowup:
+    """interaction.followup: сообщения после первого ответа"""
+    def __init__(self, interaction):
+        self._interaction = interaction
+
+    async def send(self, content=None, *, embed=None, embeds=None, view=None, ephemeral: bool = False):
+        await self._interaction.client.rest.request("followup", self._interaction.id, limited=False)
+
+class FakeInteraction:
+    def __init__(self, client, user, guild, channel, message=None):
+        self.id = client.next_id()
+        self.client = client
+        self.user = user
+        self.guild = guild
+        self.guild_id = guild.id
+        self.channel = channel
+        self.channel_id = channel.id
+        self.message = message
+        self.command = None
+        self.extras = {}
+        self.created_at = discord.utils.snowflake_time(self.id)
+        self.response = FakeResponse(self)
+        self.followup = FakeFollowup(self)
+
+class FakeBot:
+    """Клиент с кэшем серверов и каналов; события шлюза приходят с задержкой"""
+    def __init__(self, rest: FakeRest, gateway_latency: float = 0.02):
+        self.rest = rest
+        self.gateway_latency = gateway_latency
+        self.latency = gateway_latency
+        self._ids = itertools.count(discord.utils.time_snowflake(datetime.now(timezone.utc)))
+        self.user = SimpleNamespace(id=self.next_id(), name="TicketBot", bot=True)
+        self._guilds = {}
+        self._channels = {}
+        self._listeners = {}  # событие -> [async def handler(*args)]
+        self._pending = set()
+        self.errors = Counter()
+
+    @property
+    def guilds(self) -> list:
+        return list(self._guilds.values())
+
+    def next_id(self) -> int:
+        return next(self._ids)
+
+    def add_guild(self, name: str) -> FakeGuild:
+        guild = FakeGuild(self, self.next_id(), name)
+        self._guilds[guild.id] = guild
+        return guild
+
+    def get_guild(self, guild_id: int):
+        return self._guilds.get(guild_id)
+
+    def get_channel(self, channel_id: int):
+        return self._channels.get(channel_id)
+
+    def remember_channel(self, channel):
+        self._channels[channel.id] = channel
+
+    def forget_channel(self, channel_id: int):
+        self._channels.pop(channel_id, None)
+
+    def add_listener(self, event: str, handler):
+        self._listeners.setdefault(event, []).append(handler)
+
+    def dispatch(self, event: str, *args):
+        """Доставка события шлюза слушателям через gateway_latency"""
+        handlers = self._listeners.get(event)
+        if not handlers:
+            return
+        loop = asyncio.get_running_loop()
+        for handler in handlers:
+            loop.call_later(self.gateway_latency, self._start_handler, event, handler, args)
+
+    def _start_handler(self, event, handler, args):
+        task = asyncio.get_running_loop().create_task(handler(*args))
+        self._pending.add(task)
+        task.add_done_callback(lambda done: self._handler_done(event, done))
+
+    def _handler_done(self, event, task):
+        self._pending.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            self.errors[event] += 1
+            print(f"❌ Ошибка обработчика {event}: {task.exception()}")
+
+    async def wait_idle(self):
+        """Ожидание обработки уже доставленных событий"""
+        while self._pending:
+            await asyncio.gather(*list(self._pending), return_exceptions=True)
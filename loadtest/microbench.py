@@ -0,0 +1,376 @@
+"""Микробенчмарки горячих путей настроек и тикетов
+
+Замеряет операции ConfigHandler и TicketManager на 10^3-10^6 серверов
+и тикетов: время на операцию (медиана повторов, сборщик мусора
+выключен) и пиковую память (tracemalloc, отдельный прогон). Хранилище
+заменено на пустое в памяти, чтобы в замер не попадал диск.
+
+    python -m loadtest.microbench
+    python -m loadtest.microbench --sizes 1000,100000 --json bench.json
+    python -m loadtest.microbench --json new.json --compare old.json
+"""
+import argparse
+import asyncio
+import contextlib
+import gc
+import json
+import math
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+
+# Модули бота импортируются и после смены рабочей папки
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from models.ticket_models import Ticket, TicketManager
+from storage.base import StorageBackend
+
+DEFAULT_SIZES = (1_000, 10_000, 100_000, 1_000_000)
+# Замедление относительно прошлого результата, которое считается регрессией
+# (разброс медиан между запусками на одной машине - до 10-15%)
+DEFAULT_THRESHOLD = 0.25
+# Прогон состоит из стольких независимых копий бенчмарка (у каждой свое
+# состояние), чтобы длиться не меньше MIN_RUN_SECONDS, как timeit.autorange:
+# короткий прогон на маленьком n иначе тонет в шуме таймера и планировщика
+MIN_RUN_SECONDS = 0.01
+MAX_LOOPS = 1000
+# Прогоны повторяются, пока их суммарное время не наберет
+# MIN_MEASURE_SECONDS (но не больше MAX_REPEAT прогонов)
+MIN_MEASURE_SECONDS = 0.2
+MAX_REPEAT = 30
+
+BENCHMARKS = {}  # имя -> функция подготовки(n, rng), возвращающая (функция замера, число операций)
+
+def benchmark(name: str):
+    def decorator(func):
+        BENCHMARKS[name] = func
+        return func
+    return decorator
+
+class MemoryStorage(StorageBackend):
+    """Хранилище без записи: в замер попадает только работа в памяти"""
+    name = "memory"
+
+    def load_guild_settings(self) -> dict:
+        return {}
+
+    def save_guild_settings(self, changes: dict):
+        pass
+
+    def load_ticket_stats(self) -> dict:
+        return {}
+
+    def save_ticket_stats(self, changes: dict):
+        pass
+
+    def load_tickets(self, finished_limit: int = 0) -> list:
+        return []
+
+    def load_all_tickets(self) -> list:
+        return []
+
+    def save_ticket(self, ticket: dict):
+        pass
+
+def _config_handler():
+    from utils.config_handler import ConfigHandler
+    return ConfigHandler(MemoryStorage())
+
+def _ids(n: int, rng, start: int = 10 ** 17) -> list:
+    ids = list(range(start, start + n))
+    rng.shuffle(ids)
+    return ids
+
+def _ticket_manager(n: int, rng):
+    """Менеджер с n открытыми тикетами на n // 10 серверах"""
+    manager = TicketManager()
+    guilds = max(1, n // 10)
+    tickets = []
+    for channel_id in _ids(n, rng):
+        guild_id = channel_id % guilds
+        tickets.append(manager.create_ticket(channel_id, channel_id + 1, guild_id))
+    return manager, tickets
+
+@benchmark("config.update_guild_settings")
+def bench_config_update(n, rng):
+    config = _config_handler()
+    guild_ids = _ids(n, rng)
+
+    def run():
+        for guild_id in guild_ids:
+            config.update_guild_settings(guild_id, button_label="Отзыв", log_channel_id=guild_id)
+        # Запись в хранилище не замеряется
+        config._cancel_pending_save()
+    return run, n
+
+@benchmark("config.get_guild_settings")
+def bench_config_get(n, rng):
+    config = _config_handler()
+    guild_ids = _ids(n, rng)
+    for guild_id in guild_ids[::2]:
+        config.update_guild_settings(guild_id, button_label="Отзыв")
+    config._cancel_pending_save()
+    # Половина серверов со своими настройками, половина - с настройками по умолчанию
+    rng.shuffle(guild_ids)
+
+    def run():
+        get = config.get_guild_settings
+        for guild_id in guild_ids:
+            get(guild_id)
+    return run, n
+
+@benchmark("tickets.create_ticket")
+def bench_create_ticket(n, rng):
+    manager = TicketManager()
+    guilds = max(1, n // 10)
+    channel_ids = _ids(n, rng)
+
+    def run():
+        create = manager.create_ticket
+        for channel_id in channel_ids:
+            create(channel_id, channel_id + 1, channel_id % guilds)
+    return run, n
+
+@benchmark("tickets.user_has_active_ticket")
+def bench_user_has_active_ticket(n, rng):
+    manager, tickets = _ticket_manager(n, rng)
+    # Половина запросов - пользователи без тикета
+    queries = [(ticket.creator_id, ticket.guild_id) for ticket in tickets[::2]]
+    queries += [(ticket.creator_id + 7, ticket.guild_id) for ticket in tickets[1::2]]
+    rng.shuffle(queries)
+
+    def run():
+        check = manager.user_has_active_ticket
+        for user_id, guild_id in queries:
+            check(user_id, guild_id)
+    return run, len(queries)
+
+@benchmark("tickets.get_ticket")
+def bench_get_ticket(n, rng):
+    manager, tickets = _ticket_manager(n, rng)
+    channel_ids = [ticket.channel_id for ticket in tickets]
+    rng.shuffle(channel_ids)
+
+    def run():
+        get = manager.get_ticket
+        for channel_id in channel_ids:
+            get(channel_id)
+    return run, n
+
+@benchmark("ticket.add_message")
+def bench_add_message(n, rng):
+    # Сообщения распределены по 1000 тикетам, как в канале с живой перепиской
+    tickets = [Ticket(channel_id, 1, 1, datetime.now()) for channel_id in range(min(n, 1000))]
+    timestamp = datetime.now()
+    messages = [(tickets[index % len(tickets)], index) for index in range(n)]
+    rng.shuffle(messages)
+
+    def run():
+        for ticket, message_id in messages:
+            ticket.add_message(42, "Текст сообщения в тикете", timestamp, message_id)
+    return run, n
+
+@benchmark("stats.on_close")
+def bench_stats_on_close(n, rng):
+    from models.ticket_stats import TicketStats
+    # Без хранилища: замеряется только обновление корзин и гистограммы
+    stats = TicketStats()
+    now = datetime.now().timestamp()
+    tickets = [Ticket(channel_id, 1, channel_id % max(1, n // 10), datetime.now()) for channel_id in range(n)]
+    for ticket in tickets:
+        ticket.closed_ts = now + rng.expovariate(1 / 3600)
+
+    def run():
+        on_close = stats.on_close
+        for ticket in tickets:
+            on_close(ticket)
+    return run, n
+
+def measure_time(setup, n: int, rng_seed: int, repeat: int) -> tuple:
+    """Медиана времени прогонов (не меньше repeat), у каждого прогона свежее состояние
+
+    Возвращает (время одной копии бенчмарка, число операций в ней, число
+    копий в прогоне). Медиана, а не лучший прогон: на общей машине лучший
+    прогон зависит от случайно свободного процессора и сильно отличается
+    между запусками.
+    """
+    loops = autorange(setup, n, rng_seed)
+    times = []
+    total = 0.0
+    attempt = 0
+    while attempt < repeat or (total < MIN_MEASURE_SECONDS and attempt < MAX_REPEAT):
+        elapsed, ops = _timed_run(setup, n, rng_seed + attempt * loops, loops)
+        times.append(elapsed / loops)
+        total += elapsed
+        attempt += 1
+    return statistics.median(times), ops, loops
+
+def autorange(setup, n: int, rng_seed: int) -> int:
+    """Число копий бенчмарка в прогоне, при котором он длится не меньше MIN_RUN_SECONDS"""
+    loops = 1
+    while loops < MAX_LOOPS:
+        elapsed, _ = _timed_run(setup, n, rng_seed, loops)
+        if elapsed >= MIN_RUN_SECONDS:
+            break
+        # С запасом, чтобы не промахнуться из-за шума пробного прогона
+        estimate = math.ceil(loops * MIN_RUN_SECONDS * 1.2 / max(elapsed, 1e-9))
+        loops = min(MAX_LOOPS, max(loops * 2, estimate))
+    return loops
+
+def _timed_run(setup, n: int, rng_seed: int, loops: int) -> tuple:
+    """Время прогона loops копий бенчмарка подряд и число операций в одной копии"""
+    runs = []
+    for index in range(loops):
+        run, ops = setup(n, random.Random(rng_seed + index))
+        runs.append(run)
+    gc.collect()
+    gc.disable()
+    try:
+        started = time.perf_counter()
+        for run in runs:
+            run()
+        elapsed = time.perf_counter() - started
+    finally:
+        gc.enable()
+    del runs
+    return elapsed, ops
+
+def measure_memory(setup, n: int, rng_seed: int) -> dict:
+    """Пиковая и оставшаяся после прогона память, выделенная во время замера"""
+    run, _ = setup(n, random.Random(rng_seed))
+    gc.collect()
+    tracemalloc.start()
+    try:
+        run()
+        retained, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {"peak_bytes": peak, "retained_bytes": retained}
+
+async def run_suite(names, sizes, repeat: int, seed: int, memory: bool) -> list:
+    # Внутри event loop, как в боте: запись настроек откладывается, а не идет сразу
+    results = []
+    for name in names:
+        setup = BENCHMARKS[name]
+        for n in sizes:
+            seconds, ops, loops = measure_time(setup, n, seed, repeat)
+            result = {"name": name, "n": n, "loops": loops, **_timing(seconds, ops)}
+            if memory:
+                result.update(measure_memory(setup, n, seed))
+            results.append(result)
+            print(_format_result(result))
+    return results
+
+def _timing(seconds: float, ops: int) -> dict:
+    return {
+        "ops": ops,
+        "seconds": round(seconds, 6),
+        "ns_per_op": round(seconds / ops * 1e9, 1),
+        "ops_per_second": round(ops / seconds) if seconds else None
+    }
+
+def _format_result(result: dict) -> str:
+    line = f"  {result['name']:<32} n={result['n']:<9} {result['ns_per_op']:>10.1f} нс/оп"
+    if "peak_bytes" in result:
+        line += f"  пик {result['peak_bytes'] / 1024 / 1024:8.2f} МБ"
+    return line
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def compare(results: list, baseline: dict, threshold: float) -> int:
+    """Сравнение с прошлым результатом, возвращает число регрессий"""
+    previous = {(item["name"], item["n"]): item for item in baseline.get("results", [])}
+    regressions = 0
+    print(f"\n📊 Сравнение с {baseline.get('revision') or 'прошлым результатом'}")
+    for result in results:
+        old = previous.get((result["name"], result["n"]))
+        if old is None:
+            continue
+        ratio = result["ns_per_op"] / old["ns_per_op"] if old["ns_per_op"] else 1.0
+        mark = "✅"
+        if ratio > 1 + threshold:
+            mark = "❌"
+            regressions += 1
+        line = f"  {mark} {result['name']:<32} n={result['n']:<9} x{ratio:.2f} по времени"
+        if "peak_bytes" in result and old.get("peak_bytes"):
+            line += f", x{result['peak_bytes'] / old['peak_bytes']:.2f} по памяти"
+        print(line)
+    return regressions
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Микробенчмарки настроек и тикетов")
+    parser.add_argument("--sizes", default=",".join(str(size) for size in DEFAULT_SIZES),
+                        help="размеры через запятую")
+    parser.add_argument("--only", default=None, help="имена бенчмарков через запятую")
+    parser.add_argument("--repeat", type=int, default=3, help="прогонов на замер времени")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--no-memory", action="store_true", help="не замерять память (быстрее)")
+    parser.add_argument("--json", dest="json_path", default=None, help="записать результаты в файл JSON ('-' - в stdout)")
+    parser.add_argument("--compare", default=None, help="файл JSON прошлого прогона для сравнения")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="допустимое замедление (0.25 = 25%%)")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    sizes = [int(size.replace("_", "")) for size in args.sizes.split(",") if size]
+    names = list(BENCHMARKS) if not args.only else [name.strip() for name in args.only.split(",")]
+    unknown = [name for name in names if name not in BENCHMARKS]
+    if unknown:
+        print(f"❌ Неизвестные бенчмарки: {', '.join(unknown)}. Доступны: {', '.join(BENCHMARKS)}")
+        raise SystemExit(2)
+
+    json_path = args.json_path
+    if json_path and json_path != "-":
+        json_path = Path(json_path).resolve()
+    baseline = None
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+
+    # ConfigHandler создает config.json в рабочей папке
+    os.chdir(tempfile.mkdtemp(prefix="ticketbot-microbench-"))
+
+    # С --json - в stdout идет только документ JSON, ход замеров - в stderr
+    output = sys.stdout
+    with contextlib.redirect_stdout(sys.stderr if json_path == "-" else output):
+        print(f"🚀 Микробенчмарки: {len(names)} шт., размеры {', '.join(str(size) for size in sizes)}")
+        results = asyncio.run(run_suite(names, sizes, args.repeat, args.seed, not args.no_memory))
+        report = {
+            "revision": git_revision(),
+            "time": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "repeat": args.repeat,
+            "results": results
+        }
+
+        if json_path == "-":
+            output.write(json.dumps(report, ensure_ascii=False, indent=2) + "\n")
+        elif json_path:
+            with open(json_path, 'w', encoding='utf-8') as f:
+                json.dump(report, f, ensure_ascii=False, indent=2)
+            print(f"💾 Результаты записаны в {json_path}")
+
+        regressions = compare(results, baseline, args.threshold) if baseline is not None else 0
+    if regressions:
+        raise SystemExit(1)
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,29 @@
+import time
+# Момент запуска процесса, от него считается время старта (до импорта discord)
+STARTED_AT = time.perf_counter()
+
 import discord
 from discord.ext import commands
 import asyncio
 import os
+import signal
 from dotenv import load_dotenv
+from utils.config_handler import get_config_handler
+from storage import get_storage
+from models.ticket_models import get_ticket_manager
+from utils.logger import get_ticket_logger
+from utils.cluster import HealthReporter, cluster_id as current_cluster_id
+from utils.command_sync import sync_commands
+from utils.metrics import (
+    GATEWAY_EVENTS, MetricsCommandTree, metrics_server_from_env, observe_command, register_bot_collectors
+)
+from utils.rest_scheduler import get_rest_scheduler
+from utils.startup import get_startup_timer
+from views.ticket_views import DYNAMIC_ITEMS
+
+startup = get_startup_timer()
+startup.begin(STARTED_AT)
+startup.mark("Импорт модулей")
 
 # Загружаем токен из .env
 load_dotenv()
@@ -13,47 +34,126 @@ if not TOKEN:
     print("Создайте файл .env с содержимым: DISCORD_TOKEN=ваш_токен")
     exit()
 
-print(f"✅ Токен получен")
-
 # Настройка интентов
 intents = discord.Intents.default()
 intents.message_content = True
 intents.members = True
 intents.guilds = True
 
-# Создаем бота с tree команд
-bot = commands.Bot(command_prefix="!", intents=intents, help_command=None)
-
-# Событие при запуске
-@bot.event
-async def on_ready():
-    print(f'✅ Бот {bot.user} успешно запущен!')
-    print(f'🔗 Пригласительная ссылка: https://discord.com/oauth2/authorize?client_id={bot.user.id}&scope=bot&permissions=8')
-    print(f'📊 Серверов: {len(bot.guilds)}')
+class TicketBotMixin:
+    """Общее поведение бота для обычного режима и режима шардов"""
+    health_reporter = None
+    metrics_server = None
+    _first_interaction = True
     
-    # Синхронизация команд
-    try:
-        synced = await bot.tree.sync()
-        print(f"✅ Синхронизировано {len(synced)} команд")
+    async def setup_hook(self):
+        startup.mark("Вход в Discord")
+        if self.metrics_server:
+            register_bot_collectors(self)
+            try:
+                await self.metrics_server.start()
+            except OSError as e:
+                print(f"❌ Не удалось запустить сервер метрик: {e}")
+                self.metrics_server = None
+        # Кнопки панелей и тикетов обрабатываются по шаблону custom_id,
+        # поэтому старые сообщения работают после перезапуска
+        self.add_dynamic_items(*DYNAMIC_ITEMS)
+        if self.health_reporter:
+            self.health_reporter.start()
         
-        # Показать список команд
-        print("📋 Доступные команды:")
-        for cmd in synced:
-            print(f"  /{cmd.name} - {cmd.description}")
-    except Exception as e:
-        print(f"❌ Ошибка синхронизации команд: {e}")
+        # Команды синхронизирует один процесс, и только если они изменились;
+        # подключение к шлюзу не ждет синхронизации
+        if current_cluster_id() in (None, 0):
+            self.loop.create_task(self._sync_commands())
+    
+    async def _sync_commands(self):
+        started = time.perf_counter()
+        try:
+            await sync_commands(self)
+        except Exception as e:
+            print(f"❌ Ошибка синхронизации команд: {e}")
+        startup.record("Синхронизация команд", time.perf_counter() - started)
+    
+    async def on_ready(self):
+        # on_ready приходит и после переподключений, старт отмечаем один раз
+        if not startup.mark("Подключение к шлюзу"):
+            return
+        
+        print(f'✅ Бот {self.user} успешно запущен!')
+        print(f'🔗 Пригласительная ссылка: https://discord.com/oauth2/authorize?client_id={self.user.id}&scope=bot&permissions=8')
+        print(f'📊 Серверов: {len(self.guilds)}')
+        print(startup.report())
+        
+        # Лаунчер кластеров ждет готовности, прежде чем запускать следующий кластер
+        if self.health_reporter:
+            self.health_reporter.report()
+    
+    async def on_interaction(self, interaction):
+        if self._first_interaction:
+            self._first_interaction = False
+            print(f"⏱️ Первое взаимодействие через {startup.elapsed():.1f} с после запуска")
+    
+    async def on_app_command_completion(self, interaction, command):
+        observe_command(interaction, "ok")
     
-    # Устанавливаем статус
-    await bot.change_presence(
-        activity=discord.Activity(
-            type=discord.ActivityType.watching,
-            name="тикеты | /setup"
-        ),
-        status=discord.Status.online
+    async def on_socket_event_type(self, event_type):
+        # Приходит только при включенных метриках (enable_debug_events)
+        GATEWAY_EVENTS.inc(event_type)
+    
+    async def close(self):
+        if self.health_reporter:
+            self.health_reporter.stop()
+        if self.metrics_server:
+            await self.metrics_server.stop()
+        # Отправляем накопленные логи, пока соединение с Discord еще открыто
+        await get_ticket_logger(self).flush()
+        await super().close()
+
+class TicketBot(TicketBotMixin, commands.Bot):
+    pass
+
+class ShardedTicketBot(TicketBotMixin, commands.AutoShardedBot):
+    pass
+
+def create_bot(shard_ids=None, shard_count=None, cluster_id=None):
+    """Создание бота
+    
+    Шарды включаются переменной SHARD_COUNT (число или auto) или лаунчером
+    кластеров (cluster.py), который передает процессу его диапазон шардов.
+    """
+    # max_ratelimit_timeout: длинные ограничения API возвращаются в планировщик
+    # запросов (utils/rest_scheduler.py), а не ожидаются внутри запроса;
+    # http_trace передает планировщику остаток лимитов из заголовков ответов
+    # Статус передается при подключении, отдельный change_presence не нужен
+    options = dict(
+        command_prefix="!",
+        intents=intents,
+        help_command=None,
+        max_ratelimit_timeout=5.0,
+        http_trace=get_rest_scheduler().trace_config(),
+        activity=discord.Activity(type=discord.ActivityType.watching, name="тикеты | /setup"),
+        status=discord.Status.online,
+        tree_cls=MetricsCommandTree
     )
+    
+    # Метрики включаются переменной METRICS_PORT; события шлюза по типам
+    # discord.py сообщает только с enable_debug_events
+    metrics_server = metrics_server_from_env(cluster_id)
+    if metrics_server:
+        options["enable_debug_events"] = True
+    
+    env_shards = os.getenv("SHARD_COUNT")
+    if shard_ids is None and not env_shards:
+        bot = TicketBot(**options)
+    else:
+        if shard_count is None and env_shards and env_shards.lower() != "auto":
+            shard_count = int(env_shards)
+        bot = ShardedTicketBot(shard_ids=shard_ids, shard_count=shard_count, **options)
+    bot.metrics_server = metrics_server
+    return bot
 
 # Загрузка когов
-async def load_extensions():
+async def load_extensions(bot):
     extensions = ["cogs.ticket_system", "cogs.setup_cog"]
     
     for ext in extensions:
@@ -62,13 +162,27 @@ async def load_extensions():
             print(f"✅ Загружен: {ext}")
         except Exception as e:
             print(f"❌ Ошибка загрузки {ext}: {e}")
+    startup.mark("Загрузка расширений")
 
 # Основная функция
-async def main():
-    print("🚀 Запуск бота...")
+async def main(shard_ids=None, shard_count=None, cluster_id=None, health_queue=None):
+    if cluster_id is None:
+        print("🚀 Запуск бота...")
+    else:
+        print(f"🚀 Запуск кластера {cluster_id}: шарды {shard_ids[0]}-{shard_ids[-1]} из {shard_count}")
+    
+    bot = create_bot(shard_ids, shard_count, cluster_id)
+    if health_queue is not None:
+        bot.health_reporter = HealthReporter(bot, cluster_id, health_queue)
+    
+    # Корректная остановка по SIGTERM (docker stop, лаунчер кластеров)
+    try:
+        asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, lambda: asyncio.ensure_future(bot.close()))
+    except NotImplementedError:
+        pass
     
     # Загружаем расширения
-    await load_extensions()
+    await load_extensions(bot)
     
     # Запускаем бота
     try:
@@ -79,10 +193,24 @@ async def main():
         print("\n🛑 Бот остановлен")
     except Exception as e:
         print(f"❌ Неизвестная ошибка: {e}")
+    finally:
+        # Сохраняем несохраненные настройки перед выходом
+        await get_config_handler().flush()
+        await get_ticket_manager().flush()
+        get_storage().close()
+
+def run_cluster(cluster_id, shard_ids, shard_count, health_queue):
+    """Точка входа процесса кластера (запускается из cluster.py)"""
+    os.environ["CLUSTER_ID"] = str(cluster_id)
+    try:
+        asyncio.run(main(shard_ids, shard_count, cluster_id, health_queue))
+    except KeyboardInterrupt:
+        pass
 
 # Запуск
 if __name__ == "__main__":
+    print(f"✅ Токен получен")
     try:
         asyncio.run(main())
     except KeyboardInterrupt:
-        print("\n👋 До свидания!")
\ No newline at end of file
+        print("\n👋 До свидания!")
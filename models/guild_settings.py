@@ -0,0 +1,175 @@
+import discord
+
+# Настройки сервера по умолчанию (записываются в config.json при первом запуске)
+DEFAULT_SETTINGS = {
+    "ticket_category_id": None,
+    "closed_category_id": None,
+    "log_channel_id": None,
+    "publish_channel_id": None,
+    "admin_role_name": "Admin",
+    "embed_color": "#3498db",
+    "ticket_title": "Оставьте свой отзыв",
+    "ticket_subtitle": "С вами мы становимся лучше",
+    "button_label": "Оставить отзыв",
+    "button_color": "primary",
+    "ticket_message": "📝 Пожалуйста, напишите ваш отзыв в этот канал.\n\nАдминистрация рассмотрит его в ближайшее время.",
+    "welcome_message": "🎫 Добро пожаловать в тикет поддержки! Опишите вашу проблему или оставьте отзыв."
+}
+
+ID_FIELDS = ("ticket_category_id", "closed_category_id", "log_channel_id", "publish_channel_id")
+TEXT_FIELDS = (
+    "admin_role_name", "ticket_title", "ticket_subtitle", "button_label",
+    "button_color", "ticket_message", "welcome_message"
+)
+FIELDS = ID_FIELDS + TEXT_FIELDS + ("embed_color",)
+
+# Названия настроек для сообщений об ошибках
+FIELD_LABELS = {
+    "ticket_category_id": "ID категории для тикетов",
+    "closed_category_id": "ID категории для закрытых тикетов",
+    "log_channel_id": "ID канала для логов",
+    "publish_channel_id": "ID канала для публикации отзывов",
+    "admin_role_name": "Название роли админа",
+    "embed_color": "Цвет embed",
+    "ticket_title": "Заголовок тикета",
+    "ticket_subtitle": "Подзаголовок",
+    "button_label": "Текст на кнопке",
+    "button_color": "Цвет кнопки",
+    "ticket_message": "Сообщение тикета",
+    "welcome_message": "Приветствие"
+}
+
+# Ограничения Discord на длину текстов
+TEXT_LIMITS = {
+    "admin_role_name": 100,
+    "ticket_title": 256,
+    "ticket_subtitle": 4096,
+    "button_label": 80,
+    "ticket_message": 4096,
+    "welcome_message": 1900
+}
+
+BUTTON_COLORS = ("primary", "secondary", "success", "danger")
+
+class GuildSettings:
+    """Неизменяемые настройки сервера
+
+    Значения проверяются и разбираются один раз при записи: ID хранятся
+    числами, цвет embed - готовым discord.Color. Изменение создает новый
+    объект через replace(), неизмененные значения общие со старым объектом,
+    а серверы без своих настроек используют один общий объект по умолчанию.
+    """
+    __slots__ = FIELDS + ("color",)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("GuildSettings нельзя изменять, используйте replace()")
+
+    def __delattr__(self, name):
+        raise AttributeError("GuildSettings нельзя изменять, используйте replace()")
+
+    @classmethod
+    def from_dict(cls, data: dict, base: "GuildSettings" = None) -> "GuildSettings":
+        """Настройки из сохраненного словаря
+
+        Отсутствующие и некорректные значения берутся из base (по умолчанию -
+        из DEFAULT_SETTINGS), чтобы одна испорченная запись не мешала запуску.
+        """
+        if base is None:
+            base = DEFAULT_GUILD_SETTINGS
+
+        values = {}
+        for name in FIELDS:
+            if name not in data:
+                continue
+            try:
+                value = _parse(name, data[name])
+            except ValueError as e:
+                print(f"⚠️ Пропущена некорректная настройка: {e}")
+                continue
+            # Совпадающие с base значения не храним отдельной копией
+            if value != getattr(base, name):
+                values[name] = value
+        return cls._build(base, values, parsed=True) if values else base
+
+    def replace(self, **changes) -> "GuildSettings":
+        """Новые настройки с измененными значениями
+
+        Бросает ValueError, если значение некорректно или настройка неизвестна.
+        """
+        for name in changes:
+            if name not in FIELDS:
+                raise ValueError(f"Неизвестная настройка: {name}")
+        return self._build(self, changes)
+
+    def to_dict(self) -> dict:
+        """Словарь для сохранения (ID записываются строками, как в Discord)"""
+        data = {name: getattr(self, name) for name in FIELDS}
+        for name in ID_FIELDS:
+            if data[name] is not None:
+                data[name] = str(data[name])
+        return data
+
+    def __repr__(self):
+        return f"<GuildSettings {self.to_dict()!r}>"
+
+    @classmethod
+    def _build(cls, base, values: dict, parsed: bool = False) -> "GuildSettings":
+        settings = object.__new__(cls)
+        for name in FIELDS:
+            if name in values:
+                value = values[name] if parsed else _parse(name, values[name])
+            else:
+                value = getattr(base, name)
+            object.__setattr__(settings, name, value)
+
+        if base is not None and settings.embed_color == base.embed_color:
+            color = base.color
+        else:
+            color = discord.Color.from_str(settings.embed_color)
+        object.__setattr__(settings, "color", color)
+        return settings
+
+def _parse(name: str, value):
+    """Проверка и приведение одного значения настройки"""
+    label = FIELD_LABELS[name]
+
+    if name in ID_FIELDS:
+        if value is None:
+            return None
+        if isinstance(value, str):
+            value = value.strip()
+            if not value:
+                return None
+            if not value.isdigit():
+                raise ValueError(f"{label}: ожидается числовой ID, получено «{value}»")
+        try:
+            value = int(value)
+        except (TypeError, ValueError):
+            raise ValueError(f"{label}: ожидается числовой ID, получено «{value}»")
+        if value <= 0:
+            raise ValueError(f"{label}: ожидается числовой ID, получено «{value}»")
+        return value
+
+    if not isinstance(value, str):
+        raise ValueError(f"{label}: ожидается строка")
+
+    if name == "embed_color":
+        value = value.strip()
+        try:
+            discord.Color.from_str(value)
+        except ValueError:
+            raise ValueError(f"{label}: некорректный цвет «{value}», пример: #3498db")
+        return value
+
+    if name == "button_color" and value not in BUTTON_COLORS:
+        raise ValueError(f"{label}: допустимые значения {', '.join(BUTTON_COLORS)}")
+
+    if not value.strip():
+        raise ValueError(f"{label}: значение не может быть пустым")
+    limit = TEXT_LIMITS.get(name)
+    if limit and len(value) > limit:
+        raise ValueError(f"{label}: не длиннее {limit} символов")
+    return value
+
+# Общий объект настроек для серверов без собственных настроек
+DEFAULT_GUILD_SETTINGS = GuildSettings._build(None, DEFAULT_SETTINGS)
@@ -1,45 +1,287 @@
-from dataclasses import dataclass
+import asyncio
+import os
+from collections import OrderedDict, deque
 from typing import Optional
 from datetime import datetime
 
-@dataclass
+# Состояния жизненного цикла тикета
+STATUS_OPEN = "open"  # канал открыт для переписки
+STATUS_CLOSING = "closing"  # закрытие запрошено, канал еще не заблокирован
+STATUS_CLOSED = "closed"  # канал заблокирован и ждет удаления
+STATUS_DELETED = "deleted"  # канал удален
+# Старое состояние опубликованного тикета, читается как closed + published
+STATUS_PUBLISHED = "published"
+
+# Допустимые переходы; в deleted можно попасть из любого состояния,
+# если канал удалили вручную
+TRANSITIONS = {
+    STATUS_OPEN: (STATUS_CLOSING, STATUS_DELETED),
+    STATUS_CLOSING: (STATUS_CLOSED, STATUS_DELETED),
+    STATUS_CLOSED: (STATUS_DELETED,),
+    STATUS_DELETED: ()
+}
+
+# Сколько завершенных тикетов держать в памяти (остальные только в хранилище)
+FINISHED_CACHE_SIZE = 1024
+# Сколько последних сообщений тикета держать в памяти (вся история на диске)
+RECENT_MESSAGES = 20
+
+_shared_manager = None
+
+def get_ticket_manager():
+    """Общий для всего процесса менеджер тикетов"""
+    global _shared_manager
+    if _shared_manager is None:
+        from storage import get_storage
+        from storage.transcript_archive import TranscriptArchive
+        from storage.transcript_spool import TranscriptSpool
+        from storage.search_index import SearchIndex
+        from models.ticket_stats import TicketStats
+        from utils.cluster import cluster_id
+        storage = get_storage()
+        _shared_manager = TicketManager(
+            storage,
+            TranscriptSpool(),
+            TranscriptArchive(cluster=cluster_id()),
+            SearchIndex(os.getenv("SEARCH_INDEX_PATH", "data/search.db")),
+            TicketStats(storage)
+        )
+    return _shared_manager
+
 class Ticket:
-    """Модель тикета"""
-    channel_id: int
-    creator_id: int
-    guild_id: int
-    created_at: datetime
-    closed_at: Optional[datetime] = None
-    status: str = "open"  # open, closed, published
-    messages: list = None
-    
-    def __post_init__(self):
-        if self.messages is None:
-            self.messages = []
-    
-    def add_message(self, author_id: int, content: str, timestamp: datetime):
-        """Добавление сообщения в историю тикета"""
-        self.messages.append({
+    """Модель тикета
+
+    Жизненный цикл: open -> closing -> closed -> deleted. Публикация отзыва
+    переводит тикет из open в closing и отмечает его флагом published.
+    Хранит время в виде unix timestamp и использует __slots__, чтобы
+    миллион тикетов в памяти занимал минимум места.
+    """
+    __slots__ = (
+        "channel_id", "creator_id", "guild_id", "created_ts", "closed_ts", "status", "published",
+        "recent_messages", "last_message_id"
+    )
+
+    def __init__(self, channel_id: int, creator_id: int, guild_id: int, created_at: datetime,
+                 closed_at: Optional[datetime] = None, status: str = STATUS_OPEN, published: bool = False):
+        self.channel_id = channel_id
+        self.creator_id = creator_id
+        self.guild_id = guild_id
+        self.created_ts = created_at.timestamp()
+        self.closed_ts = closed_at.timestamp() if closed_at else None
+        self.status = _intern_status(status)
+        self.published = published
+        # Кольцевой буфер последних сообщений, создается при первом сообщении
+        self.recent_messages = None
+        # ID последнего увиденного в канале сообщения (None после перезапуска)
+        self.last_message_id = None
+
+    def __repr__(self):
+        return f"<Ticket channel_id={self.channel_id} creator_id={self.creator_id} status={self.status}>"
+
+    @property
+    def created_at(self) -> datetime:
+        return datetime.fromtimestamp(self.created_ts)
+
+    @property
+    def closed_at(self) -> Optional[datetime]:
+        return datetime.fromtimestamp(self.closed_ts) if self.closed_ts is not None else None
+
+    @property
+    def is_open(self) -> bool:
+        return self.status is STATUS_OPEN
+
+    def add_message(self, author_id: int, content: str, timestamp: datetime, message_id: int = None) -> dict:
+        """Добавление сообщения в буфер последних сообщений тикета"""
+        record = {
+            "id": message_id,
             "author_id": author_id,
             "content": content,
             "timestamp": timestamp.isoformat()
-        })
-    
-    def close(self):
+        }
+        if self.recent_messages is None:
+            self.recent_messages = deque(maxlen=RECENT_MESSAGES)
+        self.recent_messages.append(record)
+        if message_id is not None:
+            self.last_message_id = message_id
+        return record
+
+    def edit_message(self, message_id: int, content: Optional[str]) -> dict:
+        """Правка (или удаление при content=None) сообщения в буфере тикета"""
+        if self.recent_messages is not None:
+            for record in self.recent_messages:
+                if record["id"] == message_id:
+                    record["content"] = content
+            if content is None:
+                self.recent_messages = deque(
+                    (record for record in self.recent_messages if record["content"] is not None),
+                    maxlen=RECENT_MESSAGES
+                )
+        if content is None:
+            return {"op": "delete", "id": message_id}
+        return {"op": "edit", "id": message_id, "content": content}
+
+    def transition(self, status: str) -> bool:
+        """Переход в новое состояние
+
+        Повторный переход в текущее состояние ничего не делает и возвращает
+        False, недопустимый переход вызывает ValueError.
+        """
+        status = _intern_status(status)
+        if status is self.status:
+            return False
+        if status not in TRANSITIONS[self.status]:
+            raise ValueError(f"Недопустимый переход тикета {self.channel_id}: {self.status} -> {status}")
+        if self.status is STATUS_OPEN:
+            self.closed_ts = datetime.now().timestamp()
+        self.status = status
+        return True
+
+    def close(self) -> bool:
         """Закрытие тикета"""
-        self.status = "closed"
-        self.closed_at = datetime.now()
-    
-    def publish(self):
-        """Публикация тикета"""
-        self.status = "published"
-        self.closed_at = datetime.now()
+        return self.transition(STATUS_CLOSING)
+
+    def publish(self) -> bool:
+        """Публикация тикета (только из открытого состояния)"""
+        if self.status is not STATUS_OPEN:
+            return False
+        self.published = True
+        return self.transition(STATUS_CLOSING)
+
+    def to_dict(self) -> dict:
+        """Запись тикета для хранилища (без истории сообщений)"""
+        closed_at = self.closed_at
+        return {
+            "channel_id": self.channel_id,
+            "creator_id": self.creator_id,
+            "guild_id": self.guild_id,
+            "status": self.status,
+            "published": self.published,
+            "created_at": self.created_at.isoformat(),
+            "closed_at": closed_at.isoformat() if closed_at else None
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Ticket":
+        """Восстановление тикета из записи хранилища"""
+        status = data.get("status", STATUS_OPEN)
+        published = bool(data.get("published"))
+        if status == STATUS_PUBLISHED:
+            status, published = STATUS_CLOSED, True
+        return cls(
+            channel_id=int(data["channel_id"]),
+            creator_id=int(data["creator_id"]),
+            guild_id=int(data["guild_id"]),
+            created_at=datetime.fromisoformat(data["created_at"]),
+            closed_at=datetime.fromisoformat(data["closed_at"]) if data.get("closed_at") else None,
+            status=status,
+            published=published
+        )
+
+def _intern_status(status: str) -> str:
+    """Один общий объект строки на статус, чтобы сравнивать через is"""
+    for known in TRANSITIONS:
+        if status == known:
+            return known
+    raise ValueError(f"Неизвестный статус тикета: {status}")
 
 class TicketManager:
-    """Менеджер для работы с тикетами"""
-    def __init__(self):
-        self.active_tickets = {}  # channel_id -> Ticket
-    
+    """Менеджер для работы с тикетами
+
+    В памяти хранятся открытые тикеты и ограниченное число недавно
+    завершенных; остальные завершенные тикеты есть только в хранилище.
+    История сообщений пишется в TranscriptSpool, после удаления канала
+    переносится в сжатый TranscriptArchive. Текст сообщений индексируется
+    для поиска в SearchIndex, итоги по серверам ведет TicketStats.
+    """
+    def __init__(self, storage=None, transcripts=None, archive=None, search=None, stats=None,
+                 finished_cache_size: int = FINISHED_CACHE_SIZE):
+        self.active_tickets = {}  # channel_id -> открытый Ticket
+        self.finished_tickets = OrderedDict()  # channel_id -> недавно завершенный Ticket
+        self.finished_cache_size = finished_cache_size
+        self.storage = storage
+        self.transcripts = transcripts
+        self.archive = archive
+        self.search = search
+        self.stats = stats
+        self.loaded = False
+
+        # Вторичные индексы открытых тикетов
+        self._open_by_user = {}  # (guild_id, user_id) -> channel_id
+        self._open_by_guild = {}  # guild_id -> {channel_id}
+        # Создаваемые сейчас тикеты: (guild_id, user_id) -> Future с тикетом
+        self._creating = {}
+        # Задачи переноса истории в архив
+        self._archiving = set()
+
+    async def load(self, guild_filter=None):
+        """Восстановление тикетов из хранилища при запуске
+
+        guild_filter(guild_id) позволяет загрузить тикеты только части
+        серверов (например, серверов шардов одного процесса кластера).
+        """
+        if self.loaded or self.storage is None:
+            self.loaded = True
+            return
+        if self.archive is not None:
+            await self.archive.load()
+        if self.stats is not None:
+            await self.stats.load()
+        records = await self.storage.submit(self.storage.load_tickets, self.finished_cache_size)
+        finished = []
+        for record in records:
+            ticket = Ticket.from_dict(record)
+            if guild_filter is not None and not guild_filter(ticket.guild_id):
+                continue
+            if ticket.is_open:
+                self._track_open(ticket)
+            else:
+                finished.append(ticket)
+
+        finished.sort(key=lambda ticket: ticket.closed_ts or 0)
+        for ticket in finished[-self.finished_cache_size:]:
+            if ticket.status is not STATUS_DELETED:
+                self._track_finished(ticket)
+        self.loaded = True
+
+    async def compact(self):
+        """Сворачивание журнала тикетов"""
+        if self.storage is not None:
+            await self.storage.submit(self.storage.compact)
+
+    async def flush(self):
+        """Запись накопленной истории сообщений на диск"""
+        if self.transcripts is not None:
+            await self.transcripts.flush()
+        if self.search is not None:
+            await self.search.flush()
+        if self.stats is not None:
+            await self.stats.flush()
+        if self._archiving:
+            await asyncio.gather(*self._archiving, return_exceptions=True)
+
+    def iter_transcript(self, channel_id: int):
+        """Асинхронный итератор по истории тикета с учетом правок и удалений"""
+        if self.transcripts is None:
+            return _empty_aiter()
+        return self.transcripts.aiter_resolved(channel_id)
+
+    async def transcript_source(self, channel_id: int):
+        """Где лежит история тикета: (запись тикета, источник) или None
+
+        Источник - ("archive", путь сегмента, смещение, длина) или
+        ("spool", путь файла); по нему историю читает процесс экспорта.
+        """
+        if self.archive is not None:
+            archived = await self.archive.find(channel_id)
+            if archived is not None:
+                entry, segment = archived
+                return entry, ("archive", str(segment), entry["offset"], entry["length"])
+        ticket = self.get_ticket(channel_id)
+        if ticket is None or self.transcripts is None:
+            return None
+        await self.transcripts.flush()
+        return ticket.to_dict(), ("spool", str(self.transcripts.path_for(channel_id)))
+
     def create_ticket(self, channel_id: int, creator_id: int, guild_id: int) -> Ticket:
         """Создание нового тикета"""
         ticket = Ticket(
@@ -48,24 +290,220 @@ class TicketManager:
             guild_id=guild_id,
             created_at=datetime.now()
         )
-        self.active_tickets[channel_id] = ticket
+        self._track_open(ticket)
+        self._persist(ticket)
+        if self.stats is not None:
+            self.stats.on_open(ticket)
         return ticket
-    
+
+    async def create_ticket_once(self, creator_id: int, guild_id: int, create_channel):
+        """Создание тикета, не больше одного одновременно на пользователя сервера
+
+        create_channel - функция без аргументов, возвращающая корутину
+        создания канала. Параллельные вызовы для того же пользователя не
+        создают второй канал, а ждут первый и получают его тикет (или его
+        ошибку); вызовы других пользователей друг друга не ждут.
+        Возвращает (ticket, channel); channel равен None, если канал создан
+        другим вызовом или у пользователя уже есть открытый тикет.
+        """
+        key = (guild_id, creator_id)
+        # Проверка и регистрация создания идут без await между ними
+        existing = self.get_open_ticket(creator_id, guild_id)
+        if existing is not None:
+            return existing, None
+        pending = self._creating.get(key)
+        if pending is not None:
+            # shield: отмена ожидающего вызова не отменяет создание
+            return await asyncio.shield(pending), None
+
+        future = asyncio.get_running_loop().create_future()
+        future.add_done_callback(_consume_exception)
+        self._creating[key] = future
+        try:
+            channel = await create_channel()
+            ticket = self.create_ticket(channel.id, creator_id, guild_id)
+        except BaseException as e:
+            future.set_exception(e if isinstance(e, Exception) else RuntimeError("создание тикета прервано"))
+            raise
+        else:
+            future.set_result(ticket)
+        finally:
+            del self._creating[key]
+        return ticket, channel
+
     def get_ticket(self, channel_id: int) -> Optional[Ticket]:
         """Получение тикета по ID канала"""
-        return self.active_tickets.get(channel_id)
-    
-    def close_ticket(self, channel_id: int):
+        ticket = self.active_tickets.get(channel_id)
+        if ticket is None:
+            ticket = self.finished_tickets.get(channel_id)
+        return ticket
+
+    def get_open_ticket(self, user_id: int, guild_id: int) -> Optional[Ticket]:
+        """Открытый тикет пользователя на сервере"""
+        channel_id = self._open_by_user.get((guild_id, user_id))
+        return self.active_tickets.get(channel_id) if channel_id is not None else None
+
+    def get_guild_tickets(self, guild_id: int) -> list:
+        """Открытые тикеты сервера"""
+        return [self.active_tickets[channel_id] for channel_id in self._open_by_guild.get(guild_id, ())]
+
+    def count_open_tickets(self, guild_id: int) -> int:
+        """Количество открытых тикетов сервера"""
+        return len(self._open_by_guild.get(guild_id, ()))
+
+    def open_counts_by_guild(self) -> dict:
+        """Количество открытых тикетов по серверам: guild_id -> количество"""
+        return {guild_id: len(channels) for guild_id, channels in self._open_by_guild.items()}
+
+    def add_message(self, channel_id: int, author_id: int, content: str, timestamp: datetime, message_id: int = None):
+        """Добавление сообщения в историю тикета с записью на диск"""
+        ticket = self.active_tickets.get(channel_id)
+        if ticket:
+            record = ticket.add_message(author_id, content, timestamp, message_id)
+            if self.transcripts is not None:
+                self.transcripts.append(channel_id, record)
+            if self.search is not None:
+                self.search.add(ticket.guild_id, channel_id, record)
+
+    def edit_message(self, channel_id: int, message_id: int, content: Optional[str]):
+        """Запись правки сообщения тикета (content=None означает удаление)"""
+        ticket = self.active_tickets.get(channel_id)
+        if ticket:
+            record = ticket.edit_message(message_id, content)
+            if self.transcripts is not None:
+                self.transcripts.append(channel_id, record)
+            if self.search is not None:
+                self.search.edit(message_id, content)
+
+    def mark_seen(self, channel_id: int, message_id: int):
+        """Отметка сообщения, которое видели, но не сохраняли (например, от бота)"""
+        ticket = self.active_tickets.get(channel_id)
+        if ticket:
+            ticket.last_message_id = message_id
+
+    def transition(self, channel_id: int, status: str) -> bool:
+        """Перевод тикета в новое состояние с сохранением
+
+        Возвращает True, если состояние изменилось. Для неизвестного тикета
+        (например, уже вытесненного из памяти) ничего не делает.
+        """
+        ticket = self.get_ticket(channel_id)
+        if not ticket:
+            return False
+        was_open = ticket.is_open
+        if not ticket.transition(status):
+            return False
+        self._after_transition(ticket, was_open)
+        return True
+
+    def close_ticket(self, channel_id: int) -> bool:
         """Закрытие тикета"""
+        return self.transition(channel_id, STATUS_CLOSING)
+
+    def publish_ticket(self, channel_id: int) -> bool:
+        """Публикация тикета"""
         ticket = self.get_ticket(channel_id)
-        if ticket:
-            ticket.close()
-            # Можно сохранить в базу данных здесь
-            # self.save_to_database(ticket)
-    
+        if not ticket or not ticket.publish():
+            return False
+        self._after_transition(ticket, True)
+        return True
+
     def user_has_active_ticket(self, user_id: int, guild_id: int) -> bool:
         """Проверка, есть ли у пользователя активный тикет"""
-        for ticket in self.active_tickets.values():
-            if ticket.creator_id == user_id and ticket.guild_id == guild_id and ticket.status == "open":
-                return True
-        return False
\ No newline at end of file
+        return (guild_id, user_id) in self._open_by_user
+
+    def _track_open(self, ticket: Ticket):
+        self.active_tickets[ticket.channel_id] = ticket
+        self._open_by_user[(ticket.guild_id, ticket.creator_id)] = ticket.channel_id
+        self._open_by_guild.setdefault(ticket.guild_id, set()).add(ticket.channel_id)
+
+    def _track_finished(self, ticket: Ticket):
+        # Завершенный тикет нужен в памяти недолго, до удаления канала,
+        # а его история уже есть на диске
+        ticket.recent_messages = None
+        self.finished_tickets[ticket.channel_id] = ticket
+        self.finished_tickets.move_to_end(ticket.channel_id)
+        while len(self.finished_tickets) > self.finished_cache_size:
+            self.finished_tickets.popitem(last=False)
+
+    def _after_transition(self, ticket: Ticket, was_open: bool):
+        """Обновление индексов после смены состояния и сохранение"""
+        if was_open and self.stats is not None:
+            if ticket.status is STATUS_DELETED:
+                # Канал удален без закрытия: это не закрытие тикета
+                self.stats.on_delete(ticket)
+            else:
+                # Закрытие или публикация
+                self.stats.on_close(ticket)
+        if was_open and self.active_tickets.pop(ticket.channel_id, None) is not None:
+            key = (ticket.guild_id, ticket.creator_id)
+            if self._open_by_user.get(key) == ticket.channel_id:
+                del self._open_by_user[key]
+            guild_tickets = self._open_by_guild.get(ticket.guild_id)
+            if guild_tickets is not None:
+                guild_tickets.discard(ticket.channel_id)
+                if not guild_tickets:
+                    del self._open_by_guild[ticket.guild_id]
+        if ticket.status is STATUS_DELETED:
+            # Канала больше нет, держать тикет в памяти незачем
+            self.finished_tickets.pop(ticket.channel_id, None)
+            self._archive_transcript(ticket)
+        else:
+            self._track_finished(ticket)
+        self._persist(ticket)
+
+    def _persist(self, ticket: Ticket):
+        """Фоновое сохранение записи о тикете в хранилище"""
+        self._submit("save_ticket", ticket.to_dict())
+
+    def _archive_transcript(self, ticket: Ticket):
+        """Фоновый перенос истории удаленного тикета в архив"""
+        if self.archive is None or self.transcripts is None:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # Вне event loop история остается в спуле
+            return
+        task = loop.create_task(self._archive(ticket))
+        self._archiving.add(task)
+        task.add_done_callback(self._archiving.discard)
+        task.add_done_callback(_report_archive_error)
+
+    async def _archive(self, ticket: Ticket):
+        await self.transcripts.flush()
+        if not self.transcripts.size(ticket.channel_id):
+            return
+        channel_id = ticket.channel_id
+        await self.archive.add(ticket, lambda: self.transcripts.iter_resolved(channel_id))
+        self.transcripts.remove(channel_id)
+
+    def _submit(self, method: str, *args):
+        """Запуск операции хранилища без ожидания результата"""
+        if self.storage is None:
+            return
+        func = getattr(self.storage, method)
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            func(*args)
+            return
+        task = loop.create_task(self.storage.submit(func, *args))
+        task.add_done_callback(_report_persist_error)
+
+async def _empty_aiter():
+    return
+    yield
+
+def _consume_exception(future):
+    # Ошибку создания получает вызвавший; ожидающих вызовов может не быть
+    if not future.cancelled():
+        future.exception()
+
+def _report_archive_error(task):
+    if not task.cancelled() and task.exception():
+        print(f"❌ Ошибка архивации истории тикета: {task.exception()}")
+
+def _report_persist_error(task):
+    if not task.cancelled() and task.exception():
+        print(f"❌ Ошибка сохранения тикета: {task.exception()}")
@@ -0,0 +1,282 @@
+import asyncio
+import math
+import time
+from datetime import datetime, timezone
+from typing import Optional
+
+# Сколько последних дней хранится по дням (корзин в кольце на сервер)
+STATS_DAYS = 90
+# Относительная погрешность квантилей времени закрытия
+SKETCH_ACCURACY = 0.01
+# Длительности короче секунды считаются нулевыми
+SKETCH_MIN_VALUE = 1.0
+# Квантили времени закрытия в сводке
+QUANTILES = (0.5, 0.9, 0.99)
+# Задержка записи статистики: изменения за это время сохраняются одной записью
+SAVE_DEBOUNCE = 5.0
+
+SECONDS_PER_DAY = 86400
+
+class DurationSketch:
+    """Гистограмма длительностей с логарифмическими корзинами
+
+    Значение v попадает в корзину ceil(log(v) / log(gamma)), где
+    gamma = (1 + a) / (1 - a); оценка квантиля отличается от точного
+    значения не больше чем на долю a (SKETCH_ACCURACY). Корзины разрежены
+    (от секунды до года - меньше 1000 корзин при a = 1%), а гистограммы
+    складываются покорзинно, поэтому сводку можно объединить по серверам.
+    """
+    __slots__ = ("counts", "zeros", "count")
+
+    gamma = (1 + SKETCH_ACCURACY) / (1 - SKETCH_ACCURACY)
+    log_gamma = math.log(gamma)
+
+    def __init__(self):
+        self.counts = {}  # номер корзины -> количество
+        self.zeros = 0
+        self.count = 0
+
+    def add(self, value: float):
+        self.count += 1
+        if value < SKETCH_MIN_VALUE:
+            self.zeros += 1
+            return
+        index = math.ceil(math.log(value) / self.log_gamma)
+        self.counts[index] = self.counts.get(index, 0) + 1
+
+    def merge(self, other: "DurationSketch"):
+        for index, count in other.counts.items():
+            self.counts[index] = self.counts.get(index, 0) + count
+        self.zeros += other.zeros
+        self.count += other.count
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Оценка квантиля q (0-1) или None, если значений нет"""
+        if not self.count:
+            return None
+        rank = q * (self.count - 1)
+        seen = self.zeros
+        if rank < seen:
+            return 0.0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if rank < seen:
+                # Середина корзины (gamma^(i-1), gamma^i] с учетом погрешности
+                return 2 * self.gamma ** index / (self.gamma + 1)
+        return 2 * self.gamma ** max(self.counts) / (self.gamma + 1)
+
+    def to_dict(self) -> dict:
+        return {"zeros": self.zeros, "counts": {str(index): count for index, count in self.counts.items()}}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "DurationSketch":
+        sketch = cls()
+        sketch.zeros = data.get("zeros", 0)
+        sketch.counts = {int(index): count for index, count in data.get("counts", {}).items()}
+        sketch.count = sketch.zeros + sum(sketch.counts.values())
+        return sketch
+
+class GuildStats:
+    """Накопленная статистика тикетов одного сервера
+
+    Итоги за все время, кольцо из STATS_DAYS дневных корзин (открыто,
+    закрыто, опубликовано) и гистограмма времени до закрытия. Открытые
+    тикеты, чей канал удален без закрытия, считаются отдельно (deleted)
+    и в закрытия и время до закрытия не входят. Обновление и сводка не
+    зависят от числа тикетов.
+    """
+    __slots__ = ("opened", "closed", "published", "deleted", "days", "close_time")
+
+    def __init__(self):
+        self.opened = 0
+        self.closed = 0
+        self.published = 0
+        self.deleted = 0
+        # Слот кольца (день % STATS_DAYS) -> [день, открыто, закрыто, опубликовано]
+        self.days = {}
+        self.close_time = DurationSketch()
+
+    def on_open(self, ts: float):
+        self.opened += 1
+        self._day(ts)[1] += 1
+
+    def on_close(self, ts: float, duration: float, published: bool):
+        self.closed += 1
+        bucket = self._day(ts)
+        bucket[2] += 1
+        if published:
+            self.published += 1
+            bucket[3] += 1
+        self.close_time.add(max(0.0, duration))
+
+    def on_delete(self):
+        self.deleted += 1
+
+    def daily(self, days: int, now: float = None) -> list:
+        """[(дата, открыто, закрыто, опубликовано)] за последние days дней, от старых к новым"""
+        today = _day_number(time.time() if now is None else now)
+        result = []
+        for day in range(today - min(days, STATS_DAYS) + 1, today + 1):
+            bucket = self.days.get(day % STATS_DAYS)
+            counts = bucket[1:] if bucket is not None and bucket[0] == day else (0, 0, 0)
+            result.append((datetime.fromtimestamp(day * SECONDS_PER_DAY, timezone.utc).date(), *counts))
+        return result
+
+    def merge(self, other: "GuildStats"):
+        """Добавление статистики other (дни - только те, что еще в окне)"""
+        self.opened += other.opened
+        self.closed += other.closed
+        self.published += other.published
+        self.deleted += other.deleted
+        for slot, bucket in other.days.items():
+            current = self.days.get(slot)
+            if current is None or current[0] < bucket[0]:
+                self.days[slot] = list(bucket)
+            elif current[0] == bucket[0]:
+                for index in (1, 2, 3):
+                    current[index] += bucket[index]
+        self.close_time.merge(other.close_time)
+
+    def _day(self, ts: float) -> list:
+        day = _day_number(ts)
+        slot = day % STATS_DAYS
+        bucket = self.days.get(slot)
+        if bucket is None or bucket[0] != day:
+            # Слот занят днем, вышедшим из окна
+            bucket = self.days[slot] = [day, 0, 0, 0]
+        return bucket
+
+    def to_dict(self) -> dict:
+        return {
+            "opened": self.opened,
+            "closed": self.closed,
+            "published": self.published,
+            "deleted": self.deleted,
+            "days": list(self.days.values()),
+            "close_time": self.close_time.to_dict()
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "GuildStats":
+        stats = cls()
+        stats.opened = data.get("opened", 0)
+        stats.closed = data.get("closed", 0)
+        stats.published = data.get("published", 0)
+        stats.deleted = data.get("deleted", 0)
+        for bucket in data.get("days", ()):
+            stats.days[bucket[0] % STATS_DAYS] = list(bucket)
+        stats.close_time = DurationSketch.from_dict(data.get("close_time", {}))
+        return stats
+
+def _day_number(ts: float) -> int:
+    """Номер дня UTC от начала эпохи"""
+    return int(ts // SECONDS_PER_DAY)
+
+class TicketStats:
+    """Статистика тикетов по серверам, обновляемая при переходах тикетов
+
+    Сохраняется в хранилище тикетов отложенной записью только измененных
+    серверов, как настройки в ConfigHandler.
+    """
+    def __init__(self, storage=None):
+        self.storage = storage
+        self.guilds = {}  # guild_id -> GuildStats
+        self._dirty = set()
+        self._save_handle = None
+        self._save_task = None
+
+    async def load(self):
+        if self.storage is None:
+            return
+        records = await self.storage.submit(self.storage.load_ticket_stats)
+        for guild_id, data in records.items():
+            # Изменения, сделанные до загрузки, не теряются
+            stats = GuildStats.from_dict(data)
+            current = self.guilds.get(int(guild_id))
+            if current is not None:
+                stats.merge(current)
+            self.guilds[int(guild_id)] = stats
+
+    def get(self, guild_id: int) -> GuildStats:
+        """Статистика сервера (пустая, если тикетов еще не было)"""
+        return self.guilds.get(guild_id) or GuildStats()
+
+    def on_open(self, ticket):
+        self._guild(ticket.guild_id).on_open(ticket.created_ts)
+        self._changed(ticket.guild_id)
+
+    def on_close(self, ticket):
+        closed_ts = ticket.closed_ts if ticket.closed_ts is not None else time.time()
+        self._guild(ticket.guild_id).on_close(closed_ts, closed_ts - ticket.created_ts, ticket.published)
+        self._changed(ticket.guild_id)
+
+    def on_delete(self, ticket):
+        """Канал открытого тикета удален без закрытия (вручную или пока бот был выключен)"""
+        self._guild(ticket.guild_id).on_delete()
+        self._changed(ticket.guild_id)
+
+    def summary(self, guild_id: int, days: int = 7) -> dict:
+        """Сводка сервера: итоги, доля опубликованных, квантили времени до закрытия, дни"""
+        stats = self.get(guild_id)
+        return {
+            "opened": stats.opened,
+            "closed": stats.closed,
+            "published": stats.published,
+            "deleted": stats.deleted,
+            "published_ratio": stats.published / stats.closed if stats.closed else None,
+            "close_time": {q: stats.close_time.quantile(q) for q in QUANTILES},
+            "daily": stats.daily(days)
+        }
+
+    async def flush(self):
+        """Немедленная запись изменений (например, при остановке бота)"""
+        if self._save_handle:
+            self._save_handle.cancel()
+            self._save_handle = None
+        if self._save_task and not self._save_task.done():
+            await self._save_task
+        if self._dirty:
+            await self._write_behind()
+
+    def _guild(self, guild_id: int) -> GuildStats:
+        stats = self.guilds.get(guild_id)
+        if stats is None:
+            stats = self.guilds[guild_id] = GuildStats()
+        return stats
+
+    def _changed(self, guild_id: int):
+        self._dirty.add(guild_id)
+        self._schedule_save()
+
+    def _schedule_save(self):
+        if self.storage is None or self._save_handle is not None:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # Вне event loop пишем сразу
+            self.storage.save_ticket_stats(self._take_changes())
+            return
+        self._save_handle = loop.call_later(SAVE_DEBOUNCE, self._start_write_behind)
+
+    def _start_write_behind(self):
+        self._save_handle = None
+        if self._save_task and not self._save_task.done():
+            # Предыдущая запись еще идет, повторим после нее
+            self._save_task.add_done_callback(lambda _: self._schedule_save() if self._dirty else None)
+            return
+        self._save_task = asyncio.get_running_loop().create_task(self._write_behind())
+
+    async def _write_behind(self):
+        changes = self._take_changes()
+        try:
+            await self.storage.submit(self.storage.save_ticket_stats, changes)
+        except Exception as e:
+            print(f"❌ Ошибка сохранения статистики тикетов: {e}")
+            self._dirty.update(int(guild_id) for guild_id in changes)
+            self._schedule_save()
+
+    def _take_changes(self) -> dict:
+        changes = {str(guild_id): self.guilds[guild_id].to_dict() for guild_id in self._dirty}
+        self._dirty.clear()
+        return changes
@@ -0,0 +1,26 @@
+import os
+
+from storage.base import StorageBackend
+
+_shared_storage = None
+
+
+def create_storage(backend=None) -> StorageBackend:
+    """Создание хранилища по имени (json или sqlite)"""
+    backend = (backend or os.getenv("STORAGE_BACKEND", "json")).lower()
+    # Модули хранилищ импортируются только при выборе, чтобы не замедлять запуск
+    if backend == "sqlite":
+        from storage.sqlite_backend import SQLiteStorage
+        return SQLiteStorage(os.getenv("SQLITE_PATH", "data/bot.db"))
+    if backend == "json":
+        from storage.json_backend import JsonStorage
+        return JsonStorage()
+    raise ValueError(f"Неизвестное хранилище: {backend}")
+
+
+def get_storage() -> StorageBackend:
+    """Общее для всего процесса хранилище, выбранное через STORAGE_BACKEND"""
+    global _shared_storage
+    if _shared_storage is None:
+        _shared_storage = create_storage()
+    return _shared_storage
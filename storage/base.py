@@ -0,0 +1,62 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+
+class StorageBackend:
+    """Базовый класс хранилища настроек и тикетов
+
+    Методы хранилища синхронные и выполняются в собственном пуле потоков
+    через submit(), чтобы обращения к диску не блокировали event loop.
+    """
+    name = "base"
+
+    def __init__(self, max_workers: int = 1):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=f"storage-{self.name}")
+
+    async def submit(self, func, *args):
+        """Выполнение метода хранилища вне event loop"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, func, *args)
+
+    # Настройки серверов
+
+    def load_guild_settings(self) -> dict:
+        """Загрузка настроек всех серверов: {guild_id: settings}"""
+        raise NotImplementedError
+
+    def save_guild_settings(self, changes: dict):
+        """Сохранение настроек только измененных серверов"""
+        raise NotImplementedError
+
+    # Тикеты
+
+    def load_tickets(self, finished_limit: int = 0) -> list:
+        """Загрузка открытых тикетов и не более finished_limit
+        последних завершенных тикетов в виде словарей"""
+        raise NotImplementedError
+
+    def save_ticket(self, ticket: dict):
+        """Создание или обновление записи о тикете"""
+        raise NotImplementedError
+
+    def load_all_tickets(self) -> list:
+        """Все тикеты в любом состоянии, включая перенесенные в архив
+        (для переноса данных между хранилищами)"""
+        raise NotImplementedError
+
+    # Статистика тикетов
+
+    def load_ticket_stats(self) -> dict:
+        """Загрузка статистики тикетов всех серверов: {guild_id: stats}"""
+        raise NotImplementedError
+
+    def save_ticket_stats(self, changes: dict):
+        """Сохранение статистики только измененных серверов"""
+        raise NotImplementedError
+
+    def compact(self):
+        """Периодическое обслуживание хранилища (сворачивание журналов и т.п.)"""
+
+    def close(self):
+        """Освобождение ресурсов хранилища"""
+        self._executor.shutdown(wait=True)
@@ -0,0 +1,135 @@
+import json
+import os
+from pathlib import Path
+
+from storage.files import atomic_write_json
+
+# После стольких записей журнал сворачивается в снимок
+COMPACT_THRESHOLD = 10000
+
+
+class TicketJournal:
+    """Журнал тикетов с дозаписью и периодическим сворачиванием в снимок
+
+    Каждое изменение тикета (создание, смена статуса) дописывается одной
+    строкой JSON в конец журнала. Состояние восстанавливается из
+    последнего снимка и записей журнала после него. При сворачивании
+    завершенные тикеты уходят в архив (холодное хранилище). Методы не
+    потокобезопасны и должны вызываться из одного потока хранилища.
+    """
+
+    def __init__(self, data_dir="data", compact_threshold=COMPACT_THRESHOLD):
+        self.data_dir = Path(data_dir)
+        self.data_dir.mkdir(exist_ok=True)
+
+        self.journal_path = self.data_dir / "tickets.journal"
+        self.snapshot_path = self.data_dir / "tickets.snapshot.json"
+        self.archive_path = self.data_dir / "tickets.archive.jsonl"
+        self.compact_threshold = compact_threshold
+
+        self._tickets = None  # channel_id -> запись тикета
+        self._entries = 0
+        self._file = None
+
+    def load(self) -> dict:
+        """Восстановление состояния: снимок + записи журнала"""
+        self._tickets = {}
+        if self.snapshot_path.exists():
+            with open(self.snapshot_path, 'r', encoding='utf-8') as f:
+                self._tickets = json.load(f)
+
+        self._entries = 0
+        if self.journal_path.exists():
+            valid_size = 0
+            with open(self.journal_path, 'rb') as f:
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        # Недописанная строка после аварийной остановки; без
+                        # перевода строки следующая запись склеилась бы с ней
+                        break
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        break
+                    self._apply(entry)
+                    self._entries += 1
+                    valid_size += len(line)
+            if valid_size != self.journal_path.stat().st_size:
+                os.truncate(self.journal_path, valid_size)
+        return self._tickets
+
+    def load_all(self) -> dict:
+        """Все тикеты: перенесенные в архив и текущее состояние журнала
+
+        Тикет, измененный после переноса в архив, берется из более поздней
+        записи.
+        """
+        tickets = {}
+        if self.archive_path.exists():
+            with open(self.archive_path, 'rb') as f:
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        break
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        break
+                    tickets[str(record["channel_id"])] = record
+        state = self._tickets if self._tickets is not None else self.load()
+        tickets.update((key, dict(record)) for key, record in state.items())
+        return tickets
+
+    def append(self, entry: dict):
+        """Дозапись изменения в журнал"""
+        if self._tickets is None:
+            self.load()
+        self._apply(entry)
+
+        if self._file is None:
+            self._file = open(self.journal_path, 'a', encoding='utf-8')
+        self._file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        self._file.flush()
+        self._entries += 1
+
+        if self._entries >= self.compact_threshold:
+            self.compact()
+
+    def compact(self):
+        """Сворачивание журнала в снимок и очистка журнала
+
+        Завершенные тикеты переносятся в архив и больше не загружаются при запуске.
+        """
+        if self._tickets is None:
+            self.load()
+
+        finished = [key for key, record in self._tickets.items() if record["status"] != "open"]
+        if finished:
+            with open(self.archive_path, 'a', encoding='utf-8') as f:
+                for key in finished:
+                    f.write(json.dumps(self._tickets[key], ensure_ascii=False) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            for key in finished:
+                del self._tickets[key]
+
+        atomic_write_json(self.snapshot_path, self._tickets, indent=None)
+
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        # Снимок уже содержит все записи, журнал можно начать заново
+        with open(self.journal_path, 'w', encoding='utf-8') as f:
+            f.flush()
+            os.fsync(f.fileno())
+        self._entries = 0
+
+    def close(self):
+        if self._file is not None:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._file.close()
+            self._file = None
+
+    def _apply(self, entry: dict):
+        if entry["op"] == "ticket":
+            self._tickets[str(entry["channel_id"])] = dict(entry["ticket"])
@@ -0,0 +1,75 @@
+import json
+from pathlib import Path
+
+from storage.base import StorageBackend
+from storage.files import atomic_write_json
+from storage.journal import TicketJournal
+
+
+def _read_json(path, default):
+    if not path.exists():
+        return default
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+class JsonStorage(StorageBackend):
+    """Хранилище в JSON-файлах (исходный формат бота)"""
+    name = "json"
+
+    def __init__(self, data_dir="data"):
+        super().__init__()
+        self.data_dir = Path(data_dir)
+        self.data_dir.mkdir(exist_ok=True)
+
+        self.guild_settings_path = self.data_dir / "guild_settings.json"
+        self.ticket_stats_path = self.data_dir / "ticket_stats.json"
+
+        # Копия настроек, из которой собирается файл при записи
+        self._guild_settings = None
+        self._ticket_stats = None
+        # Тикеты хранятся в журнале с дозаписью, а не перезаписью файла
+        self._journal = TicketJournal(self.data_dir)
+
+    def load_guild_settings(self) -> dict:
+        self._guild_settings = _read_json(self.guild_settings_path, {})
+        return {guild_id: dict(settings) for guild_id, settings in self._guild_settings.items()}
+
+    def save_guild_settings(self, changes: dict):
+        if self._guild_settings is None:
+            self._guild_settings = _read_json(self.guild_settings_path, {})
+        self._guild_settings.update(changes)
+        atomic_write_json(self.guild_settings_path, self._guild_settings)
+
+    def load_ticket_stats(self) -> dict:
+        self._ticket_stats = _read_json(self.ticket_stats_path, {})
+        return dict(self._ticket_stats)
+
+    def save_ticket_stats(self, changes: dict):
+        if self._ticket_stats is None:
+            self._ticket_stats = _read_json(self.ticket_stats_path, {})
+        self._ticket_stats.update(changes)
+        atomic_write_json(self.ticket_stats_path, self._ticket_stats, indent=None)
+
+    def load_tickets(self, finished_limit: int = 0) -> list:
+        records = self._journal.load().values()
+        open_tickets = [dict(record) for record in records if record["status"] == "open"]
+        finished = sorted(
+            (record for record in records if record["status"] not in ("open", "deleted")),
+            key=lambda record: record.get("closed_at") or ""
+        )
+        finished = finished[-finished_limit:] if finished_limit else []
+        return open_tickets + [dict(record) for record in finished]
+
+    def load_all_tickets(self) -> list:
+        return list(self._journal.load_all().values())
+
+    def save_ticket(self, ticket: dict):
+        self._journal.append({"op": "ticket", "channel_id": ticket["channel_id"], "ticket": ticket})
+
+    def compact(self):
+        self._journal.compact()
+
+    def close(self):
+        self._executor.submit(self._journal.close).result()
+        super().close()
@@ -0,0 +1,59 @@
+"""Одноразовый перенос данных из JSON-файлов в SQLite
+
+Запуск: python -m storage.migrate [--db data/bot.db] [--data-dir data] [--force]
+"""
+import argparse
+import sys
+
+from storage.json_backend import JsonStorage
+from storage.sqlite_backend import SQLiteStorage
+
+
+def migrate(data_dir="data", db_path="data/bot.db", force=False):
+    """Перенос настроек серверов, тикетов и статистики; возвращает число перенесенных записей"""
+    source = JsonStorage(data_dir)
+    target = SQLiteStorage(db_path)
+    try:
+        if not force and (target.load_guild_settings() or target.load_all_tickets()):
+            raise RuntimeError("База уже содержит данные, используйте --force для перезаписи")
+
+        settings = source.load_guild_settings()
+        if settings:
+            target.save_guild_settings(settings)
+
+        # Все тикеты, а не только загружаемые при запуске: по завершенным
+        # строятся история и статистика
+        tickets = source.load_all_tickets()
+        for ticket in tickets:
+            target.save_ticket(ticket)
+
+        stats = source.load_ticket_stats()
+        if stats:
+            target.save_ticket_stats(stats)
+
+        return len(settings), len(tickets)
+    finally:
+        source.close()
+        target.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Перенос данных бота из JSON в SQLite")
+    parser.add_argument("--data-dir", default="data", help="каталог с JSON-файлами")
+    parser.add_argument("--db", default="data/bot.db", help="путь к базе SQLite")
+    parser.add_argument("--force", action="store_true", help="перезаписать существующие данные")
+    args = parser.parse_args(argv)
+
+    try:
+        settings_count, tickets_count = migrate(args.data_dir, args.db, args.force)
+    except Exception as e:
+        print(f"❌ Ошибка миграции: {e}")
+        return 1
+
+    print(f"✅ Перенесено серверов: {settings_count}, тикетов: {tickets_count}")
+    print("Установите STORAGE_BACKEND=sqlite в .env, чтобы использовать базу")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,183 @@
+import asyncio
+import re
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+# Интервал, с которым накопленные сообщения записываются в индекс
+FLUSH_INTERVAL = 1.0
+# При таком количестве ожидающих изменений запись запускается сразу
+MAX_PENDING = 2000
+
+# rowid таблицы - ID сообщения Discord: он растет со временем, поэтому
+# сортировка и фильтр по дате идут по rowid без отдельного индекса.
+# scope содержит служебные слова g<ID сервера> и a<ID автора>: фильтр по
+# серверу и автору - это пересечение списков FTS, а не перебор совпадений.
+SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS messages USING fts5(
+    content,
+    scope,
+    channel_id UNINDEXED,
+    author_id UNINDEXED,
+    tokenize = 'unicode61 remove_diacritics 2'
+);
+"""
+
+INSERT_MESSAGE = (
+    "INSERT OR REPLACE INTO messages (rowid, content, scope, channel_id, author_id) VALUES (?, ?, ?, ?, ?)"
+)
+UPDATE_MESSAGE = "UPDATE messages SET content = ? WHERE rowid = ?"
+DELETE_MESSAGE = "DELETE FROM messages WHERE rowid = ?"
+SEARCH_MESSAGES = (
+    "SELECT rowid AS id, channel_id, author_id, snippet(messages, 0, '**', '**', '…', 16) AS snippet "
+    "FROM messages WHERE messages MATCH ? AND rowid >= ? AND rowid < ? ORDER BY rowid DESC LIMIT ?"
+)
+
+# Граница rowid "без ограничения" (ID сообщений Discord меньше 2^63)
+MAX_ROWID = 2 ** 63 - 1
+WORD_PATTERN = re.compile(r"\S+")
+
+
+def build_query(text: str, guild_id: int, author_id: int = None) -> str:
+    """Запрос FTS5 из текста пользователя
+
+    Каждое слово берется в кавычки, поэтому символы синтаксиса FTS в
+    тексте не ломают запрос; слово с * на конце ищется по префиксу.
+    Возвращает None, если в тексте нет слов.
+    """
+    terms = []
+    for word in WORD_PATTERN.findall(text):
+        prefix = word.endswith("*")
+        word = word.rstrip("*").replace('"', '""')
+        if word:
+            terms.append(f'"{word}"*' if prefix else f'"{word}"')
+    if not terms:
+        return None
+    scope = f"g{guild_id}" + (f" AND scope:a{author_id}" if author_id else "")
+    return f"scope:{scope} AND content:({' AND '.join(terms)})"
+
+
+class SearchIndex:
+    """Полнотекстовый индекс сообщений тикетов (SQLite FTS5)
+
+    Сообщения добавляются по мере поступления: изменения копятся в памяти
+    не дольше FLUSH_INTERVAL и записываются одной транзакцией в отдельном
+    потоке, как история в TranscriptSpool. Правки и удаления сообщений
+    обновляют индекс. Результаты отдаются от новых к старым страницами по
+    ключу (ID последнего сообщения страницы), а не по OFFSET, поэтому любая
+    страница читает только свои строки.
+    """
+
+    def __init__(self, path="data/search.db"):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="search")
+        self._conn = None
+        self._executor.submit(self._connect).result()
+        self._pending = []  # (запрос, параметры)
+        self._flush_handle = None
+        self._flush_lock = None
+
+    def add(self, guild_id: int, channel_id: int, record: dict):
+        """Постановка сообщения тикета в очередь на индексацию"""
+        if record.get("id") is None or not record.get("content"):
+            return
+        scope = f"g{guild_id} a{record['author_id']}"
+        self._queue(INSERT_MESSAGE, (record["id"], record["content"], scope, channel_id, record["author_id"]))
+
+    def edit(self, message_id: int, content):
+        """Правка (или удаление при content=None) проиндексированного сообщения"""
+        if content is None:
+            self._queue(DELETE_MESSAGE, (message_id,))
+        else:
+            self._queue(UPDATE_MESSAGE, (content, message_id))
+
+    async def search(self, guild_id: int, text: str, author_id: int = None, after_id: int = 0,
+                     before_id: int = MAX_ROWID, limit: int = 10) -> list:
+        """Сообщения сервера с ID в [after_id, before_id), от новых к старым"""
+        query = build_query(text, guild_id, author_id)
+        if query is None:
+            return []
+        await self.flush()
+        return await self._submit(self._search, query, after_id, before_id, limit)
+
+    async def flush(self):
+        """Запись всех ожидающих изменений в индекс"""
+        if self._flush_handle:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        if self._flush_lock is None:
+            self._flush_lock = asyncio.Lock()
+
+        async with self._flush_lock:
+            while self._pending:
+                batch = self._pending
+                self._pending = []
+                try:
+                    await self._submit(self._write_batch, batch)
+                except Exception:
+                    # Возвращаем изменения в очередь, чтобы не потерять их при следующей записи
+                    self._pending = batch + self._pending
+                    raise
+
+    def pending(self) -> int:
+        """Количество изменений, ожидающих записи в индекс"""
+        return len(self._pending)
+
+    def close(self):
+        if self._pending:
+            batch = self._pending
+            self._pending = []
+            self._executor.submit(self._write_batch, batch).result()
+        self._executor.submit(self._conn.close).result()
+        self._executor.shutdown(wait=True)
+
+    async def _submit(self, func, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+
+    def _connect(self):
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        self._conn.commit()
+
+    def _queue(self, statement: str, params: tuple):
+        self._pending.append((statement, params))
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # Вне event loop пишем сразу
+            batch = self._pending
+            self._pending = []
+            self._executor.submit(self._write_batch, batch).result()
+            return
+
+        if len(self._pending) >= MAX_PENDING:
+            if self._flush_handle:
+                self._flush_handle.cancel()
+            self._flush_handle = loop.call_soon(self._start_flush)
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(FLUSH_INTERVAL, self._start_flush)
+
+    def _start_flush(self):
+        self._flush_handle = None
+        task = asyncio.get_running_loop().create_task(self.flush())
+        task.add_done_callback(_report_flush_error)
+
+    def _write_batch(self, batch: list):
+        with self._conn:
+            for statement, params in batch:
+                self._conn.execute(statement, params)
+
+    def _search(self, query: str, after_id: int, before_id: int, limit: int) -> list:
+        return [
+            dict(row) for row in self._conn.execute(SEARCH_MESSAGES, (query, after_id, before_id, limit))
+        ]
+
+
+def _report_flush_error(task):
+    if not task.cancelled() and task.exception():
+        print(f"❌ Ошибка записи поискового индекса: {task.exception()}")
@@ -0,0 +1,133 @@
+import json
+import sqlite3
+from pathlib import Path
+
+from storage.base import StorageBackend
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS guild_settings (
+    guild_id INTEGER PRIMARY KEY,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS tickets (
+    channel_id INTEGER PRIMARY KEY,
+    guild_id INTEGER NOT NULL,
+    creator_id INTEGER NOT NULL,
+    status TEXT NOT NULL,
+    published INTEGER NOT NULL DEFAULT 0,
+    created_at TEXT NOT NULL,
+    closed_at TEXT
+);
+CREATE TABLE IF NOT EXISTS ticket_stats (
+    guild_id INTEGER PRIMARY KEY,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS tickets_guild_creator ON tickets (guild_id, creator_id, status);
+CREATE INDEX IF NOT EXISTS tickets_status_closed ON tickets (status, closed_at);
+"""
+
+# Запросы держим константами: sqlite3 кэширует подготовленные выражения по тексту
+UPSERT_SETTINGS = (
+    "INSERT INTO guild_settings (guild_id, data) VALUES (?, ?) "
+    "ON CONFLICT(guild_id) DO UPDATE SET data = excluded.data"
+)
+SELECT_SETTINGS = "SELECT guild_id, data FROM guild_settings"
+UPSERT_STATS = (
+    "INSERT INTO ticket_stats (guild_id, data) VALUES (?, ?) "
+    "ON CONFLICT(guild_id) DO UPDATE SET data = excluded.data"
+)
+SELECT_STATS = "SELECT guild_id, data FROM ticket_stats"
+UPSERT_TICKET = (
+    "INSERT INTO tickets (channel_id, guild_id, creator_id, status, published, created_at, closed_at) "
+    "VALUES (:channel_id, :guild_id, :creator_id, :status, :published, :created_at, :closed_at) "
+    "ON CONFLICT(channel_id) DO UPDATE SET "
+    "status = excluded.status, published = excluded.published, closed_at = excluded.closed_at"
+)
+SELECT_OPEN_TICKETS = (
+    "SELECT channel_id, guild_id, creator_id, status, published, created_at, closed_at FROM tickets "
+    "WHERE status = 'open'"
+)
+SELECT_FINISHED_TICKETS = (
+    "SELECT channel_id, guild_id, creator_id, status, published, created_at, closed_at FROM tickets "
+    "WHERE status NOT IN ('open', 'deleted') ORDER BY closed_at DESC LIMIT ?"
+)
+
+SELECT_ALL_TICKETS = (
+    "SELECT channel_id, guild_id, creator_id, status, published, created_at, closed_at FROM tickets"
+)
+
+
+class SQLiteStorage(StorageBackend):
+    """Хранилище во встроенной базе SQLite
+
+    Все запросы выполняются в одном потоке хранилища, поэтому соединение
+    одно и не требует блокировок.
+    """
+    name = "sqlite"
+
+    def __init__(self, path="data/bot.db"):
+        super().__init__(max_workers=1)
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = None
+        self._executor.submit(self._connect).result()
+
+    def _connect(self):
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, cached_statements=64)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA busy_timeout=5000")
+        self._conn.executescript(SCHEMA)
+        # Базы, созданные до появления флага публикации
+        columns = {row["name"] for row in self._conn.execute("PRAGMA table_info(tickets)")}
+        if "published" not in columns:
+            self._conn.execute("ALTER TABLE tickets ADD COLUMN published INTEGER NOT NULL DEFAULT 0")
+            self._conn.execute("UPDATE tickets SET status = 'closed', published = 1 WHERE status = 'published'")
+        self._conn.commit()
+
+    def load_guild_settings(self) -> dict:
+        return {
+            str(row["guild_id"]): json.loads(row["data"])
+            for row in self._conn.execute(SELECT_SETTINGS)
+        }
+
+    def save_guild_settings(self, changes: dict):
+        with self._conn:
+            self._conn.executemany(
+                UPSERT_SETTINGS,
+                [(int(guild_id), json.dumps(settings, ensure_ascii=False)) for guild_id, settings in changes.items()]
+            )
+
+    def load_ticket_stats(self) -> dict:
+        return {str(row["guild_id"]): json.loads(row["data"]) for row in self._conn.execute(SELECT_STATS)}
+
+    def save_ticket_stats(self, changes: dict):
+        with self._conn:
+            self._conn.executemany(
+                UPSERT_STATS,
+                [(int(guild_id), json.dumps(stats, separators=(",", ":"))) for guild_id, stats in changes.items()]
+            )
+
+    def load_tickets(self, finished_limit: int = 0) -> list:
+        tickets = [dict(row) for row in self._conn.execute(SELECT_OPEN_TICKETS)]
+        if finished_limit:
+            tickets.extend(dict(row) for row in self._conn.execute(SELECT_FINISHED_TICKETS, (finished_limit,)))
+        return tickets
+
+    def load_all_tickets(self) -> list:
+        return [dict(row) for row in self._conn.execute(SELECT_ALL_TICKETS)]
+
+    def save_ticket(self, ticket: dict):
+        with self._conn:
+            self._conn.execute(UPSERT_TICKET, dict(ticket, published=int(bool(ticket.get("published")))))
+
+    def compact(self):
+        # Переносим страницы WAL в основной файл базы
+        self._conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    def close(self):
+        if self._conn is not None:
+            self._executor.submit(self._conn.close).result()
+            self._conn = None
+        super().close()
@@ -0,0 +1,245 @@
+import asyncio
+import json
+import os
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+# Размер сегмента, после которого запись идет в следующий файл
+SEGMENT_SIZE = 64 * 1024 * 1024
+# Размер блока при сжатии и распаковке
+CHUNK_SIZE = 64 * 1024
+# gzip-заголовок: каждая история - отдельный член gzip, его можно распаковать
+# по смещению и длине (и всего сегмента - обычным gunzip)
+GZIP_WBITS = 31
+COMPRESS_LEVEL = 6
+
+
+class TranscriptArchive:
+    """Сжатый архив историй завершенных тикетов
+
+    История тикета сжимается в отдельный член gzip и дописывается в конец
+    текущего сегмента (segment-000001.gz, ...). Индекс index.jsonl хранит
+    для каждого тикета сегмент, смещение и длину, поэтому история читается
+    с диска по частям без распаковки остального архива. Запись идет в одном
+    потоке: сначала данные сегмента, затем строка индекса, так что оборванная
+    запись оставляет только недостижимые байты в конце сегмента.
+
+    В режиме кластера каждый процесс пишет в свой каталог cluster<N>, а
+    истории, заархивированные другими процессами, ищет в их индексах.
+    """
+
+    def __init__(self, directory="data/archive", cluster: int = None, segment_size: int = SEGMENT_SIZE):
+        self.root = Path(directory)
+        self.directory = self.root if cluster is None else self.root / f"cluster{cluster}"
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.segment_size = segment_size
+
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="archive")
+        self._index = None  # индекс своего каталога
+        self._others = {}  # каталог другого процесса -> его индекс
+
+    @property
+    def index_path(self) -> Path:
+        return self.directory / "index.jsonl"
+
+    def segment_path(self, segment: int) -> Path:
+        return self.directory / f"segment-{segment:06d}.gz"
+
+    async def load(self):
+        """Чтение индекса архива (один раз, при запуске)"""
+        if self._index is None:
+            await self._submit(self._load_index)
+
+    async def find(self, channel_id: int):
+        """Запись индекса архивной истории тикета и путь ее сегмента или None"""
+        await self.load()
+        index = self._index
+        location = index.locations.get(channel_id)
+        if location is None:
+            index, location = await self._submit(self._find_other, channel_id)
+            if location is None:
+                return None
+        entry = await self._submit(_read_entry, index.path, location[4])
+        return entry, index.segment_path(location[1])
+
+    async def add(self, ticket, records) -> dict:
+        """Сжатие истории тикета в архив
+
+        records - функция без аргументов, возвращающая итератор сообщений;
+        вызывается в потоке архива, поэтому может читать файлы.
+        """
+        return await self._submit(self._write, ticket.to_dict(), records)
+
+    def disk_usage(self) -> tuple:
+        """Количество заархивированных историй и размер архива в байтах"""
+        size = 0
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                if entry.name.startswith("segment-"):
+                    size += entry.stat().st_size
+        return len(self._index.locations) if self._index is not None else 0, size
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+
+    async def _submit(self, func, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+
+    def _load_index(self):
+        if self._index is not None:
+            return
+        index = _ArchiveIndex(self.directory)
+        size = index.refresh()
+        if size > index.read_offset:
+            # Оборванная запись индекса: новые строки пишутся после последней целой
+            os.truncate(index.path, index.read_offset)
+        self._index = index
+
+    def _find_other(self, channel_id: int) -> tuple:
+        """Поиск истории в индексах других процессов кластера
+
+        Индексы только дописываются, поэтому каждый раз читаются лишь строки,
+        появившиеся после прошлого поиска.
+        """
+        directories = [self.root] + sorted(path for path in self.root.glob("cluster*") if path.is_dir())
+        for directory in directories:
+            if directory == self.directory:
+                continue
+            index = self._others.get(directory)
+            if index is None:
+                index = self._others[directory] = _ArchiveIndex(directory)
+            location = index.locations.get(channel_id)
+            if location is None:
+                index.refresh()
+                location = index.locations.get(channel_id)
+            if location is not None:
+                return index, location
+        return None, None
+
+    def _write(self, ticket: dict, records) -> dict:
+        self._load_index()
+        segment = max(self._index.last_segment, 1)
+        path = self.segment_path(segment)
+        if path.exists() and path.stat().st_size >= self.segment_size:
+            segment += 1
+            path = self.segment_path(segment)
+
+        compressor = zlib.compressobj(COMPRESS_LEVEL, zlib.DEFLATED, GZIP_WBITS)
+        messages = 0
+        with open(path, 'ab') as f:
+            offset = f.tell()
+            buffer = []
+            buffered = 0
+            for record in records():
+                line = json.dumps(record, ensure_ascii=False).encode('utf-8') + b"\n"
+                buffer.append(line)
+                buffered += len(line)
+                messages += 1
+                if buffered >= CHUNK_SIZE:
+                    f.write(compressor.compress(b"".join(buffer)))
+                    buffer = []
+                    buffered = 0
+            f.write(compressor.compress(b"".join(buffer)) + compressor.flush())
+            f.flush()
+            os.fsync(f.fileno())
+            length = f.tell() - offset
+
+        entry = dict(
+            ticket,
+            segment=segment,
+            offset=offset,
+            length=length,
+            messages=messages,
+            archived_at=datetime.now().isoformat()
+        )
+        line = json.dumps(entry, ensure_ascii=False).encode('utf-8') + b"\n"
+        with open(self.index_path, 'ab') as f:
+            index_offset = f.tell()
+            f.write(line)
+            f.flush()
+            os.fsync(f.fileno())
+        self._index.locations[entry["channel_id"]] = (entry["guild_id"], segment, offset, length, index_offset)
+        self._index.last_segment = segment
+        self._index.read_offset = index_offset + len(line)
+        return entry
+
+
+class _ArchiveIndex:
+    """Индекс одного каталога архива
+
+    В памяти только положение истории и строки индекса, остальные поля
+    записи читаются с диска при обращении.
+    """
+    __slots__ = ("directory", "locations", "read_offset", "last_segment")
+
+    def __init__(self, directory: Path):
+        self.directory = directory
+        self.locations = {}  # channel_id -> (guild_id, сегмент, смещение, длина, смещение строки индекса)
+        self.read_offset = 0  # до этого места файл индекса уже прочитан
+        self.last_segment = 0
+
+    @property
+    def path(self) -> Path:
+        return self.directory / "index.jsonl"
+
+    def segment_path(self, segment: int) -> Path:
+        return self.directory / f"segment-{segment:06d}.gz"
+
+    def refresh(self) -> int:
+        """Чтение целых строк, дописанных после прошлого чтения; возвращает размер файла"""
+        try:
+            f = open(self.path, 'rb')
+        except FileNotFoundError:
+            return 0
+        with f:
+            f.seek(self.read_offset)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    # Строка оборвана или еще дописывается другим процессом
+                    break
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    break
+                self.locations[entry["channel_id"]] = (
+                    entry["guild_id"], entry["segment"], entry["offset"], entry["length"], self.read_offset
+                )
+                self.last_segment = max(self.last_segment, entry["segment"])
+                self.read_offset += len(line)
+            return os.fstat(f.fileno()).st_size
+
+
+def _read_entry(index_path: Path, index_offset: int) -> dict:
+    with open(index_path, 'rb') as f:
+        f.seek(index_offset)
+        return json.loads(f.readline())
+
+
+def read_archived(path, offset: int, length: int):
+    """Потоковое чтение истории из сегмента архива
+
+    Распаковывается по CHUNK_SIZE байт, в памяти одновременно находится
+    только текущий блок. Модульная функция, чтобы читать можно было и в
+    другом процессе.
+    """
+    decompressor = zlib.decompressobj(GZIP_WBITS)
+    tail = b""
+    with open(path, 'rb') as f:
+        f.seek(offset)
+        remaining = length
+        while remaining > 0:
+            chunk = f.read(min(CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            data = tail + decompressor.decompress(chunk)
+            lines = data.split(b"\n")
+            tail = lines.pop()
+            for line in lines:
+                yield json.loads(line)
+    data = tail + decompressor.flush()
+    for line in data.split(b"\n"):
+        if line:
+            yield json.loads(line)
@@ -0,0 +1,239 @@
+import asyncio
+import json
+import mmap
+import os
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from pathlib import Path
+
+# Интервал, с которым накопленные сообщения дописываются на диск
+FLUSH_INTERVAL = 0.5
+# При таком количестве ожидающих записей сброс запускается сразу
+MAX_PENDING = 1000
+# Сколько записей читается из файла за один переход в поток
+READ_BATCH = 256
+
+
+class TranscriptSpool:
+    """Потоковая запись истории тикетов на диск
+
+    Для каждого тикета ведется отдельный файл JSONL, в который сообщения только
+    дописываются. Правки и удаления сообщений записываются отдельными записями
+    с полем op ("edit" или "delete") и применяются при чтении. Записи копятся
+    в памяти не дольше FLUSH_INTERVAL и сбрасываются пачкой в отдельном
+    потоке. Чтение идет через mmap по одной записи, поэтому история никогда
+    не загружается в память целиком.
+    """
+
+    def __init__(self, directory="data/transcripts"):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+        self._executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="transcripts")
+        self._pending = {}  # channel_id -> [строки JSON]
+        self._pending_count = 0
+        self._flush_handle = None
+        self._flush_lock = None
+
+    def path_for(self, channel_id: int) -> Path:
+        return self.directory / f"{channel_id}.jsonl"
+
+    def append(self, channel_id: int, record: dict):
+        """Постановка записи в очередь на дозапись"""
+        self._pending.setdefault(channel_id, []).append(json.dumps(record, ensure_ascii=False))
+        self._pending_count += 1
+        self._schedule_flush()
+
+    async def flush(self):
+        """Запись всех ожидающих сообщений на диск"""
+        if self._flush_handle:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        if self._flush_lock is None:
+            self._flush_lock = asyncio.Lock()
+
+        async with self._flush_lock:
+            while self._pending:
+                batch = self._take_pending()
+                try:
+                    await asyncio.get_running_loop().run_in_executor(self._executor, self._write_batch, batch)
+                except Exception:
+                    # Возвращаем записи в очередь, чтобы не потерять их при следующем сбросе
+                    for channel_id, lines in batch.items():
+                        self._pending[channel_id] = lines + self._pending.get(channel_id, [])
+                        self._pending_count += len(lines)
+                    raise
+
+    def iter_messages(self, channel_id: int):
+        """Синхронный итератор по уже записанным на диск сообщениям тикета"""
+        return read_records(self.path_for(channel_id))
+
+    def iter_resolved(self, channel_id: int):
+        """Синхронный итератор по сообщениям тикета с примененными правками"""
+        return resolve_records(self.path_for(channel_id))
+
+    async def aiter_messages(self, channel_id: int, batch_size: int = READ_BATCH):
+        """Асинхронный итератор по истории тикета
+
+        Файл читается пачками в отдельном потоке, в памяти одновременно
+        находится не больше batch_size записей.
+        """
+        await self.flush()
+        loop = asyncio.get_running_loop()
+        iterator = self.iter_messages(channel_id)
+        try:
+            while True:
+                batch = await loop.run_in_executor(self._executor, lambda: list(islice(iterator, batch_size)))
+                if not batch:
+                    break
+                for record in batch:
+                    yield record
+        finally:
+            await loop.run_in_executor(self._executor, iterator.close)
+
+    async def aiter_resolved(self, channel_id: int, batch_size: int = READ_BATCH):
+        """Асинхронный итератор по сообщениям тикета с примененными правками
+
+        Первый проход собирает только правки и удаления, второй отдает
+        сообщения в итоговом виде. Удаленные сообщения пропускаются.
+        """
+        changes = {}  # id сообщения -> новый текст или None, если удалено
+        async for record in self.aiter_messages(channel_id, batch_size):
+            op = record.get("op")
+            if op == "edit":
+                changes[record["id"]] = record["content"]
+            elif op == "delete":
+                changes[record["id"]] = None
+
+        async for record in self.aiter_messages(channel_id, batch_size):
+            if record.get("op"):
+                continue
+            message_id = record.get("id")
+            if message_id in changes:
+                content = changes[message_id]
+                if content is None:
+                    continue
+                record = dict(record, content=content)
+            yield record
+
+    def size(self, channel_id: int) -> int:
+        """Размер файла истории тикета в байтах"""
+        try:
+            return self.path_for(channel_id).stat().st_size
+        except FileNotFoundError:
+            return 0
+
+    def pending(self) -> int:
+        """Количество записей, ожидающих записи на диск"""
+        return self._pending_count
+
+    def disk_usage(self) -> tuple:
+        """Количество файлов истории и их общий размер в байтах"""
+        files = 0
+        size = 0
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                if entry.name.endswith(".jsonl"):
+                    try:
+                        size += entry.stat().st_size
+                    except FileNotFoundError:
+                        # Файл удален во время обхода
+                        continue
+                    files += 1
+        return files, size
+
+    def remove(self, channel_id: int):
+        """Удаление истории тикета"""
+        self._pending_count -= len(self._pending.pop(channel_id, ()))
+        try:
+            self.path_for(channel_id).unlink()
+        except FileNotFoundError:
+            pass
+
+    def close(self):
+        if self._pending:
+            self._write_batch(self._take_pending())
+        self._executor.shutdown(wait=True)
+
+    def _schedule_flush(self):
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # Вне event loop пишем сразу
+            self._write_batch(self._take_pending())
+            return
+
+        if self._pending_count >= MAX_PENDING:
+            if self._flush_handle:
+                self._flush_handle.cancel()
+            self._flush_handle = loop.call_soon(self._start_flush)
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(FLUSH_INTERVAL, self._start_flush)
+
+    def _start_flush(self):
+        self._flush_handle = None
+        task = asyncio.get_running_loop().create_task(self.flush())
+        task.add_done_callback(_report_flush_error)
+
+    def _take_pending(self):
+        batch = self._pending
+        self._pending = {}
+        self._pending_count = 0
+        return batch
+
+    def _write_batch(self, batch: dict):
+        for channel_id, lines in batch.items():
+            with open(self.path_for(channel_id), 'a', encoding='utf-8') as f:
+                f.write("\n".join(lines) + "\n")
+
+
+def read_records(path):
+    """Синхронный итератор по записям файла истории
+
+    Модульная функция, чтобы файл можно было читать и в другом процессе
+    (экспорт истории, см. utils/transcript_export.py).
+    """
+    try:
+        f = open(path, 'rb')
+    except FileNotFoundError:
+        return
+    with f:
+        size = os.fstat(f.fileno()).st_size
+        if size == 0:
+            return
+        with mmap.mmap(f.fileno(), size, access=mmap.ACCESS_READ) as mm:
+            start = 0
+            while start < size:
+                end = mm.find(b"\n", start)
+                if end == -1:
+                    # Недописанная запись в конце файла
+                    break
+                yield json.loads(mm[start:end])
+                start = end + 1
+
+
+def resolve_records(path):
+    """Сообщения файла истории в итоговом виде (синхронная версия aiter_resolved)"""
+    changes = {}
+    for record in read_records(path):
+        op = record.get("op")
+        if op == "edit":
+            changes[record["id"]] = record["content"]
+        elif op == "delete":
+            changes[record["id"]] = None
+
+    for record in read_records(path):
+        if record.get("op"):
+            continue
+        message_id = record.get("id")
+        if message_id in changes:
+            content = changes[message_id]
+            if content is None:
+                continue
+            record = dict(record, content=content)
+        yield record
+
+
+def _report_flush_error(task):
+    if not task.cancelled() and task.exception():
+        print(f"❌ Ошибка записи истории тикетов: {task.exception()}")
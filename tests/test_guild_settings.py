@@ -0,0 +1,81 @@
+import discord
+import pytest
+
+from models.guild_settings import DEFAULT_GUILD_SETTINGS, DEFAULT_SETTINGS, GuildSettings
+
+
+def test_empty_dict_uses_shared_defaults():
+    assert GuildSettings.from_dict({}) is DEFAULT_GUILD_SETTINGS
+
+
+def test_values_equal_to_defaults_share_object():
+    assert GuildSettings.from_dict(dict(DEFAULT_SETTINGS)) is DEFAULT_GUILD_SETTINGS
+
+
+def test_parses_ids_and_color():
+    settings = GuildSettings.from_dict({
+        "ticket_category_id": " 123 ",
+        "log_channel_id": 456,
+        "publish_channel_id": "",
+        "embed_color": "#ff0000"
+    })
+    assert settings.ticket_category_id == 123
+    assert settings.log_channel_id == 456
+    assert settings.publish_channel_id is None
+    assert settings.color == discord.Color.from_str("#ff0000")
+    assert settings.button_label == DEFAULT_SETTINGS["button_label"]
+
+
+def test_invalid_values_are_dropped_on_load(capsys):
+    settings = GuildSettings.from_dict({
+        "ticket_category_id": "abc",
+        "log_channel_id": -5,
+        "embed_color": "not a color",
+        "button_color": "purple",
+        "button_label": "   ",
+        "ticket_title": "x" * 257,
+        "welcome_message": 42,
+        "admin_role_name": "Модератор"
+    })
+    for name in ("ticket_category_id", "log_channel_id", "embed_color", "button_color",
+                 "button_label", "ticket_title", "welcome_message"):
+        assert getattr(settings, name) == getattr(DEFAULT_GUILD_SETTINGS, name)
+    assert settings.admin_role_name == "Модератор"
+    assert settings.color is DEFAULT_GUILD_SETTINGS.color
+    assert capsys.readouterr().out.count("Пропущена некорректная настройка") == 7
+
+
+def test_invalid_values_fall_back_to_base():
+    base = GuildSettings.from_dict({"button_label": "Отзыв"})
+    settings = GuildSettings.from_dict({"button_label": ""}, base)
+    assert settings is base
+
+
+def test_unknown_keys_are_ignored():
+    assert GuildSettings.from_dict({"legacy_option": True}) is DEFAULT_GUILD_SETTINGS
+
+
+def test_replace_validates_and_keeps_original():
+    settings = GuildSettings.from_dict({})
+    updated = settings.replace(log_channel_id="789", embed_color="#00ff00")
+    assert updated.log_channel_id == 789
+    assert updated.color == discord.Color.from_str("#00ff00")
+    assert settings.log_channel_id is None
+
+    with pytest.raises(ValueError):
+        settings.replace(log_channel_id="канал")
+    with pytest.raises(ValueError):
+        settings.replace(unknown="value")
+
+
+def test_settings_are_immutable():
+    with pytest.raises(AttributeError):
+        DEFAULT_GUILD_SETTINGS.button_label = "Другой текст"
+
+
+def test_to_dict_round_trip():
+    settings = GuildSettings.from_dict({"ticket_category_id": 123, "ticket_title": "Заголовок"})
+    data = settings.to_dict()
+    assert data["ticket_category_id"] == "123"
+    restored = GuildSettings.from_dict(data)
+    assert restored.to_dict() == data
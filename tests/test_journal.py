@@ -0,0 +1,76 @@
+from storage.journal import TicketJournal
+
+
+def ticket_entry(channel_id, status="open"):
+    return {
+        "op": "ticket",
+        "channel_id": channel_id,
+        "ticket": {"channel_id": channel_id, "creator_id": 1, "guild_id": 2, "status": status}
+    }
+
+
+def write_journal(tmp_path, count):
+    journal = TicketJournal(tmp_path)
+    journal.load()
+    for channel_id in range(1, count + 1):
+        journal.append(ticket_entry(channel_id))
+    journal.close()
+    return journal.journal_path
+
+
+def test_replay_restores_tickets(tmp_path):
+    write_journal(tmp_path, 3)
+    journal = TicketJournal(tmp_path)
+    journal.append(ticket_entry(2, "closed"))
+    journal.close()
+
+    tickets = TicketJournal(tmp_path).load()
+    assert set(tickets) == {"1", "2", "3"}
+    assert tickets["2"]["status"] == "closed"
+
+
+def test_torn_trailing_record_is_dropped(tmp_path):
+    path = write_journal(tmp_path, 3)
+    intact = path.read_bytes()
+    # Аварийная остановка посреди записи четвертой строки
+    with open(path, 'ab') as f:
+        f.write(b'{"op": "ticket", "channel_id": 4, "ticket": {"chan')
+
+    journal = TicketJournal(tmp_path)
+    assert set(journal.load()) == {"1", "2", "3"}
+    assert path.read_bytes() == intact
+
+    # Новые записи идут после последней целой строки
+    journal.append(ticket_entry(5))
+    journal.close()
+    assert set(TicketJournal(tmp_path).load()) == {"1", "2", "3", "5"}
+
+
+def test_record_without_newline_is_dropped(tmp_path):
+    path = write_journal(tmp_path, 2)
+    intact = path.read_bytes()
+    # Строка записана целиком, но перевод строки не успел попасть на диск
+    with open(path, 'ab') as f:
+        f.write(b'{"op": "ticket", "channel_id": 3, "ticket": {"channel_id": 3, "status": "open"}}')
+
+    journal = TicketJournal(tmp_path)
+    assert set(journal.load()) == {"1", "2"}
+    assert path.read_bytes() == intact
+
+    journal.append(ticket_entry(4))
+    journal.close()
+    assert set(TicketJournal(tmp_path).load()) == {"1", "2", "4"}
+
+
+def test_replay_after_compaction(tmp_path):
+    journal = TicketJournal(tmp_path, compact_threshold=3)
+    journal.load()
+    journal.append(ticket_entry(1))
+    journal.append(ticket_entry(2, "deleted"))
+    journal.append(ticket_entry(3))  # сворачивание
+    journal.append(ticket_entry(4))
+    journal.close()
+
+    tickets = TicketJournal(tmp_path).load()
+    assert set(tickets) == {"1", "3", "4"}
+    assert journal.archive_path.read_text(encoding="utf-8").count("\n") == 1
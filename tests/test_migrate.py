@@ -0,0 +1,58 @@
+import pytest
+
+from storage.json_backend import JsonStorage
+from storage.migrate import migrate
+from storage.sqlite_backend import SQLiteStorage
+
+
+def ticket(channel_id, status, published=False):
+    return {
+        "channel_id": channel_id,
+        "guild_id": 1,
+        "creator_id": 100 + channel_id,
+        "status": status,
+        "published": published,
+        "created_at": "2024-01-01T10:00:00",
+        "closed_at": None if status == "open" else "2024-01-02T10:00:00"
+    }
+
+
+def test_migrate_keeps_finished_and_archived_tickets(tmp_path):
+    data_dir = tmp_path / "data"
+    source = JsonStorage(data_dir)
+    source.save_ticket(ticket(1, "open"))
+    source.save_ticket(ticket(2, "deleted", published=True))
+    source.save_ticket(ticket(3, "closed"))
+    # Сворачивание переносит завершенные тикеты в архив
+    source.compact()
+    source.save_ticket(ticket(4, "closing"))
+    source.save_ticket(ticket(5, "deleted"))
+    # Тикет из архива, измененный после сворачивания
+    source.save_ticket(ticket(3, "deleted"))
+    source.close()
+
+    db_path = tmp_path / "bot.db"
+    _, count = migrate(data_dir, db_path)
+    assert count == 5
+
+    target = SQLiteStorage(db_path)
+    try:
+        tickets = {record["channel_id"]: record for record in target.load_all_tickets()}
+    finally:
+        target.close()
+    assert {channel_id: record["status"] for channel_id, record in tickets.items()} == {
+        1: "open", 2: "deleted", 3: "deleted", 4: "closing", 5: "deleted"
+    }
+    assert tickets[2]["published"] == 1
+
+
+def test_migrate_refuses_non_empty_database(tmp_path):
+    data_dir = tmp_path / "data"
+    source = JsonStorage(data_dir)
+    source.save_ticket(ticket(1, "deleted"))
+    source.close()
+
+    db_path = tmp_path / "bot.db"
+    migrate(data_dir, db_path)
+    with pytest.raises(RuntimeError):
+        migrate(data_dir, db_path)
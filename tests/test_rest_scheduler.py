@@ -0,0 +1,54 @@
+import asyncio
+
+from utils.rest_scheduler import RestScheduler, route
+
+
+def test_exhausted_bucket_holds_back_requests():
+    async def scenario():
+        scheduler = RestScheduler()
+        key = route("send_message", 1)
+        sent = []
+
+        async def request(remaining):
+            sent.append(asyncio.get_running_loop().time())
+            scheduler.observe_headers({"X-RateLimit-Remaining": str(remaining), "X-RateLimit-Reset-After": "0.2"})
+
+        started = asyncio.get_running_loop().time()
+        await scheduler.run(key, lambda: request(0))
+        # Остаток исчерпан: следующий запрос ждет сброса, а не получает 429
+        await scheduler.run(key, lambda: request(1))
+        # Другой маршрут не ограничен
+        await scheduler.run(route("send_message", 2), lambda: request(0))
+        return started, sent
+
+    started, sent = asyncio.run(scenario())
+    assert sent[0] - started < 0.1
+    assert sent[1] - sent[0] >= 0.15
+    assert sent[2] - sent[1] < 0.1
+
+
+def test_known_remaining_limits_parallel_requests():
+    async def scenario():
+        scheduler = RestScheduler()
+        key = route("edit_channel", 1)
+        release = asyncio.Event()
+        started = []
+
+        async def request():
+            started.append(len(started))
+            await release.wait()
+
+        async def first():
+            scheduler.observe_headers({"X-RateLimit-Remaining": "1", "X-RateLimit-Reset-After": "5"})
+
+        await scheduler.run(key, first)
+        tasks = [asyncio.create_task(scheduler.run(key, request)) for _ in range(3)]
+        await asyncio.sleep(0.05)
+        running = len(started)
+        release.set()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        return running
+
+    assert asyncio.run(scenario()) == 1
@@ -0,0 +1,117 @@
+import random
+
+import pytest
+
+from models.ticket_models import TicketManager, STATUS_CLOSING, STATUS_CLOSED, STATUS_DELETED
+from models.ticket_stats import (
+    DurationSketch, GuildStats, TicketStats, SKETCH_ACCURACY, STATS_DAYS, SECONDS_PER_DAY
+)
+
+
+def exact_quantile(values, q):
+    ordered = sorted(values)
+    return ordered[int(q * (len(ordered) - 1))]
+
+
+@pytest.mark.parametrize("q", [0.01, 0.25, 0.5, 0.9, 0.99, 1.0])
+def test_quantile_error_bound(q):
+    rng = random.Random(7)
+    # Длительности от секунд до недель, с длинным хвостом
+    values = [rng.lognormvariate(8, 2.5) + 1 for _ in range(20000)]
+    sketch = DurationSketch()
+    for value in values:
+        sketch.add(value)
+
+    exact = exact_quantile(values, q)
+    assert abs(sketch.quantile(q) - exact) <= SKETCH_ACCURACY * exact * (1 + 1e-9)
+
+
+def test_short_durations_count_as_zero():
+    sketch = DurationSketch()
+    for value in (0.0, 0.5, 0.99, 100.0):
+        sketch.add(value)
+    assert sketch.zeros == 3
+    assert sketch.quantile(0.5) == 0.0
+    assert sketch.quantile(1.0) == pytest.approx(100.0, rel=SKETCH_ACCURACY)
+
+
+def test_empty_sketch():
+    assert DurationSketch().quantile(0.5) is None
+
+
+def test_merge_matches_single_sketch():
+    rng = random.Random(3)
+    values = [rng.uniform(1, 10000) for _ in range(5000)]
+    whole, left, right = DurationSketch(), DurationSketch(), DurationSketch()
+    for index, value in enumerate(values):
+        whole.add(value)
+        (left if index % 2 else right).add(value)
+    left.merge(right)
+    assert left.counts == whole.counts and left.count == whole.count
+    restored = DurationSketch.from_dict(left.to_dict())
+    assert restored.quantile(0.9) == whole.quantile(0.9)
+
+
+def test_day_ring_reuses_slot_after_window():
+    stats = GuildStats()
+    start = 1000 * SECONDS_PER_DAY
+    stats.on_open(start)
+    stats.on_open(start)
+
+    # Тот же слот кольца через STATS_DAYS дней принадлежит новому дню
+    later = start + STATS_DAYS * SECONDS_PER_DAY
+    stats.on_open(later)
+    assert len(stats.days) == 1
+    assert stats.days[1000 % STATS_DAYS] == [1000 + STATS_DAYS, 1, 0, 0]
+    assert stats.opened == 3
+
+    daily = stats.daily(STATS_DAYS, now=later)
+    assert len(daily) == STATS_DAYS
+    assert [row[1] for row in daily] == [0] * (STATS_DAYS - 1) + [1]
+
+
+def test_daily_ignores_stale_slots():
+    stats = GuildStats()
+    day = 2000
+    stats.on_close(day * SECONDS_PER_DAY, 60.0, published=True)
+    # Через 10 дней корзина того дня вне окна в 7 дней
+    daily = stats.daily(7, now=(day + 10) * SECONDS_PER_DAY)
+    assert all(row[1:] == (0, 0, 0) for row in daily)
+    assert stats.daily(1, now=day * SECONDS_PER_DAY + 5)[0][1:] == (0, 1, 1)
+
+
+def test_merge_keeps_newer_day_in_slot():
+    old, new = GuildStats(), GuildStats()
+    old.on_open(10 * SECONDS_PER_DAY)
+    new.on_open((10 + STATS_DAYS) * SECONDS_PER_DAY)
+    old.merge(new)
+    assert old.days[10 % STATS_DAYS] == [10 + STATS_DAYS, 1, 0, 0]
+
+    same = GuildStats()
+    same.on_open((10 + STATS_DAYS) * SECONDS_PER_DAY)
+    old.merge(same)
+    assert old.days[10 % STATS_DAYS][1] == 2
+    assert old.opened == 3
+
+
+def test_deleting_open_ticket_is_not_a_close():
+    manager = TicketManager(stats=TicketStats())
+    manager.create_ticket(1, 2, 3)
+    manager.create_ticket(4, 5, 3)
+
+    # Канал открытого тикета удален вручную
+    assert manager.transition(1, STATUS_DELETED)
+    # Обычный путь: закрытие, затем удаление канала
+    assert manager.transition(4, STATUS_CLOSING)
+    assert manager.transition(4, STATUS_CLOSED)
+    assert manager.transition(4, STATUS_DELETED)
+
+    summary = manager.stats.summary(3)
+    assert (summary["opened"], summary["closed"], summary["deleted"]) == (2, 1, 1)
+    assert manager.stats.get(3).close_time.count == 1
+    assert summary["daily"][-1][1:] == (2, 1, 0)
+
+    restored = GuildStats.from_dict(manager.stats.get(3).to_dict())
+    assert restored.deleted == 1
+    restored.merge(manager.stats.get(3))
+    assert restored.deleted == 2
@@ -0,0 +1,84 @@
+from datetime import datetime
+
+import pytest
+
+from models.ticket_models import (
+    Ticket, TicketManager, STATUS_OPEN, STATUS_CLOSING, STATUS_CLOSED, STATUS_DELETED
+)
+
+
+def make_ticket(status=STATUS_OPEN):
+    return Ticket(channel_id=1, creator_id=2, guild_id=3, created_at=datetime.now(), status=status)
+
+
+def test_full_lifecycle():
+    ticket = make_ticket()
+    assert ticket.closed_ts is None
+    assert ticket.transition(STATUS_CLOSING)
+    assert ticket.closed_ts is not None
+    assert ticket.transition(STATUS_CLOSED)
+    assert ticket.transition(STATUS_DELETED)
+    assert ticket.status is STATUS_DELETED
+
+
+def test_repeated_transition_is_noop():
+    ticket = make_ticket(STATUS_CLOSING)
+    assert ticket.transition(STATUS_CLOSING) is False
+    assert ticket.status is STATUS_CLOSING
+
+
+def test_status_strings_are_interned():
+    # Статус из хранилища - другой объект строки, сравнение идет по is
+    ticket = make_ticket("".join(["clo", "sed"]))
+    assert ticket.status is STATUS_CLOSED
+    assert ticket.transition("".join(["dele", "ted"]))
+
+
+@pytest.mark.parametrize("current, target", [
+    (STATUS_OPEN, STATUS_CLOSED),
+    (STATUS_CLOSING, STATUS_OPEN),
+    (STATUS_CLOSED, STATUS_OPEN),
+    (STATUS_CLOSED, STATUS_CLOSING),
+    (STATUS_DELETED, STATUS_OPEN),
+    (STATUS_DELETED, STATUS_CLOSED),
+])
+def test_rejected_transitions(current, target):
+    ticket = make_ticket(current)
+    with pytest.raises(ValueError):
+        ticket.transition(target)
+    assert ticket.status is current
+
+
+def test_open_ticket_can_be_deleted_directly():
+    # Канал удален вручную, пока тикет был открыт
+    ticket = make_ticket()
+    assert ticket.transition(STATUS_DELETED)
+    assert ticket.closed_ts is not None
+
+
+def test_publish_only_from_open():
+    ticket = make_ticket()
+    assert ticket.publish()
+    assert ticket.published and ticket.status is STATUS_CLOSING
+
+    closed = make_ticket(STATUS_CLOSED)
+    assert closed.publish() is False
+    assert not closed.published
+
+
+def test_manager_transition_updates_open_index():
+    manager = TicketManager()
+    manager.create_ticket(10, 20, 30)
+    assert manager.user_has_active_ticket(20, 30)
+    assert manager.open_counts_by_guild() == {30: 1}
+
+    assert manager.transition(10, STATUS_CLOSING)
+    assert not manager.user_has_active_ticket(20, 30)
+    assert manager.open_counts_by_guild() == {}
+    assert manager.transition(10, STATUS_CLOSING) is False
+    with pytest.raises(ValueError):
+        manager.transition(10, STATUS_OPEN)
+
+
+def test_manager_transition_unknown_ticket():
+    assert TicketManager().transition(404, STATUS_CLOSED) is False
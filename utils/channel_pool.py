@@ -0,0 +1,197 @@
+import asyncio
+import os
+from collections import deque
+import discord
+from utils.guild_cache import get_guild_cache
+from utils.rest_scheduler import get_rest_scheduler, route, PRIORITY_LOGS
+
+# Метка в теме канала, по которой свободные каналы находятся после перезапуска
+POOL_TOPIC = "ticket-pool"
+POOL_CHANNEL_NAME = "свободный-тикет"
+# Сколько свободных каналов может быть всего (на процесс)
+DEFAULT_MAX_IDLE = 500
+# Пауза между созданием каналов пула (в секундах)
+DEFAULT_REFILL_INTERVAL = 2.0
+
+_shared_pool = None
+
+def get_channel_pool():
+    """Общий для всего процесса пул каналов
+
+    Включается переменной TICKET_POOL_SIZE (свободных каналов на сервер),
+    общий предел - TICKET_POOL_MAX_IDLE, скорость пополнения -
+    TICKET_POOL_REFILL_INTERVAL.
+    """
+    global _shared_pool
+    if _shared_pool is None:
+        _shared_pool = ChannelPool(
+            size=int(os.getenv("TICKET_POOL_SIZE", "0")),
+            max_idle=int(os.getenv("TICKET_POOL_MAX_IDLE", str(DEFAULT_MAX_IDLE))),
+            refill_interval=float(os.getenv("TICKET_POOL_REFILL_INTERVAL", str(DEFAULT_REFILL_INTERVAL)))
+        )
+    return _shared_pool
+
+class ChannelPool:
+    """Заранее созданные скрытые каналы в категории тикетов
+
+    Тикет получает свободный канал одним изменением (имя, права, тема)
+    вместо создания канала - самого медленного и сильнее всего
+    ограниченного запроса. Пул сервера заполняется после его первого
+    тикета (или при запуске из уже созданных каналов) одной фоновой
+    задачей: один канал за refill_interval, с приоритетом фоновых запросов.
+    """
+    def __init__(self, size: int = 0, max_idle: int = DEFAULT_MAX_IDLE,
+                 refill_interval: float = DEFAULT_REFILL_INTERVAL):
+        self.size = max(0, size)
+        self.max_idle = max(0, max_idle)
+        self.refill_interval = refill_interval
+
+        self._idle = {}  # guild_id -> deque[channel_id]
+        self._idle_total = 0
+        self._refill = deque()  # серверы, которым нужны каналы
+        self._queued = set()
+        self._trash = deque()  # лишние и устаревшие каналы пула на удаление
+        self._task = None
+
+        # Статистика
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.size > 0 and self.max_idle > 0
+
+    def idle(self, guild_id=None) -> int:
+        """Количество свободных каналов (всего или сервера)"""
+        if guild_id is None:
+            return self._idle_total
+        return len(self._idle.get(guild_id, ()))
+
+    def acquire(self, guild, category):
+        """Свободный канал сервера в категории category или None
+
+        Вызывающий должен сам превратить канал в тикет (переименовать,
+        выдать права) и вернуть его через release(), если не получилось.
+        """
+        if not self.enabled:
+            return None
+        channel_ids = self._idle.get(guild.id)
+        while channel_ids:
+            channel = guild.get_channel(channel_ids.popleft())
+            self._idle_total -= 1
+            if channel is None:
+                continue
+            if channel.category != category:
+                # Категорию тикетов сменили в настройках
+                self._trash.append(channel)
+                continue
+            self.hits += 1
+            self.request_refill(guild)
+            return channel
+        self.misses += 1
+        self.request_refill(guild)
+        return None
+
+    def release(self, channel):
+        """Возврат неиспользованного канала в пул"""
+        self._add(channel.guild.id, channel.id)
+
+    def retire(self, channel):
+        """Удаление выданного канала, состояние которого неизвестно
+
+        Например, если изменение канала прервано: права могли уже
+        поменяться, поэтому возвращать такой канал в пул нельзя.
+        """
+        self._trash.append(channel)
+        self._start()
+
+    def discard(self, channel):
+        """Канал пула удален (событие удаления канала)"""
+        channel_ids = self._idle.get(channel.guild.id)
+        if channel_ids and channel.id in channel_ids:
+            channel_ids.remove(channel.id)
+            self._idle_total -= 1
+
+    def adopt(self, guild, ticket_manager):
+        """Свободные каналы, оставшиеся с прошлого запуска"""
+        if not self.enabled:
+            return
+        category = get_guild_cache().category(guild, "ticket_category_id")
+        if category is None:
+            return
+        known = set(self._idle.get(guild.id, ()))
+        for channel in guild.text_channels:
+            if channel.topic != POOL_TOPIC or channel.id in known or ticket_manager.get_ticket(channel.id):
+                continue
+            if channel.category == category and self._deficit(guild.id) > 0:
+                self._add(guild.id, channel.id)
+            else:
+                self._trash.append(channel)
+        if self._trash:
+            self._start()
+
+    def request_refill(self, guild):
+        """Пополнение пула сервера в фоне"""
+        if not self.enabled or guild.id in self._queued:
+            return
+        self._queued.add(guild.id)
+        self._refill.append(guild)
+        self._start()
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def _add(self, guild_id, channel_id):
+        self._idle.setdefault(guild_id, deque()).append(channel_id)
+        self._idle_total += 1
+
+    def _deficit(self, guild_id) -> int:
+        return min(self.size - self.idle(guild_id), self.max_idle - self._idle_total)
+
+    def _start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def _run(self):
+        while self._refill or self._trash:
+            if self._trash:
+                await self._delete(self._trash.popleft())
+            else:
+                guild = self._refill.popleft()
+                self._queued.discard(guild.id)
+                if self._deficit(guild.id) <= 0:
+                    continue
+                try:
+                    created = await self._create(guild)
+                except Exception as e:
+                    # Повтор - при следующем тикете сервера
+                    print(f"❌ Не удалось создать канал пула на сервере {guild.id}: {e}")
+                    created = False
+                if created and self._deficit(guild.id) > 0:
+                    self.request_refill(guild)
+            await asyncio.sleep(self.refill_interval)
+
+    async def _create(self, guild) -> bool:
+        category = get_guild_cache().category(guild, "ticket_category_id")
+        if category is None:
+            return False
+        channel = await get_rest_scheduler().run(
+            route("create_channel", guild.id),
+            lambda: guild.create_text_channel(
+                name=POOL_CHANNEL_NAME,
+                category=category,
+                overwrites={guild.default_role: discord.PermissionOverwrite(view_channel=False)},
+                topic=POOL_TOPIC
+            ),
+            PRIORITY_LOGS
+        )
+        self._add(guild.id, channel.id)
+        return True
+
+    async def _delete(self, channel):
+        try:
+            await get_rest_scheduler().run(route("delete_channel", channel.id), channel.delete, PRIORITY_LOGS)
+        except discord.HTTPException:
+            pass
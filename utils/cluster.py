@@ -0,0 +1,94 @@
+import asyncio
+import math
+import os
+import time
+
+# Как часто процесс кластера отправляет состояние лаунчеру (в секундах)
+HEALTH_INTERVAL = 15.0
+
+def cluster_id():
+    """Номер кластера текущего процесса или None вне режима кластеров"""
+    value = os.getenv("CLUSTER_ID")
+    return int(value) if value else None
+
+def shard_for_guild(guild_id: int, shard_count: int) -> int:
+    """Номер шарда, к которому Discord относит сервер"""
+    return (guild_id >> 22) % shard_count
+
+def shard_ranges(shard_count: int, clusters: int) -> list:
+    """Разбиение шардов на непрерывные диапазоны почти равного размера"""
+    clusters = max(1, min(clusters, shard_count))
+    size, extra = divmod(shard_count, clusters)
+    ranges = []
+    start = 0
+    for index in range(clusters):
+        end = start + size + (1 if index < extra else 0)
+        ranges.append(list(range(start, end)))
+        start = end
+    return ranges
+
+def owns_guild(bot, guild_id: int) -> bool:
+    """Обслуживается ли сервер шардами этого процесса"""
+    shard_ids = getattr(bot, "shard_ids", None)
+    if not shard_ids or not bot.shard_count:
+        return True
+    return shard_for_guild(guild_id, bot.shard_count) in shard_ids
+
+class HealthReporter:
+    """Периодическая отправка состояния процесса кластера лаунчеру
+
+    Лаунчер (cluster.py) по этим отчетам показывает состояние кластеров
+    и перезапускает процессы, которые перестали отвечать.
+    """
+    def __init__(self, bot, cluster_id: int, queue, interval: float = HEALTH_INTERVAL):
+        self.bot = bot
+        self.cluster_id = cluster_id
+        self.queue = queue
+        self.interval = interval
+        self._task = None
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def snapshot(self) -> dict:
+        """Состояние процесса для отчета"""
+        # Импорт здесь, чтобы модуль можно было использовать в лаунчере
+        from models.ticket_models import get_ticket_manager
+        from utils.logger import get_ticket_logger
+        from utils.rest_scheduler import get_rest_scheduler
+
+        bot = self.bot
+        latencies = {}
+        for shard_id, shard in getattr(bot, "shards", {}).items():
+            latency = shard.latency
+            latencies[shard_id] = None if shard.is_closed() or math.isinf(latency) else round(latency, 3)
+
+        return {
+            "cluster_id": self.cluster_id,
+            "pid": os.getpid(),
+            "time": time.time(),
+            "ready": bot.is_ready(),
+            "shard_ids": list(getattr(bot, "shard_ids", None) or []),
+            "latencies": latencies,
+            "guilds": len(bot.guilds),
+            "open_tickets": len(get_ticket_manager().active_tickets),
+            "rest": get_rest_scheduler().stats(),
+            "log_queue": get_ticket_logger(bot).queue_depth()
+        }
+
+    def report(self):
+        try:
+            self.queue.put_nowait(self.snapshot())
+        except Exception as e:
+            print(f"❌ Кластер {self.cluster_id}: не удалось отправить состояние: {e}")
+
+    async def _run(self):
+        while True:
+            self.report()
+            await asyncio.sleep(self.interval)
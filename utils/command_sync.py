@@ -0,0 +1,63 @@
+import hashlib
+import json
+import os
+from pathlib import Path
+
+import discord
+
+from storage.files import atomic_write_json
+
+# Хэши последнего синхронизированного набора команд
+STATE_PATH = "data/command_tree.json"
+
+def tree_hash(tree, guild=None) -> str:
+    """Стабильный хэш команд дерева в том виде, в каком они уходят в Discord"""
+    payload = sorted(
+        (command.to_dict(tree) for command in tree.get_commands(guild=guild)),
+        key=lambda data: (data.get("type", 1), data["name"])
+    )
+    raw = json.dumps(payload, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+async def sync_commands(bot, path: str = STATE_PATH) -> bool:
+    """Синхронизация команд, только если они изменились с прошлой синхронизации
+
+    Если задан DEV_GUILD_ID, команды синхронизируются только на этот сервер
+    (изменения видны сразу, без ожидания глобального обновления).
+    FORCE_COMMAND_SYNC=1 синхронизирует команды без сравнения хэшей.
+    Возвращает True, если запрос к API был отправлен.
+    """
+    path = Path(path)
+    dev_guild_id = os.getenv("DEV_GUILD_ID")
+    guild = None
+    if dev_guild_id:
+        guild = discord.Object(id=int(dev_guild_id))
+        bot.tree.copy_global_to(guild=guild)
+
+    key = f"{bot.application_id}:{dev_guild_id or 'global'}"
+    digest = tree_hash(bot.tree, guild)
+
+    state = {}
+    if path.exists():
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            state = {}
+
+    if state.get(key) == digest and os.getenv("FORCE_COMMAND_SYNC") != "1":
+        print("✅ Команды не изменились, синхронизация не нужна")
+        return False
+
+    synced = await bot.tree.sync(guild=guild)
+    target = f"сервер {dev_guild_id}" if dev_guild_id else "глобально"
+    print(f"✅ Синхронизировано {len(synced)} команд ({target})")
+
+    # Показать список команд
+    print("📋 Доступные команды:")
+    for cmd in synced:
+        print(f"  /{cmd.name} - {cmd.description}")
+
+    state[key] = digest
+    atomic_write_json(path, state)
+    return True
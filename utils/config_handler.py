@@ -1,18 +1,44 @@
+import asyncio
 import json
-import os
+import time
 from pathlib import Path
 
+from models.guild_settings import DEFAULT_SETTINGS, DEFAULT_GUILD_SETTINGS, GuildSettings
+from storage import get_storage
+from storage.files import atomic_write_json
+from utils.metrics import SETTINGS_WRITE_SECONDS
+
+# Задержка перед записью: несколько изменений подряд объединяются в одну запись
+SAVE_DEBOUNCE = 2.0
+# Максимальное время, которое изменения могут оставаться несохраненными
+MAX_SAVE_DELAY = 10.0
+
+_shared_handler = None
+
+
+def get_config_handler():
+    """Общий для всего процесса экземпляр ConfigHandler"""
+    global _shared_handler
+    if _shared_handler is None:
+        _shared_handler = ConfigHandler()
+    return _shared_handler
+
+
 class ConfigHandler:
-    def __init__(self):
-        self.data_dir = Path("data")
-        self.data_dir.mkdir(exist_ok=True)
-        
-        self.guild_settings_path = self.data_dir / "guild_settings.json"
+    def __init__(self, storage=None):
+        self.storage = storage or get_storage()
         self.config_path = Path("config.json")
-        
+
+        # Состояние отложенной записи
+        self._dirty_guilds = set()
+        self._dirty = False
+        self._first_dirty_at = None
+        self._save_handle = None
+        self._save_task = None
+
         self.load_config()
         self.load_guild_settings()
-    
+
     def load_config(self):
         """Загрузка конфигурации по умолчанию"""
         if self.config_path.exists():
@@ -20,57 +46,104 @@ class ConfigHandler:
                 self.config = json.load(f)
         else:
             # Конфигурация по умолчанию
-            self.config = {
-                "default_settings": {
-                    "ticket_category_id": None,
-                    "closed_category_id": None,
-                    "log_channel_id": None,
-                    "publish_channel_id": None,
-                    "admin_role_name": "Admin",
-                    "embed_color": "#3498db",
-                    "ticket_title": "Оставьте свой отзыв",
-                    "ticket_subtitle": "С вами мы становимся лучше",
-                    "button_label": "Оставить отзыв",
-                    "button_color": "primary",
-                    "ticket_message": "📝 Пожалуйста, напишите ваш отзыв в этот канал.\n\nАдминистрация рассмотрит его в ближайшее время.",
-                    "welcome_message": "🎫 Добро пожаловать в тикет поддержки! Опишите вашу проблему или оставьте отзыв."
-                }
-            }
+            self.config = {"default_settings": dict(DEFAULT_SETTINGS)}
             self.save_config()
-    
+        
+        # Общий объект настроек для серверов без своих настроек
+        self.defaults = GuildSettings.from_dict(self.config.get("default_settings", {}), DEFAULT_GUILD_SETTINGS)
+
     def load_guild_settings(self):
         """Загрузка настроек серверов"""
-        if self.guild_settings_path.exists():
-            with open(self.guild_settings_path, 'r', encoding='utf-8') as f:
-                self.guild_settings = json.load(f)
-        else:
-            self.guild_settings = {}
-            self.save_guild_settings()
-    
-    def get_guild_settings(self, guild_id):
+        self.guild_settings = {}  # guild_id (int) -> GuildSettings
+        for guild_id, data in self.storage.load_guild_settings().items():
+            self.guild_settings[int(guild_id)] = GuildSettings.from_dict(data, self.defaults)
+
+    def get_guild_settings(self, guild_id) -> GuildSettings:
         """Получение настроек для сервера"""
-        guild_id = str(guild_id)
-        if guild_id not in self.guild_settings:
-            self.guild_settings[guild_id] = self.config["default_settings"].copy()
-            self.save_guild_settings()
-        return self.guild_settings[guild_id]
-    
-    def update_guild_settings(self, guild_id, **kwargs):
-        """Обновление настроек сервера"""
-        guild_id = str(guild_id)
-        if guild_id not in self.guild_settings:
-            self.guild_settings[guild_id] = self.config["default_settings"].copy()
-        
-        self.guild_settings[guild_id].update(kwargs)
-        self.save_guild_settings()
-        return self.guild_settings[guild_id]
-    
+        # Серверы без своих настроек получают общий объект по умолчанию
+        return self.guild_settings.get(int(guild_id), self.defaults)
+
+    def update_guild_settings(self, guild_id, **kwargs) -> GuildSettings:
+        """Обновление настроек сервера
+
+        Значения проверяются до записи: при некорректном значении бросается
+        ValueError и настройки не меняются.
+        """
+        guild_id = int(guild_id)
+        # Настройки неизменяемы: сохраняется новый объект, поэтому кэши,
+        # сравнивающие объекты настроек (utils/guild_cache.py), видят изменение
+        settings = self.get_guild_settings(guild_id).replace(**kwargs)
+        self.guild_settings[guild_id] = settings
+        self._dirty_guilds.add(guild_id)
+        self._schedule_save()
+        return settings
+
     def save_config(self):
         """Сохранение конфигурации"""
-        with open(self.config_path, 'w', encoding='utf-8') as f:
-            json.dump(self.config, f, indent=4, ensure_ascii=False)
-    
+        atomic_write_json(self.config_path, self.config)
+
     def save_guild_settings(self):
-        """Сохранение настроек серверов"""
-        with open(self.guild_settings_path, 'w', encoding='utf-8') as f:
-            json.dump(self.guild_settings, f, indent=4, ensure_ascii=False)
\ No newline at end of file
+        """Синхронное сохранение измененных настроек серверов"""
+        self._cancel_pending_save()
+        self.storage.save_guild_settings(self._take_changes())
+
+    async def flush(self):
+        """Немедленная запись накопленных изменений (например, при остановке бота)"""
+        self._cancel_pending_save()
+        if self._save_task and not self._save_task.done():
+            await self._save_task
+        if self._dirty:
+            await self._write_behind()
+
+    def _schedule_save(self):
+        """Планирование отложенной записи настроек"""
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # Вне event loop (скрипты, миграции) пишем сразу
+            self.save_guild_settings()
+            return
+
+        now = time.monotonic()
+        if not self._dirty:
+            self._dirty = True
+            self._first_dirty_at = now
+
+        # Откладываем запись, но не дольше MAX_SAVE_DELAY от первого изменения
+        delay = min(SAVE_DEBOUNCE, max(0.0, self._first_dirty_at + MAX_SAVE_DELAY - now))
+        if self._save_handle:
+            self._save_handle.cancel()
+        self._save_handle = loop.call_later(delay, self._start_write_behind)
+
+    def _start_write_behind(self):
+        self._save_handle = None
+        if self._save_task and not self._save_task.done():
+            # Предыдущая запись еще идет, повторим после нее
+            self._save_task.add_done_callback(lambda _: self._schedule_save() if self._dirty else None)
+            return
+        self._save_task = asyncio.get_running_loop().create_task(self._write_behind())
+
+    async def _write_behind(self):
+        """Запись измененных настроек в потоке хранилища"""
+        changes = self._take_changes()
+        started = time.perf_counter()
+        try:
+            await self.storage.submit(self.storage.save_guild_settings, changes)
+            SETTINGS_WRITE_SECONDS.observe(time.perf_counter() - started)
+        except Exception as e:
+            print(f"❌ Ошибка сохранения настроек: {e}")
+            self._dirty_guilds.update(int(guild_id) for guild_id in changes)
+            self._schedule_save()
+
+    def _cancel_pending_save(self):
+        if self._save_handle:
+            self._save_handle.cancel()
+            self._save_handle = None
+
+    def _take_changes(self):
+        """Копии измененных настроек, которые можно сериализовать вне event loop"""
+        changes = {str(guild_id): self.guild_settings[guild_id].to_dict() for guild_id in self._dirty_guilds}
+        self._dirty_guilds.clear()
+        self._dirty = False
+        self._first_dirty_at = None
+        return changes
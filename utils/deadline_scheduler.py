@@ -0,0 +1,197 @@
+import asyncio
+import heapq
+import itertools
+import json
+import time
+from pathlib import Path
+
+from storage.files import atomic_write_json
+from utils.cluster import cluster_id
+
+# Повторы действия, завершившегося ошибкой
+MAX_ATTEMPTS = 5
+RETRY_BASE_DELAY = 5.0
+
+_shared_scheduler = None
+
+def get_deadline_scheduler():
+    """Общий для всего процесса планировщик отложенных действий"""
+    global _shared_scheduler
+    if _shared_scheduler is None:
+        # У каждого процесса кластера свой файл сроков
+        cluster = cluster_id()
+        path = "data/deadlines.json" if cluster is None else f"data/deadlines.cluster{cluster}.json"
+        _shared_scheduler = DeadlineScheduler(path)
+    return _shared_scheduler
+
+class DeadlineScheduler:
+    """Сохраняемый на диск планировщик отложенных действий над тикетами
+
+    Все сроки лежат в одной куче и обслуживаются одной задачей, которая спит
+    до ближайшего срока. Действие определяется именем и ключом (например,
+    "delete_channel" + ID канала); повторное планирование того же действия
+    заменяет старый срок. Список сроков сохраняется на диск, поэтому после
+    перезапуска бота действия выполняются, как только их срок наступит.
+    Обработчики регистрируются по имени действия через register().
+    """
+    def __init__(self, path="data/deadlines.json"):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+        self._handlers = {}  # action -> async def handler(payload)
+        self._entries = {}  # (action, key) -> запись
+        self._heap = []  # (when, seq, action, key)
+        self._seq = itertools.count()
+        self._running = set()  # выполняющиеся задачи обработчиков
+
+        self._wakeup = None
+        self._task = None
+        self._save_scheduled = False
+        self._save_task = None
+
+        self._load()
+
+    def register(self, action: str, handler):
+        """Регистрация обработчика действия"""
+        self._handlers[action] = handler
+
+    def schedule(self, action: str, key, delay: float, payload: dict = None):
+        """Планирование действия через delay секунд"""
+        entry = {
+            "action": action,
+            "key": str(key),
+            "when": time.time() + delay,
+            "payload": payload or {},
+            "attempts": 0
+        }
+        self._put(entry)
+        self._mark_dirty()
+
+    def cancel(self, action: str, key):
+        """Отмена запланированного действия"""
+        if self._entries.pop((action, str(key)), None) is not None:
+            self._mark_dirty()
+
+    def is_scheduled(self, action: str, key) -> bool:
+        return (action, str(key)) in self._entries
+
+    def pending(self) -> int:
+        """Количество запланированных действий"""
+        return len(self._entries)
+
+    def start(self):
+        """Запуск обслуживающей задачи (повторный вызов ничего не делает)"""
+        if self._task is None or self._task.done():
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        """Остановка и сохранение сроков на диск"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._save_task is not None and not self._save_task.done():
+            await self._save_task
+        await asyncio.get_running_loop().run_in_executor(None, atomic_write_json, self.path, self._snapshot(), None)
+
+    def _put(self, entry: dict):
+        self._entries[(entry["action"], entry["key"])] = entry
+        heapq.heappush(self._heap, (entry["when"], next(self._seq), entry["action"], entry["key"]))
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def _run(self):
+        while True:
+            # Удаляем из вершины кучи отмененные и перепланированные записи
+            while self._heap:
+                when, _, action, key = self._heap[0]
+                entry = self._entries.get((action, key))
+                if entry is not None and entry["when"] == when:
+                    break
+                heapq.heappop(self._heap)
+
+            self._wakeup.clear()
+            if not self._heap:
+                await self._wakeup.wait()
+                continue
+
+            delay = self._heap[0][0] - time.time()
+            if delay > 0:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            _, _, action, key = heapq.heappop(self._heap)
+            entry = self._entries[(action, key)]
+            task = asyncio.get_running_loop().create_task(self._execute(entry))
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+
+    async def _execute(self, entry: dict):
+        action = entry["action"]
+        handler = self._handlers.get(action)
+        try:
+            if handler is None:
+                raise RuntimeError(f"нет обработчика для действия {action}")
+            await handler(entry["payload"])
+        except Exception as e:
+            entry["attempts"] += 1
+            if entry["attempts"] >= MAX_ATTEMPTS:
+                print(f"❌ Действие {action} ({entry['key']}) отменено после {MAX_ATTEMPTS} попыток: {e}")
+                self._remove(entry)
+            else:
+                print(f"❌ Ошибка действия {action} ({entry['key']}), повтор: {e}")
+                entry["when"] = time.time() + RETRY_BASE_DELAY * 2 ** (entry["attempts"] - 1)
+                self._put(entry)
+                self._mark_dirty()
+        else:
+            self._remove(entry)
+
+    def _remove(self, entry: dict):
+        # Обработчик мог перепланировать это же действие, тогда запись уже новая
+        key = (entry["action"], entry["key"])
+        if self._entries.get(key) is entry:
+            del self._entries[key]
+            self._mark_dirty()
+
+    def _load(self):
+        if not self.path.exists():
+            return
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for entry in json.load(f):
+                self._put(entry)
+
+    def _snapshot(self) -> list:
+        return [dict(entry) for entry in self._entries.values()]
+
+    def _mark_dirty(self):
+        """Сохранение сроков на диск, изменения за одну итерацию цикла объединяются"""
+        if self._save_scheduled:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            atomic_write_json(self.path, self._snapshot(), None)
+            return
+        self._save_scheduled = True
+        loop.call_soon(self._start_save)
+
+    def _start_save(self):
+        if self._save_task is not None and not self._save_task.done():
+            # Дождемся текущей записи и сохраним еще раз
+            self._save_task.add_done_callback(lambda _: self._start_save())
+            return
+        self._save_scheduled = False
+        self._save_task = asyncio.get_running_loop().create_task(self._save())
+
+    async def _save(self):
+        try:
+            await asyncio.get_running_loop().run_in_executor(None, atomic_write_json, self.path, self._snapshot(), None)
+        except Exception as e:
+            print(f"❌ Ошибка сохранения отложенных действий: {e}")
@@ -0,0 +1,95 @@
+import discord
+from utils.config_handler import get_config_handler
+
+# Настройки, в которых хранятся ID каналов и категорий
+CHANNEL_KEYS = ("ticket_category_id", "closed_category_id", "log_channel_id", "publish_channel_id")
+
+_shared_cache = None
+
+def get_guild_cache():
+    """Общий для всего процесса кэш сущностей серверов"""
+    global _shared_cache
+    if _shared_cache is None:
+        _shared_cache = GuildEntityCache()
+    return _shared_cache
+
+class ResolvedGuild:
+    """ID сущностей сервера, найденные по его настройкам"""
+    __slots__ = ("settings", "admin_role_id", "channel_ids")
+
+    def __init__(self, settings, admin_role_id, channel_ids):
+        self.settings = settings
+        self.admin_role_id = admin_role_id
+        self.channel_ids = channel_ids  # ключ настройки -> ID
+
+class GuildEntityCache:
+    """Кэш роли админа, категорий и каналов из настроек сервера
+
+    Роль админа ищется по имени только при заполнении кэша; при нажатии
+    кнопок остаются поиски по ID в словарях discord.py. Запись
+    сбрасывается при изменении настроек (ConfigHandler заменяет объект
+    настроек при обновлении) и из событий изменения ролей и каналов.
+    """
+    def __init__(self, config_handler=None):
+        self.config = config_handler or get_config_handler()
+        self._entries = {}  # guild_id -> ResolvedGuild
+
+    def resolve(self, guild) -> ResolvedGuild:
+        settings = self.config.get_guild_settings(guild.id)
+        entry = self._entries.get(guild.id)
+        if entry is None or entry.settings is not settings:
+            entry = self._entries[guild.id] = self._resolve(guild, settings)
+        return entry
+
+    def admin_role(self, guild):
+        """Роль админа из настроек или None"""
+        role_id = self.resolve(guild).admin_role_id
+        return guild.get_role(role_id) if role_id else None
+
+    def channel(self, guild, key: str):
+        """Канал или категория из настройки key (например, "log_channel_id")"""
+        channel_id = self.resolve(guild).channel_ids.get(key)
+        return guild.get_channel(channel_id) if channel_id else None
+
+    def category(self, guild, key: str):
+        """Категория из настройки key, None если ID указывает не на категорию"""
+        channel = self.channel(guild, key)
+        return channel if isinstance(channel, discord.CategoryChannel) else None
+
+    def is_admin(self, member) -> bool:
+        """Администратор сервера или участник с ролью админа"""
+        if member.guild_permissions.administrator:
+            return True
+        role_id = self.resolve(member.guild).admin_role_id
+        return role_id is not None and member.get_role(role_id) is not None
+
+    def invalidate(self, guild_id):
+        self._entries.pop(guild_id, None)
+
+    def on_role_changed(self, role):
+        """Сброс записи, если роль могла быть ролью админа"""
+        entry = self._entries.get(role.guild.id)
+        if entry is None:
+            return
+        if role.id == entry.admin_role_id or role.name == entry.settings.admin_role_name:
+            self.invalidate(role.guild.id)
+
+    def on_channel_changed(self, channel):
+        """Сброс записи, если канал используется в настройках"""
+        entry = self._entries.get(channel.guild.id)
+        if entry is not None and channel.id in entry.channel_ids.values():
+            self.invalidate(channel.guild.id)
+
+    def _resolve(self, guild, settings) -> ResolvedGuild:
+        admin_role_id = None
+        for role in guild.roles:
+            if role.name == settings.admin_role_name:
+                admin_role_id = role.id
+                break
+
+        channel_ids = {}
+        for key in CHANNEL_KEYS:
+            channel_id = getattr(settings, key)
+            if channel_id is not None:
+                channel_ids[key] = channel_id
+        return ResolvedGuild(settings, admin_role_id, channel_ids)
@@ -0,0 +1,121 @@
+import asyncio
+import time
+import discord
+from utils.metrics import INTERACTION_ACK_SECONDS, INTERACTION_REJECTED, INTERACTION_SECONDS
+
+# Сколько обработчиков нажатий выполняется одновременно
+DEFAULT_WORKERS = 16
+# Сколько подтвержденных нажатий может ждать обработчика
+DEFAULT_QUEUE_SIZE = 1000
+# Предельное время обработки одного нажатия (токен взаимодействия живет 15 минут)
+DEFAULT_TIMEOUT = 60.0
+
+_shared_pipeline = None
+
+def get_interaction_pipeline():
+    """Общий для всего процесса конвейер обработки нажатий"""
+    global _shared_pipeline
+    if _shared_pipeline is None:
+        _shared_pipeline = InteractionPipeline()
+    return _shared_pipeline
+
+async def respond(interaction: discord.Interaction, content=None, **kwargs):
+    """Ответ на взаимодействие: первый ответ или followup, если ответ уже был"""
+    if interaction.response.is_done():
+        return await interaction.followup.send(content, **kwargs)
+    return await interaction.response.send_message(content, **kwargs)
+
+class InteractionPipeline:
+    """Подтверждение нажатий сразу и обработка в ограниченном пуле задач
+
+    Discord ждет подтверждения взаимодействия 3 секунды. handle() сразу
+    откладывает ответ (defer), а работу передает одной из workers задач;
+    результат отправляется через followup (см. respond). Обработка
+    ограничена timeout и отменяется по его истечении; если очередь
+    заполнена, пользователь сразу получает сообщение о перегрузке.
+    """
+    def __init__(self, workers: int = DEFAULT_WORKERS, queue_size: int = DEFAULT_QUEUE_SIZE,
+                 timeout: float = DEFAULT_TIMEOUT):
+        self.workers = workers
+        self.queue_size = queue_size
+        self.timeout = timeout
+        self._queue = None
+        self._tasks = []
+
+    def queue_depth(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    async def handle(self, interaction: discord.Interaction, handler: str, work,
+                     ephemeral: bool = False, thinking: bool = False) -> asyncio.Future:
+        """Подтверждение взаимодействия и постановка work() в очередь
+
+        ephemeral/thinking передаются в defer: thinking показывает
+        пользователю "бот думает", и первый followup заменяет это сообщение.
+        Возвращает Future, который завершается после обработки.
+        """
+        done = asyncio.get_running_loop().create_future()
+        try:
+            await interaction.response.defer(ephemeral=ephemeral, thinking=thinking)
+        except discord.HTTPException as e:
+            # Взаимодействие уже истекло или на него ответили
+            print(f"❌ Не удалось подтвердить взаимодействие {handler}: {e}")
+            INTERACTION_REJECTED.inc(handler, "ack_failed")
+            done.set_result(False)
+            return done
+        # Время от нажатия (по ID взаимодействия) до подтверждения
+        ack_delay = (discord.utils.utcnow() - interaction.created_at).total_seconds()
+        INTERACTION_ACK_SECONDS.observe(max(ack_delay, 0.0), handler)
+
+        self._start()
+        try:
+            self._queue.put_nowait((interaction, handler, work, done))
+        except asyncio.QueueFull:
+            INTERACTION_REJECTED.inc(handler, "overloaded")
+            done.set_result(False)
+            try:
+                await respond(interaction, "⚠️ Бот сейчас перегружен, попробуйте еще раз через минуту.", ephemeral=True)
+            except discord.HTTPException:
+                pass
+        return done
+
+    async def stop(self):
+        """Остановка обработчиков (ожидающие нажатия отбрасываются)"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._queue = None
+
+    def _start(self):
+        if self._queue is None:
+            self._queue = asyncio.Queue(self.queue_size)
+        if not self._tasks:
+            loop = asyncio.get_running_loop()
+            self._tasks = [loop.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def _worker(self):
+        while True:
+            interaction, handler, work, done = await self._queue.get()
+            started = time.perf_counter()
+            outcome = "error"
+            try:
+                await asyncio.wait_for(work(), timeout=self.timeout)
+                outcome = "ok"
+            except asyncio.TimeoutError:
+                outcome = "timeout"
+                print(f"❌ Обработка {handler} прервана: дольше {self.timeout:g} с")
+                await self._report(interaction, "❌ Действие выполнялось слишком долго и было прервано.")
+            except Exception as e:
+                print(f"❌ Ошибка обработки {handler}: {e}")
+                await self._report(interaction, f"❌ Ошибка: {e}")
+            finally:
+                INTERACTION_SECONDS.observe(time.perf_counter() - started, handler, outcome)
+                self._queue.task_done()
+                if not done.done():
+                    done.set_result(outcome == "ok")
+
+    async def _report(self, interaction, message: str):
+        try:
+            await respond(interaction, message, ephemeral=True)
+        except discord.HTTPException:
+            pass
@@ -1,47 +1,177 @@
+import asyncio
 import discord
+from collections import deque
 from datetime import datetime
-from utils.config_handler import ConfigHandler
+from utils.config_handler import get_config_handler
+from utils.guild_cache import get_guild_cache
+from utils.rest_scheduler import get_rest_scheduler, route, PRIORITY_LOGS
+
+# Discord принимает не больше 10 embed в одном сообщении
+MAX_EMBEDS_PER_MESSAGE = 10
+# Общий лимит символов во всех embed одного сообщения
+MAX_EMBED_CHARS = 6000
+# Сколько ждать, прежде чем отправить неполную пачку
+FLUSH_INTERVAL = 2.0
+# Ограничения памяти: старые записи отбрасываются
+MAX_QUEUED_PER_GUILD = 100
+MAX_QUEUED_TOTAL = 5000
+# Повторы отправки при временных ошибках
+MAX_RETRIES = 3
+RETRY_BASE_DELAY = 1.0
+
+_shared_logger = None
+
+def get_ticket_logger(bot):
+    """Общий для всего процесса логгер"""
+    global _shared_logger
+    if _shared_logger is None:
+        _shared_logger = TicketLogger(bot)
+    return _shared_logger
 
 class TicketLogger:
+    """Логирование действий в канал логов сервера
+
+    log_action только ставит embed в очередь сервера и сразу возвращается.
+    Очередь отправляется пачками до 10 embed в одном сообщении: сразу, когда
+    пачка заполнена, или через FLUSH_INTERVAL.
+    """
     def __init__(self, bot):
         self.bot = bot
-        self.config = ConfigHandler()
-    
+        self.config = get_config_handler()
+
+        self._queues = {}  # guild_id -> deque[discord.Embed]
+        self._queued_total = 0
+        self._timers = {}  # guild_id -> TimerHandle
+        self._tasks = {}  # guild_id -> Task отправки
+        self.dropped = 0
+
     async def log_action(self, guild, action_type, details, user=None, channel=None, target=None):
         """Логирование действий с тикетами"""
         settings = self.config.get_guild_settings(guild.id)
-        log_channel_id = settings.get("log_channel_id")
-        
-        if not log_channel_id:
-            return
-        
-        log_channel = guild.get_channel(int(log_channel_id))
-        if not log_channel:
+        if not settings.log_channel_id:
             return
-        
+
         # Создание embed для лога
         embed = discord.Embed(
             title=f"📝 {action_type}",
             color=self._get_color(action_type),
             timestamp=datetime.now()
         )
-        
+
         if user:
             embed.add_field(name="👤 Пользователь", value=f"{user.mention} ({user.id})", inline=False)
-        
+
         if channel:
             embed.add_field(name="📁 Канал", value=f"{channel.mention} ({channel.id})", inline=False)
-        
+
         if target:
             embed.add_field(name="🎯 Цель", value=str(target), inline=False)
-        
+
         embed.add_field(name="📋 Детали", value=details, inline=False)
-        
+
+        self._enqueue(guild.id, embed)
+
+    async def flush(self, guild_id=None):
+        """Отправка всех накопленных записей (например, при остановке бота)"""
+        guild_ids = [guild_id] if guild_id is not None else list(self._queues)
+        for gid in guild_ids:
+            timer = self._timers.pop(gid, None)
+            if timer:
+                timer.cancel()
+            task = self._tasks.get(gid)
+            if task and not task.done():
+                await task
+            if self._queues.get(gid):
+                await self._send_queue(gid)
+
+    def queue_depth(self, guild_id=None) -> int:
+        """Количество ожидающих отправки записей"""
+        if guild_id is None:
+            return self._queued_total
+        return len(self._queues.get(guild_id, ()))
+
+    def _enqueue(self, guild_id, embed):
+        queue = self._queues.get(guild_id)
+        if queue is None:
+            queue = self._queues[guild_id] = deque()
+
+        # При переполнении отбрасываем самые старые записи
+        if len(queue) >= MAX_QUEUED_PER_GUILD or self._queued_total >= MAX_QUEUED_TOTAL:
+            if not queue:
+                self.dropped += 1
+                return
+            queue.popleft()
+            self._queued_total -= 1
+            self.dropped += 1
+
+        queue.append(embed)
+        self._queued_total += 1
+
+        if len(queue) >= MAX_EMBEDS_PER_MESSAGE:
+            self._start_send(guild_id)
+        elif guild_id not in self._timers and guild_id not in self._tasks:
+            loop = asyncio.get_running_loop()
+            self._timers[guild_id] = loop.call_later(FLUSH_INTERVAL, self._start_send, guild_id)
+
+    def _start_send(self, guild_id):
+        timer = self._timers.pop(guild_id, None)
+        if timer:
+            timer.cancel()
+        if guild_id in self._tasks:
+            # Отправка уже идет и заберет новые записи
+            return
+        self._tasks[guild_id] = asyncio.get_running_loop().create_task(self._send_queue(guild_id))
+
+    async def _send_queue(self, guild_id):
         try:
-            await log_channel.send(embed=embed)
-        except:
-            pass
-    
+            queue = self._queues.get(guild_id)
+            while queue:
+                batch = self._take_batch(queue)
+                await self._send_batch(guild_id, batch)
+            self._queues.pop(guild_id, None)
+        finally:
+            self._tasks.pop(guild_id, None)
+
+    def _take_batch(self, queue):
+        """Пачка embed, помещающаяся в одно сообщение"""
+        batch = []
+        chars = 0
+        while queue and len(batch) < MAX_EMBEDS_PER_MESSAGE:
+            size = len(queue[0])
+            if batch and chars + size > MAX_EMBED_CHARS:
+                break
+            batch.append(queue.popleft())
+            chars += size
+        self._queued_total -= len(batch)
+        return batch
+
+    async def _send_batch(self, guild_id, batch):
+        guild = self.bot.get_guild(guild_id)
+        if not guild:
+            return
+
+        log_channel = get_guild_cache().channel(guild, "log_channel_id")
+        if not log_channel:
+            return
+
+        for attempt in range(MAX_RETRIES + 1):
+            try:
+                await get_rest_scheduler().run(
+                    route("send_message", log_channel.id),
+                    lambda: log_channel.send(embeds=batch),
+                    PRIORITY_LOGS
+                )
+                return
+            except (discord.Forbidden, discord.NotFound) as e:
+                print(f"❌ Не удалось отправить лог на сервер {guild_id}: {e}")
+                return
+            except (discord.HTTPException, OSError, asyncio.TimeoutError) as e:
+                if attempt == MAX_RETRIES:
+                    print(f"❌ Лог для сервера {guild_id} отброшен после {MAX_RETRIES} повторов: {e}")
+                    self.dropped += len(batch)
+                    return
+                await asyncio.sleep(RETRY_BASE_DELAY * 2 ** attempt)
+
     def _get_color(self, action_type):
         """Получение цвета embed в зависимости от типа действия"""
         colors = {
@@ -51,4 +181,4 @@ class TicketLogger:
             "Ошибка": discord.Color.orange(),
             "Настройка": discord.Color.purple()
         }
-        return colors.get(action_type, discord.Color.greyple())
\ No newline at end of file
+        return colors.get(action_type, discord.Color.greyple())
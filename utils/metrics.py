@@ -0,0 +1,338 @@
+import asyncio
+import bisect
+import math
+import os
+import time
+
+import discord
+from discord import app_commands
+
+# Границы корзин гистограмм длительности (в секундах)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Как часто пересчитывать размер истории тикетов на диске
+DISK_USAGE_TTL = 60.0
+
+_shared_metrics = None
+
+def get_metrics():
+    """Общий для всего процесса реестр метрик"""
+    global _shared_metrics
+    if _shared_metrics is None:
+        _shared_metrics = Metrics()
+    return _shared_metrics
+
+def _format_labels(names, values, extra: str = "") -> str:
+    parts = []
+    for name, value in zip(names, values):
+        value = str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+        parts.append(f'{name}="{value}"')
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+def _format_value(value) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class Counter:
+    """Счетчик с метками; увеличение - одна операция со словарем"""
+    __slots__ = ("name", "help", "labelnames", "_values")
+
+    def __init__(self, name: str, help: str, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+
+    def inc(self, *labels, amount: float = 1):
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self, lines: list):
+        lines.append(f"# HELP {self.name} {self.help}")
+        lines.append(f"# TYPE {self.name} counter")
+        for labels, value in self._values.items():
+            lines.append(f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}")
+
+class Histogram:
+    """Гистограмма с фиксированными корзинами"""
+    __slots__ = ("name", "help", "labelnames", "buckets", "_counts", "_sums")
+
+    def __init__(self, name: str, help: str, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._counts = {}  # метки -> счетчики по корзинам (последняя - +Inf)
+        self._sums = {}
+
+    def observe(self, value: float, *labels):
+        counts = self._counts.get(labels)
+        if counts is None:
+            counts = self._counts[labels] = [0] * (len(self.buckets) + 1)
+            self._sums[labels] = 0.0
+        counts[bisect.bisect_left(self.buckets, value)] += 1
+        self._sums[labels] += value
+
+    def render(self, lines: list):
+        lines.append(f"# HELP {self.name} {self.help}")
+        lines.append(f"# TYPE {self.name} histogram")
+        for labels, counts in self._counts.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {cumulative}")
+            label_text = _format_labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{label_text} {_format_value(self._sums[labels])}")
+            lines.append(f"{self.name}_count{label_text} {cumulative}")
+
+class Metrics:
+    """Реестр метрик в текстовом формате Prometheus
+
+    Счетчики и гистограммы обновляются в местах событий, значения
+    "на текущий момент" (очереди, открытые тикеты) собираются функциями
+    сбора только при запросе /metrics.
+    """
+    def __init__(self):
+        self._metrics = []
+        self._collectors = []  # функции, возвращающие [(имя, тип, описание, [(метки, значение)])]
+
+    def counter(self, name: str, help: str, labelnames=()) -> Counter:
+        metric = Counter(name, help, labelnames)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name: str, help: str, labelnames=(), buckets=LATENCY_BUCKETS) -> Histogram:
+        metric = Histogram(name, help, labelnames, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def add_collector(self, collector):
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            metric.render(lines)
+        for collector in self._collectors:
+            try:
+                families = collector()
+            except Exception as e:
+                print(f"❌ Ошибка сбора метрик: {e}")
+                continue
+            for name, kind, help, samples in families:
+                lines.append(f"# HELP {name} {help}")
+                lines.append(f"# TYPE {name} {kind}")
+                for labels, value in samples:
+                    lines.append(f"{name}{_format_labels(labels.keys(), labels.values())} {_format_value(value)}")
+        lines.append("")
+        return "\n".join(lines)
+
+metrics = get_metrics()
+
+INTERACTION_SECONDS = metrics.histogram(
+    "ticketbot_interaction_seconds",
+    "Длительность обработки взаимодействий (кнопки и команды)",
+    ("handler", "outcome")
+)
+INTERACTION_ACK_SECONDS = metrics.histogram(
+    "ticketbot_interaction_ack_seconds",
+    "Время от нажатия до подтверждения взаимодействия (лимит Discord - 3 с)",
+    ("handler",)
+)
+INTERACTION_REJECTED = metrics.counter(
+    "ticketbot_interaction_rejected_total",
+    "Нажатия, которые не удалось подтвердить или поставить в очередь",
+    ("handler", "reason")
+)
+REST_REQUESTS = metrics.counter(
+    "ticketbot_rest_requests_total",
+    "Запросы к API через планировщик",
+    ("route", "outcome")
+)
+REST_RATE_LIMITED = metrics.counter(
+    "ticketbot_rest_rate_limited_total",
+    "Ответы 429 по маршрутам",
+    ("route",)
+)
+SETTINGS_WRITE_SECONDS = metrics.histogram(
+    "ticketbot_settings_write_seconds",
+    "Длительность записи настроек серверов в хранилище"
+)
+GATEWAY_EVENTS = metrics.counter(
+    "ticketbot_gateway_events_total",
+    "События шлюза Discord по типам",
+    ("event",)
+)
+
+def route_method(route_key: str) -> str:
+    """Метод из ключа маршрута без ID, чтобы число рядов метрики не росло"""
+    return route_key.split(":", 1)[0]
+
+class MetricsCommandTree(app_commands.CommandTree):
+    """Дерево команд, замеряющее длительность слэш-команд"""
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        interaction.extras["metrics_started"] = time.perf_counter()
+        return True
+
+    async def on_error(self, interaction: discord.Interaction, error: app_commands.AppCommandError):
+        observe_command(interaction, "error")
+        await super().on_error(interaction, error)
+
+def observe_command(interaction: discord.Interaction, outcome: str):
+    """Запись длительности команды (вызывается по завершении или ошибке)"""
+    started = interaction.extras.pop("metrics_started", None)
+    if started is None or interaction.command is None:
+        return
+    INTERACTION_SECONDS.observe(time.perf_counter() - started, interaction.command.qualified_name, outcome)
+
+def register_bot_collectors(bot):
+    """Значения, которые снимаются с бота при каждом запросе /metrics"""
+    # Импорт здесь, чтобы избежать циклического импорта
+    from models.ticket_models import get_ticket_manager
+    from utils.channel_pool import get_channel_pool
+    from utils.deadline_scheduler import get_deadline_scheduler
+    from utils.interactions import get_interaction_pipeline
+    from utils.logger import get_ticket_logger
+    from utils.rest_scheduler import get_rest_scheduler
+
+    disk_usage = {"at": 0.0, "value": (0, 0), "running": False}
+    archive_usage = {"at": 0.0, "value": (0, 0), "running": False}
+
+    def collect():
+        ticket_manager = get_ticket_manager()
+        rest = get_rest_scheduler()
+
+        families = [
+            ("ticketbot_open_tickets", "gauge", "Открытые тикеты по серверам", [
+                ({"guild": guild_id}, count)
+                for guild_id, count in ticket_manager.open_counts_by_guild().items()
+            ]),
+            ("ticketbot_rest_queue_depth", "gauge", "Запросы в очереди планировщика по приоритетам", [
+                ({"priority": name}, depth) for name, depth in rest.queue_depth().items()
+            ]),
+            ("ticketbot_rest_active", "gauge", "Выполняющиеся запросы к API", [({}, rest.stats()["active"])]),
+            ("ticketbot_log_queue_depth", "gauge", "Записи лога, ожидающие отправки", [
+                ({}, get_ticket_logger(bot).queue_depth())
+            ]),
+            ("ticketbot_log_dropped_total", "counter", "Отброшенные записи лога", [
+                ({}, get_ticket_logger(bot).dropped)
+            ]),
+            ("ticketbot_interaction_queue_depth", "gauge", "Подтвержденные нажатия, ждущие обработки", [
+                ({}, get_interaction_pipeline().queue_depth())
+            ]),
+            ("ticketbot_deadlines_pending", "gauge", "Запланированные отложенные действия", [
+                ({}, get_deadline_scheduler().pending())
+            ]),
+            ("ticketbot_guilds", "gauge", "Серверы этого процесса", [({}, len(bot.guilds))])
+        ]
+
+        pool = get_channel_pool()
+        if pool.enabled:
+            families.append(("ticketbot_channel_pool_idle", "gauge", "Свободные каналы пула", [({}, pool.idle())]))
+            families.append(("ticketbot_channel_pool_acquires_total", "counter", "Выдача каналов из пула", [
+                ({"result": "hit"}, pool.hits), ({"result": "miss"}, pool.misses)
+            ]))
+
+        latencies = getattr(bot, "latencies", None) or [(0, bot.latency)]
+        families.append(("ticketbot_gateway_latency_seconds", "gauge", "Задержка шлюза по шардам", [
+            ({"shard": shard_id}, latency) for shard_id, latency in latencies if math.isfinite(latency)
+        ]))
+
+        spool = ticket_manager.transcripts
+        if spool is not None:
+            _refresh_disk_usage(disk_usage, spool.disk_usage)
+            files, size = disk_usage["value"]
+            families.append(("ticketbot_transcript_spool_bytes", "gauge", "Размер истории тикетов на диске", [
+                ({}, size)
+            ]))
+            families.append(("ticketbot_transcript_spool_files", "gauge", "Файлы истории тикетов", [({}, files)]))
+            families.append(("ticketbot_transcript_spool_pending", "gauge", "Записи истории, ожидающие записи на диск", [
+                ({}, spool.pending())
+            ]))
+
+        if ticket_manager.search is not None:
+            families.append(("ticketbot_search_index_pending", "gauge", "Сообщения, ожидающие записи в поисковый индекс", [
+                ({}, ticket_manager.search.pending())
+            ]))
+
+        archive = ticket_manager.archive
+        if archive is not None:
+            _refresh_disk_usage(archive_usage, archive.disk_usage)
+            tickets, size = archive_usage["value"]
+            families.append(("ticketbot_transcript_archive_bytes", "gauge", "Размер сжатого архива историй", [
+                ({}, size)
+            ]))
+            families.append(("ticketbot_transcript_archive_tickets", "gauge", "Истории в архиве", [
+                ({}, tickets)
+            ]))
+        return families
+
+    metrics.add_collector(collect)
+
+def _refresh_disk_usage(cache: dict, scan):
+    """Пересчет размера каталога не чаще DISK_USAGE_TTL
+
+    Обход каталога идет в потоке, а сбор метрик сразу отдает последнее
+    известное значение, чтобы скан не задерживал event loop.
+    """
+    if cache["running"] or time.monotonic() - cache["at"] < DISK_USAGE_TTL:
+        return
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        # Вне event loop считаем сразу
+        cache["value"] = scan()
+        cache["at"] = time.monotonic()
+        return
+
+    def done(future):
+        cache["running"] = False
+        cache["at"] = time.monotonic()
+        if not future.cancelled() and future.exception() is None:
+            cache["value"] = future.result()
+
+    cache["running"] = True
+    loop.run_in_executor(None, scan).add_done_callback(done)
+
+class MetricsServer:
+    """Локальный HTTP-сервер с метриками (GET /metrics)
+
+    Включается переменной METRICS_PORT; по умолчанию слушает только
+    127.0.0.1 (METRICS_HOST, чтобы открыть наружу).
+    """
+    def __init__(self, host: str, port: int):
+        self.host = host
+        self.port = port
+        self._runner = None
+
+    async def start(self):
+        from aiohttp import web
+
+        app = web.Application()
+        app.router.add_get("/metrics", self._handle)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.port).start()
+        print(f"📈 Метрики: http://{self.host}:{self.port}/metrics")
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def _handle(self, request):
+        from aiohttp import web
+        return web.Response(
+            body=metrics.render().encode("utf-8"),
+            headers={"Content-Type": "text/plain; version=0.0.4; charset=utf-8"}
+        )
+
+def metrics_server_from_env(cluster_id=None):
+    """Сервер метрик по METRICS_PORT/METRICS_HOST или None, если метрики выключены"""
+    port = os.getenv("METRICS_PORT")
+    if not port:
+        return None
+    # У процессов кластера соседние порты
+    return MetricsServer(os.getenv("METRICS_HOST", "127.0.0.1"), int(port) + (cluster_id or 0))
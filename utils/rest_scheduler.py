@@ -0,0 +1,245 @@
+import asyncio
+import contextvars
+import heapq
+import itertools
+import time
+import aiohttp
+import discord
+from utils.metrics import REST_REQUESTS, REST_RATE_LIMITED, route_method
+
+# Классы приоритета: чем меньше число, тем раньше выполняется запрос
+PRIORITY_INTERACTIVE = 0  # ответы на действия пользователей
+PRIORITY_CLEANUP = 1  # закрытие и удаление тикетов
+PRIORITY_LOGS = 2  # логи и прочие фоновые сообщения
+
+PRIORITY_NAMES = {
+    PRIORITY_INTERACTIVE: "interactive",
+    PRIORITY_CLEANUP: "cleanup",
+    PRIORITY_LOGS: "logs"
+}
+
+# Сколько запросов к API выполняется одновременно
+DEFAULT_CONCURRENCY = 8
+# Сколько слотов всегда оставлено для запросов пользователей
+RESERVED_INTERACTIVE = 2
+# Сколько раз повторять запрос после ответа 429
+MAX_RATE_LIMIT_RETRIES = 3
+
+_shared_scheduler = None
+
+# Маршрут запроса, который сейчас выполняет задача планировщика
+_current_route = contextvars.ContextVar("rest_route", default=None)
+
+def get_rest_scheduler():
+    """Общий для всего процесса планировщик запросов к API"""
+    global _shared_scheduler
+    if _shared_scheduler is None:
+        _shared_scheduler = RestScheduler()
+    return _shared_scheduler
+
+def route(method: str, major_id) -> str:
+    """Ключ маршрута для учета лимитов: метод + основной ID (канал или сервер)"""
+    return f"{method}:{major_id}"
+
+class _Job:
+    __slots__ = ("priority", "seq", "route", "factory", "future", "attempts")
+
+    def __init__(self, priority, seq, route, factory, future):
+        self.priority = priority
+        self.seq = seq
+        self.route = route
+        self.factory = factory
+        self.future = future
+        self.attempts = 0
+
+    def __lt__(self, other):
+        return (self.priority, self.seq) < (other.priority, other.seq)
+
+class RestScheduler:
+    """Планировщик изменяющих запросов к Discord API
+
+    Запросы выполняются по приоритету с ограничением параллельности. Часть
+    слотов всегда оставлена для пользовательских запросов, чтобы они не
+    ждали за уборкой и логами. Для каждого маршрута запоминается, до какого
+    момента он ограничен после ответа 429, и запросы этого маршрута ждут,
+    не занимая слоты других маршрутов.
+
+    Остаток лимита маршрута берется из заголовков X-RateLimit-* ответов
+    (trace_config() подключается к HTTP-клиенту бота): когда остаток
+    исчерпан, запросы маршрута ждут сброса, не дожидаясь ответа 429.
+
+    Чтобы discord.py возвращал длинные ограничения вместо ожидания внутри
+    запроса, у бота должен быть задан max_ratelimit_timeout.
+    """
+    def __init__(self, concurrency: int = DEFAULT_CONCURRENCY, reserved_interactive: int = RESERVED_INTERACTIVE):
+        self.concurrency = concurrency
+        self.reserved_interactive = min(reserved_interactive, concurrency - 1)
+
+        self._queue = []  # куча _Job
+        self._seq = itertools.count()
+        self._active = 0
+        self._blocked_until = {}  # route -> time.monotonic()
+        self._buckets = {}  # route -> [остаток запросов, время сброса по time.monotonic()]
+        self._wakeup = None
+
+        # Статистика
+        self.completed = 0
+        self.rate_limited = {}  # route -> количество ответов 429
+
+    async def run(self, route_key: str, factory, priority: int = PRIORITY_INTERACTIVE):
+        """Выполнение запроса через очередь
+
+        factory - функция без аргументов, возвращающая корутину запроса.
+        Возвращает результат запроса или пробрасывает его исключение.
+        """
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._queue, _Job(priority, next(self._seq), route_key, factory, future))
+        self._dispatch()
+        return await future
+
+    def observe_headers(self, headers):
+        """Учет остатка лимита из заголовков ответа на запрос текущего маршрута"""
+        route_key = _current_route.get()
+        if route_key is None:
+            return
+        try:
+            remaining = int(headers["X-RateLimit-Remaining"])
+            reset_after = float(headers["X-RateLimit-Reset-After"])
+        except (KeyError, TypeError, ValueError):
+            return
+        self._buckets[route_key] = [remaining, time.monotonic() + reset_after]
+
+    def trace_config(self) -> aiohttp.TraceConfig:
+        """Трассировка aiohttp для параметра http_trace бота: передает заголовки лимитов"""
+        async def on_request_end(session, context, params):
+            self.observe_headers(params.response.headers)
+
+        trace = aiohttp.TraceConfig()
+        trace.on_request_end.append(on_request_end)
+        return trace
+
+    def queue_depth(self) -> dict:
+        """Количество ожидающих запросов по классам приоритета"""
+        depth = {name: 0 for name in PRIORITY_NAMES.values()}
+        for job in self._queue:
+            depth[PRIORITY_NAMES.get(job.priority, str(job.priority))] += 1
+        return depth
+
+    def stats(self) -> dict:
+        """Состояние планировщика для диагностики"""
+        now = time.monotonic()
+        return {
+            "active": self._active,
+            "queued": self.queue_depth(),
+            "completed": self.completed,
+            "blocked_routes": sum(1 for until in self._blocked_until.values() if until > now),
+            "rate_limited": sum(self.rate_limited.values())
+        }
+
+    def _dispatch(self):
+        """Запуск запросов, для которых есть свободный слот и не ограничен маршрут"""
+        if not self._queue:
+            return
+        now = time.monotonic()
+        deferred = []
+        next_unblock = None
+
+        while self._queue and self._active < self.concurrency:
+            job = heapq.heappop(self._queue)
+            if job.future.cancelled():
+                continue
+
+            until = self._blocked_until.get(job.route)
+            if until is not None:
+                if until > now:
+                    deferred.append(job)
+                    next_unblock = until if next_unblock is None else min(next_unblock, until)
+                    continue
+                del self._blocked_until[job.route]
+
+            bucket = self._buckets.get(job.route)
+            if bucket is not None:
+                if bucket[1] <= now:
+                    del self._buckets[job.route]
+                    bucket = None
+                elif bucket[0] <= 0:
+                    deferred.append(job)
+                    next_unblock = bucket[1] if next_unblock is None else min(next_unblock, bucket[1])
+                    continue
+
+            # Фоновые запросы не занимают зарезервированные слоты
+            if job.priority > PRIORITY_INTERACTIVE and self._active >= self.concurrency - self.reserved_interactive:
+                deferred.append(job)
+                break
+
+            if bucket is not None:
+                bucket[0] -= 1
+            self._active += 1
+            asyncio.get_running_loop().create_task(self._execute(job))
+
+        for job in deferred:
+            heapq.heappush(self._queue, job)
+
+        if next_unblock is not None:
+            self._schedule_wakeup(next_unblock - now)
+
+    def _schedule_wakeup(self, delay: float):
+        loop = asyncio.get_running_loop()
+        when = loop.time() + max(delay, 0.0)
+        if self._wakeup is not None:
+            # Более раннее пробуждение остается: на нем снимется свое ограничение
+            if self._wakeup.when() <= when:
+                return
+            self._wakeup.cancel()
+        self._wakeup = loop.call_at(when, self._on_wakeup)
+
+    def _on_wakeup(self):
+        self._wakeup = None
+        self._dispatch()
+
+    async def _execute(self, job: _Job):
+        _current_route.set(job.route)
+        try:
+            result = await job.factory()
+        except discord.RateLimited as e:
+            self._on_rate_limited(job, e.retry_after, e)
+        except discord.HTTPException as e:
+            if e.status == 429:
+                self._on_rate_limited(job, _retry_after(e), e)
+            else:
+                REST_REQUESTS.inc(route_method(job.route), "error")
+                if not job.future.done():
+                    job.future.set_exception(e)
+        except BaseException as e:
+            if not job.future.done():
+                job.future.set_exception(e)
+            if not isinstance(e, Exception):
+                raise
+        else:
+            self.completed += 1
+            REST_REQUESTS.inc(route_method(job.route), "ok")
+            if not job.future.done():
+                job.future.set_result(result)
+        finally:
+            self._active -= 1
+            self._dispatch()
+
+    def _on_rate_limited(self, job: _Job, retry_after: float, error: Exception):
+        self.rate_limited[job.route] = self.rate_limited.get(job.route, 0) + 1
+        REST_RATE_LIMITED.inc(route_method(job.route))
+        until = time.monotonic() + retry_after
+        self._blocked_until[job.route] = max(self._blocked_until.get(job.route, 0), until)
+
+        job.attempts += 1
+        if job.attempts > MAX_RATE_LIMIT_RETRIES:
+            if not job.future.done():
+                job.future.set_exception(error)
+            return
+        # Возвращаем запрос в очередь с тем же местом, он выполнится после снятия ограничения
+        heapq.heappush(self._queue, job)
+
+def _retry_after(error: discord.HTTPException) -> float:
+    try:
+        return float(error.response.headers.get("Retry-After", 1.0))
+    except (AttributeError, TypeError, ValueError):
+        return 1.0
@@ -0,0 +1,54 @@
+import time
+
+_shared_timer = None
+
+def get_startup_timer():
+    """Общий для всего процесса замер времени запуска"""
+    global _shared_timer
+    if _shared_timer is None:
+        _shared_timer = StartupTimer()
+    return _shared_timer
+
+class StartupTimer:
+    """Замер этапов запуска бота
+
+    Этапы отмечаются по порядку через mark(), длительность этапа - время от
+    предыдущей отметки. Фоновые шаги (например, синхронизация команд)
+    записываются отдельно через record() и не сдвигают отметки.
+    """
+    def __init__(self, started_at: float = None):
+        self.started_at = started_at if started_at is not None else time.perf_counter()
+        self._last = self.started_at
+        self.phases = []  # (название, секунды)
+        self.background = []  # (название, секунды)
+        self._marked = set()
+
+    def begin(self, started_at: float):
+        """Начало отсчета (например, момент запуска процесса)"""
+        self.started_at = started_at
+        self._last = started_at
+
+    def mark(self, name: str, once: bool = True) -> bool:
+        """Отметка конца этапа; повторная отметка того же этапа игнорируется"""
+        if once and name in self._marked:
+            return False
+        now = time.perf_counter()
+        self.phases.append((name, now - self._last))
+        self._last = now
+        self._marked.add(name)
+        return True
+
+    def record(self, name: str, seconds: float):
+        self.background.append((name, seconds))
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started_at
+
+    def report(self) -> str:
+        lines = ["⏱️ Время запуска:"]
+        for name, seconds in self.phases:
+            lines.append(f"  {name}: {seconds * 1000:.0f} мс")
+        for name, seconds in self.background:
+            lines.append(f"  {name} (фоном): {seconds * 1000:.0f} мс")
+        lines.append(f"  Всего: {(self._last - self.started_at) * 1000:.0f} мс")
+        return "\n".join(lines)
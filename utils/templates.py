@@ -0,0 +1,113 @@
+import copy
+import discord
+from utils.config_handler import get_config_handler
+
+PANEL_FOOTER = "Нажмите кнопку ниже, чтобы создать тикет"
+WELCOME_TITLE = "📝 Тикет отзыва"
+WELCOME_FOOTER = "Администрация ответит вам в ближайшее время"
+PUBLISH_TITLE = "📢 Новый отзыв"
+PUBLISH_FOOTER = "Спасибо за ваш отзыв!"
+
+_shared_cache = None
+
+def get_template_cache():
+    """Общий для всего процесса кэш шаблонов сообщений"""
+    global _shared_cache
+    if _shared_cache is None:
+        _shared_cache = TemplateCache()
+    return _shared_cache
+
+class EmbedTemplate:
+    """Embed, собранный один раз; render() возвращает независимую копию
+
+    Шаблон хранится в виде словаря Embed.to_dict(), копия собирается через
+    Embed.from_dict. from_dict не копирует вложенные словари (автор,
+    подвал, поля), поэтому словарь копируется целиком и изменения копии
+    никогда не затрагивают шаблон.
+    """
+    __slots__ = ("_data",)
+
+    def __init__(self, embed: discord.Embed):
+        self._data = embed.to_dict()
+
+    def render(self) -> discord.Embed:
+        return discord.Embed.from_dict(copy.deepcopy(self._data))
+
+class GuildTemplates:
+    """Готовые embed и view сервера, собранные по его настройкам"""
+    __slots__ = ("settings", "panel_embed", "panel_view", "welcome_embed", "publish_embed")
+
+    def __init__(self, settings):
+        self.settings = settings
+
+        self.panel_embed = discord.Embed(
+            title=settings.ticket_title,
+            description=settings.ticket_subtitle,
+            color=settings.color
+        )
+        self.panel_embed.set_footer(text=PANEL_FOOTER)
+
+        # Импорт здесь чтобы избежать циклического импорта
+        from views.ticket_views import CreateTicketView
+        # Кнопка панели обрабатывается по шаблону custom_id, view не хранит
+        # состояния, поэтому один объект отправляется во все панели сервера
+        self.panel_view = CreateTicketView(settings.button_label)
+
+        welcome_embed = discord.Embed(
+            title=WELCOME_TITLE,
+            description=settings.ticket_message,
+            color=settings.color
+        )
+        welcome_embed.set_footer(text=WELCOME_FOOTER)
+        self.welcome_embed = EmbedTemplate(welcome_embed)
+
+        publish_embed = discord.Embed(title=PUBLISH_TITLE, color=settings.color)
+        publish_embed.set_footer(text=PUBLISH_FOOTER)
+        self.publish_embed = EmbedTemplate(publish_embed)
+
+class TemplateCache:
+    """Кэш embed и view панели, приветствия и публикации по серверам
+
+    Шаблоны собираются один раз; при каждом использовании шаблон копируется
+    и в копию добавляются только данные конкретного тикета (автор, время,
+    текст отзыва). Запись пересобирается, когда ConfigHandler заменяет
+    объект настроек сервера.
+    """
+    def __init__(self, config_handler=None):
+        self.config = config_handler or get_config_handler()
+        self._entries = {}  # guild_id -> GuildTemplates
+
+    def templates(self, guild_id) -> GuildTemplates:
+        settings = self.config.get_guild_settings(guild_id)
+        entry = self._entries.get(guild_id)
+        if entry is None or entry.settings is not settings:
+            entry = self._entries[guild_id] = GuildTemplates(settings)
+        return entry
+
+    def panel(self, guild_id):
+        """Embed и view панели создания тикетов (общие, не изменять)"""
+        entry = self.templates(guild_id)
+        return entry.panel_embed, entry.panel_view
+
+    def welcome(self, guild_id, user, created_at):
+        """Текст и embed приветствия в канале нового тикета"""
+        entry = self.templates(guild_id)
+        embed = entry.welcome_embed.render()
+        embed.add_field(name="👤 Автор", value=user.mention, inline=True)
+        embed.add_field(name="📅 Создан", value=discord.utils.format_dt(created_at, 'R'), inline=True)
+        return f"{user.mention}, {entry.settings.welcome_message}", embed
+
+    def publish(self, guild_id, description: str, timestamp, creator=None) -> discord.Embed:
+        """Embed опубликованного отзыва"""
+        embed = self.templates(guild_id).publish_embed.render()
+        embed.description = description
+        embed.timestamp = timestamp
+        if creator:
+            embed.set_author(
+                name=f"Отзыв от {creator.display_name}",
+                icon_url=creator.avatar.url if creator.avatar else None
+            )
+        return embed
+
+    def invalidate(self, guild_id):
+        self._entries.pop(guild_id, None)
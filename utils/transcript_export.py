@@ -0,0 +1,145 @@
+import asyncio
+import html
+import json
+import multiprocessing
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from storage.transcript_archive import read_archived
+from storage.transcript_spool import resolve_records
+
+EXPORT_FORMATS = ("html", "json")
+# Процессов рендеринга по умолчанию
+DEFAULT_WORKERS = 2
+
+_shared_exporter = None
+
+def get_transcript_exporter():
+    """Общий для всего процесса экспорт историй (TRANSCRIPT_EXPORT_WORKERS процессов)"""
+    global _shared_exporter
+    if _shared_exporter is None:
+        _shared_exporter = TranscriptExporter(int(os.getenv("TRANSCRIPT_EXPORT_WORKERS", str(DEFAULT_WORKERS))))
+    return _shared_exporter
+
+class TranscriptExporter:
+    """Рендеринг истории тикета в файл HTML или JSON в пуле процессов
+
+    История длиной в сотни тысяч сообщений рендерится заметное время; в
+    отдельном процессе это не задерживает события шлюза. Процесс читает
+    историю прямо с диска (сегмент архива или файл спула) и пишет результат
+    построчно во временный файл, который затем отправляется вложением.
+    Пул создается при первом экспорте.
+    """
+    def __init__(self, workers: int = DEFAULT_WORKERS):
+        self.workers = max(1, workers)
+        self._executor = None
+
+    async def export(self, ticket: dict, source: tuple, fmt: str) -> tuple:
+        """Файл экспорта и количество сообщений в нем
+
+        ticket и source - результат TicketManager.transcript_source.
+        Файл временный, после отправки его нужно удалить.
+        """
+        if fmt not in EXPORT_FORMATS:
+            raise ValueError(f"Неизвестный формат экспорта: {fmt}")
+        fd, path = tempfile.mkstemp(prefix=f"ticket-{ticket['channel_id']}-", suffix=f".{fmt}")
+        os.close(fd)
+        try:
+            messages = await asyncio.get_running_loop().run_in_executor(
+                self._get_executor(), render_transcript, source, path, fmt, ticket
+            )
+        except BaseException:
+            os.unlink(path)
+            raise
+        return Path(path), messages
+
+    def stop(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    def _get_executor(self):
+        if self._executor is None:
+            # spawn: fork при работающих потоках (логгер, пулы asyncio) копирует чужие блокировки
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._executor
+
+def iter_source(source: tuple):
+    """Сообщения истории по источнику из TicketManager.transcript_source"""
+    kind = source[0]
+    if kind == "archive":
+        return read_archived(*source[1:])
+    if kind == "spool":
+        return resolve_records(source[1])
+    raise ValueError(f"Неизвестный источник истории: {kind}")
+
+def render_transcript(source: tuple, output_path: str, fmt: str, ticket: dict) -> int:
+    """Запись истории в файл (выполняется в процессе пула)"""
+    records = iter_source(source)
+    with open(output_path, 'w', encoding='utf-8') as f:
+        if fmt == "json":
+            return _render_json(f, records, ticket)
+        return _render_html(f, records, ticket)
+
+def _render_json(f, records, ticket: dict) -> int:
+    f.write('{"ticket": ' + json.dumps(ticket, ensure_ascii=False) + ', "messages": [')
+    count = 0
+    for record in records:
+        f.write(("," if count else "") + "\n  " + json.dumps(record, ensure_ascii=False))
+        count += 1
+    f.write("\n]}\n")
+    return count
+
+HTML_HEAD = """<!DOCTYPE html>
+<html lang="ru">
+<head>
+<meta charset="utf-8">
+<title>{title}</title>
+<style>
+body {{ font-family: sans-serif; background: #313338; color: #dbdee1; margin: 2em; }}
+.ticket {{ color: #949ba4; margin-bottom: 1.5em; }}
+.message {{ padding: 0.4em 0; border-bottom: 1px solid #3f4147; }}
+.author {{ font-weight: bold; color: #f2f3f5; }}
+.creator .author {{ color: #5865f2; }}
+time {{ color: #949ba4; font-size: 0.8em; margin-left: 0.5em; }}
+.content {{ white-space: pre-wrap; word-wrap: break-word; margin-top: 0.2em; }}
+</style>
+</head>
+<body>
+<h1>{title}</h1>
+<div class="ticket">{details}</div>
+"""
+
+def _render_html(f, records, ticket: dict) -> int:
+    title = f"Тикет {ticket['channel_id']}"
+    details = [f"Автор: {ticket['creator_id']}", f"Создан: {_format_time(ticket.get('created_at'))}"]
+    if ticket.get("closed_at"):
+        details.append(f"Закрыт: {_format_time(ticket['closed_at'])}")
+    if ticket.get("published"):
+        details.append("Отзыв опубликован")
+    f.write(HTML_HEAD.format(title=html.escape(title), details=html.escape(" · ".join(details))))
+
+    creator_id = ticket["creator_id"]
+    count = 0
+    for record in records:
+        css = "message creator" if record["author_id"] == creator_id else "message"
+        f.write(
+            f'<div class="{css}"><span class="author">{record["author_id"]}</span>'
+            f'<time>{html.escape(_format_time(record.get("timestamp")))}</time>'
+            f'<div class="content">{html.escape(record.get("content") or "")}</div></div>\n'
+        )
+        count += 1
+    f.write(f'<p class="ticket">Сообщений: {count}</p>\n</body>\n</html>\n')
+    return count
+
+def _format_time(value) -> str:
+    if not value:
+        return ""
+    try:
+        return datetime.fromisoformat(value).strftime("%d.%m.%Y %H:%M:%S")
+    except ValueError:
+        return str(value)
@@ -0,0 +1,84 @@
+from datetime import datetime, timedelta, timezone
+import discord
+from discord import ui
+from storage.search_index import MAX_ROWID
+
+# Результатов на странице
+PAGE_SIZE = 10
+# Сколько секунд работают кнопки перехода по страницам
+SEARCH_VIEW_TIMEOUT = 600
+# Форматы дат в фильтрах поиска
+DATE_FORMATS = ("%d.%m.%Y", "%Y-%m-%d")
+
+def date_to_snowflake(value: str, end_of_day: bool = False) -> int:
+    """Граница ID сообщений для даты (UTC): начало дня или начало следующего дня"""
+    for date_format in DATE_FORMATS:
+        try:
+            date = datetime.strptime(value.strip(), date_format).replace(tzinfo=timezone.utc)
+            break
+        except ValueError:
+            continue
+    else:
+        raise ValueError(f"Неверная дата: {value}")
+    if end_of_day:
+        date += timedelta(days=1)
+    return discord.utils.time_snowflake(date)
+
+class SearchResultsView(ui.View):
+    """Страницы результатов поиска по сообщениям тикетов
+
+    Страница запрашивается из индекса при каждом переходе; хранятся только
+    границы уже открытых страниц (ID последнего сообщения предыдущей).
+    """
+    def __init__(self, search_index, guild_id: int, text: str, author_id: int = None,
+                 after_id: int = 0, before_id: int = MAX_ROWID):
+        super().__init__(timeout=SEARCH_VIEW_TIMEOUT)
+        self.search_index = search_index
+        self.guild_id = guild_id
+        self.text = text
+        self.author_id = author_id
+        self.after_id = after_id
+        self.page = 0
+        self.results = []
+        self._bounds = [before_id]  # верхняя граница ID для каждой страницы
+
+    async def load(self):
+        """Загрузка текущей страницы"""
+        rows = await self.search_index.search(
+            self.guild_id, self.text, self.author_id, self.after_id, self._bounds[self.page], PAGE_SIZE + 1
+        )
+        has_next = len(rows) > PAGE_SIZE
+        self.results = rows[:PAGE_SIZE]
+        if has_next and len(self._bounds) == self.page + 1:
+            self._bounds.append(self.results[-1]["id"])
+        self.previous_page.disabled = self.page == 0
+        self.next_page.disabled = not has_next
+
+    def embed(self) -> discord.Embed:
+        embed = discord.Embed(title=f"🔎 Поиск: {self.text[:200]}", color=discord.Color.blue())
+        if not self.results:
+            embed.description = "Ничего не найдено" if self.page == 0 else "Больше результатов нет"
+            return embed
+
+        lines = []
+        for number, row in enumerate(self.results, start=self.page * PAGE_SIZE + 1):
+            sent_at = discord.utils.format_dt(discord.utils.snowflake_time(row["id"]), 'f')
+            lines.append(
+                f"**{number}.** <@{row['author_id']}> • тикет `{row['channel_id']}` • {sent_at}\n{row['snippet']}"
+            )
+        embed.description = "\n\n".join(lines)[:4096]
+        embed.set_footer(text=f"Страница {self.page + 1} • история тикета: /ticket_transcript")
+        return embed
+
+    @ui.button(label="◀️ Назад", style=discord.ButtonStyle.secondary)
+    async def previous_page(self, interaction: discord.Interaction, button: ui.Button):
+        self.page = max(0, self.page - 1)
+        await self.load()
+        await interaction.response.edit_message(embed=self.embed(), view=self)
+
+    @ui.button(label="Вперед ▶️", style=discord.ButtonStyle.secondary)
+    async def next_page(self, interaction: discord.Interaction, button: ui.Button):
+        if self.page + 1 < len(self._bounds):
+            self.page += 1
+        await self.load()
+        await interaction.response.edit_message(embed=self.embed(), view=self)
@@ -1,6 +1,5 @@
 import discord
 from discord import ui
-from utils.config_handler import ConfigHandler
 
 class SetupView(ui.View):
     """Основное меню настройки"""
@@ -22,27 +21,27 @@ class SetupView(ui.View):
         
         embed = discord.Embed(
             title="⚙️ Текущие настройки",
-            color=discord.Color.from_str(settings.get("embed_color", "#3498db"))
+            color=settings.color
         )
         
         # Основные настройки
         embed.add_field(
             name="🔧 Основные",
-            value=f"**Категория тикетов:** {self._format_channel(settings.get('ticket_category_id'), interaction.guild)}\n"
-                  f"**Категория закрытых:** {self._format_channel(settings.get('closed_category_id'), interaction.guild)}\n"
-                  f"**Канал логов:** {self._format_channel(settings.get('log_channel_id'), interaction.guild)}\n"
-                  f"**Канал публикации:** {self._format_channel(settings.get('publish_channel_id'), interaction.guild)}\n"
-                  f"**Роль админа:** {settings.get('admin_role_name', 'Admin')}",
+            value=f"**Категория тикетов:** {self._format_channel(settings.ticket_category_id, interaction.guild)}\n"
+                  f"**Категория закрытых:** {self._format_channel(settings.closed_category_id, interaction.guild)}\n"
+                  f"**Канал логов:** {self._format_channel(settings.log_channel_id, interaction.guild)}\n"
+                  f"**Канал публикации:** {self._format_channel(settings.publish_channel_id, interaction.guild)}\n"
+                  f"**Роль админа:** {settings.admin_role_name}",
             inline=False
         )
         
         # Настройки интерфейса
         embed.add_field(
             name="🎨 Интерфейс",
-            value=f"**Заголовок:** {settings.get('ticket_title', 'Оставьте свой отзыв')}\n"
-                  f"**Подзаголовок:** {settings.get('ticket_subtitle', 'С вами мы становимся лучше')}\n"
-                  f"**Текст кнопки:** {settings.get('button_label', 'Оставить отзыв')}\n"
-                  f"**Цвет:** {settings.get('embed_color', '#3498db')}",
+            value=f"**Заголовок:** {settings.ticket_title}\n"
+                  f"**Подзаголовок:** {settings.ticket_subtitle}\n"
+                  f"**Текст кнопки:** {settings.button_label}\n"
+                  f"**Цвет:** {settings.embed_color}",
             inline=False
         )
         
@@ -50,27 +49,10 @@ class SetupView(ui.View):
     
     @ui.button(label="📝 Создать панель", style=discord.ButtonStyle.primary, emoji="📝")
     async def create_panel(self, interaction: discord.Interaction, button: ui.Button):
-        settings = self.config.get_guild_settings(interaction.guild.id)
-        
-        embed = discord.Embed(
-            title=settings.get("ticket_title", "Оставьте свой отзыв"),
-            description=settings.get("ticket_subtitle", "С вами мы становимся лучше"),
-            color=discord.Color.from_str(settings.get("embed_color", "#3498db"))
-        )
-        
-        embed.set_footer(text="Нажмите кнопку ниже, чтобы создать тикет")
-        
-        # Создание View для создания тикетов
-        from views.ticket_views import CreateTicketView
-        from models.ticket_models import TicketManager
-        
-        ticket_manager = TicketManager()
-        create_view = CreateTicketView(self.config, ticket_manager)
+        # Embed и View панели собираются один раз на настройки сервера
+        from utils.templates import get_template_cache
         
-        # Обновляем текст кнопки
-        for child in create_view.children:
-            if child.custom_id == "create_ticket_button":
-                child.label = settings.get("button_label", "Оставить отзыв")
+        embed, create_view = get_template_cache().panel(interaction.guild.id)
         
         await interaction.response.send_message(embed=embed, view=create_view)
     
@@ -144,7 +126,12 @@ class MainSettingsModal(ui.Modal, title="Основные настройки"):
         
         updated_settings["admin_role_name"] = self.admin_role.value
         
-        self.config.update_guild_settings(self.guild_id, **updated_settings)
+        # Некорректные значения отклоняются сразу, а не при нажатии кнопок
+        try:
+            self.config.update_guild_settings(self.guild_id, **updated_settings)
+        except ValueError as e:
+            await interaction.response.send_message(f"❌ {e}", ephemeral=True)
+            return
         
         await interaction.response.send_message(
             "✅ Основные настройки обновлены!",
@@ -162,7 +149,7 @@ class InterfaceSettingsModal(ui.Modal, title="Настройка интерфе
         self.ticket_title = ui.TextInput(
             label="Заголовок тикета",
             placeholder="Оставьте свой отзыв",
-            default=current_settings.get("ticket_title", "Оставьте свой отзыв"),
+            default=current_settings.ticket_title,
             required=True
         )
         self.add_item(self.ticket_title)
@@ -170,7 +157,7 @@ class InterfaceSettingsModal(ui.Modal, title="Настройка интерфе
         self.ticket_subtitle = ui.TextInput(
             label="Подзаголовок",
             placeholder="С вами мы становимся лучше",
-            default=current_settings.get("ticket_subtitle", "С вами мы становимся лучше"),
+            default=current_settings.ticket_subtitle,
             required=True
         )
         self.add_item(self.ticket_subtitle)
@@ -178,7 +165,7 @@ class InterfaceSettingsModal(ui.Modal, title="Настройка интерфе
         self.button_label = ui.TextInput(
             label="Текст на кнопке",
             placeholder="Оставить отзыв",
-            default=current_settings.get("button_label", "Оставить отзыв"),
+            default=current_settings.button_label,
             required=True
         )
         self.add_item(self.button_label)
@@ -186,7 +173,7 @@ class InterfaceSettingsModal(ui.Modal, title="Настройка интерфе
         self.embed_color = ui.TextInput(
             label="Цвет embed (HEX)",
             placeholder="#3498db",
-            default=current_settings.get("embed_color", "#3498db"),
+            default=current_settings.embed_color,
             required=True
         )
         self.add_item(self.embed_color)
@@ -199,7 +186,11 @@ class InterfaceSettingsModal(ui.Modal, title="Настройка интерфе
             "embed_color": self.embed_color.value
         }
         
-        self.config.update_guild_settings(self.guild_id, **updated_settings)
+        try:
+            self.config.update_guild_settings(self.guild_id, **updated_settings)
+        except ValueError as e:
+            await interaction.response.send_message(f"❌ {e}", ephemeral=True)
+            return
         
         await interaction.response.send_message(
             "✅ Настройки интерфейса обновлены!",
@@ -1,34 +1,70 @@
 import discord
 from discord import ui
-import asyncio
-from utils.config_handler import ConfigHandler
-from models.ticket_models import TicketManager
+from utils.channel_pool import get_channel_pool
+from utils.config_handler import get_config_handler
+from utils.deadline_scheduler import get_deadline_scheduler
+from utils.guild_cache import get_guild_cache
+from utils.logger import get_ticket_logger
+from utils.interactions import get_interaction_pipeline, respond
+from utils.templates import get_template_cache
+from utils.rest_scheduler import get_rest_scheduler, route, PRIORITY_CLEANUP
+from models.ticket_models import get_ticket_manager, STATUS_OPEN, STATUS_CLOSED, STATUS_DELETED
 
-class CreateTicketView(ui.View):
-    """View для создания тикета"""
-    def __init__(self, config_handler, ticket_manager):
-        super().__init__(timeout=None)
-        self.config = config_handler
-        self.ticket_manager = ticket_manager
+# Максимальная длина описания embed в Discord
+EMBED_DESCRIPTION_LIMIT = 4096
+# Сообщений на страницу и максимум страниц при дочитывании пропуска в истории
+HISTORY_PAGE_SIZE = 100
+HISTORY_MAX_PAGES = 50
+# Префикс имени закрытого канала
+CLOSED_PREFIX = "закрыто-"
+# Задержки закрытия тикета и удаления закрытого канала (в секундах)
+PUBLISH_CLOSE_DELAY = 5
+CLOSE_DELAY = 3
+CLOSED_CHANNEL_TTL = 60
+
+# custom_id кнопок. Состояние не хранится во view: ID создателя записан
+# в custom_id кнопки публикации, остальное берется из хранилища тикетов.
+# Шаблоны совпадают и с фиксированными custom_id старых сообщений.
+CREATE_TICKET_ID = "create_ticket_button"
+CLOSE_TICKET_ID = "close_ticket"
+PUBLISH_TICKET_TEMPLATE = r"publish_ticket(?::(?P<creator_id>[0-9]+))?"
+
+class CreateTicketButton(ui.DynamicItem[ui.Button], template=CREATE_TICKET_ID):
+    """Кнопка создания тикета на панели"""
+    def __init__(self, label: str = "Оставить отзыв"):
+        super().__init__(ui.Button(
+            label=label,
+            style=discord.ButtonStyle.primary,
+            custom_id=CREATE_TICKET_ID,
+            emoji="📝"
+        ))
+    
+    @classmethod
+    async def from_custom_id(cls, interaction: discord.Interaction, item: ui.Button, match):
+        return cls(item.label)
     
-    @ui.button(label="Оставить отзыв", style=discord.ButtonStyle.primary, custom_id="create_ticket_button", emoji="📝")
-    async def create_ticket(self, interaction: discord.Interaction, button: ui.Button):
+    async def callback(self, interaction: discord.Interaction):
+        # Нажатие подтверждается сразу, работа идет в пуле обработчиков
+        return await get_interaction_pipeline().handle(
+            interaction, "create_ticket", lambda: self.create_ticket(interaction), ephemeral=True, thinking=True
+        )
+    
+    async def create_ticket(self, interaction: discord.Interaction):
+        ticket_manager = get_ticket_manager()
+        
         # Проверка на наличие активного тикета
-        if self.ticket_manager.user_has_active_ticket(interaction.user.id, interaction.guild.id):
-            await interaction.response.send_message(
+        if ticket_manager.user_has_active_ticket(interaction.user.id, interaction.guild.id):
+            await respond(
+                interaction,
                 "❌ У вас уже есть активный тикет! Дождитесь его закрытия.",
                 ephemeral=True
             )
             return
         
-        # Получение настроек сервера
-        settings = self.config.get_guild_settings(interaction.guild.id)
+        guild_cache = get_guild_cache()
         
         # Создание канала тикета
-        category_id = settings.get("ticket_category_id")
-        category = None
-        if category_id:
-            category = discord.utils.get(interaction.guild.categories, id=int(category_id))
+        category = guild_cache.category(interaction.guild, "ticket_category_id")
         
         # Настройка прав доступа
         overwrites = {
@@ -42,8 +78,7 @@ class CreateTicketView(ui.View):
         }
         
         # Добавление прав для админов
-        admin_role_name = settings.get("admin_role_name", "Admin")
-        admin_role = discord.utils.get(interaction.guild.roles, name=admin_role_name)
+        admin_role = guild_cache.admin_role(interaction.guild)
         if admin_role:
             overwrites[admin_role] = discord.PermissionOverwrite(
                 view_channel=True,
@@ -54,57 +89,61 @@ class CreateTicketView(ui.View):
                 attach_files=True
             )
         
-        # Создание канала
+        # Создание канала и записи о тикете. Повторные нажатия (двойной клик,
+        # задержка клиента) не создают второй канал, а ждут это же создание
         channel_name = f"отзыв-{interaction.user.name[:15]}"
         try:
-            ticket_channel = await interaction.guild.create_text_channel(
-                name=channel_name,
-                category=category,
-                overwrites=overwrites,
-                topic=f"Отзыв от {interaction.user.name} | ID: {interaction.user.id}"
+            ticket, ticket_channel = await ticket_manager.create_ticket_once(
+                interaction.user.id,
+                interaction.guild.id,
+                lambda: _open_ticket_channel(
+                    interaction.guild,
+                    channel_name,
+                    category,
+                    overwrites,
+                    f"Отзыв от {interaction.user.name} | ID: {interaction.user.id}"
+                )
             )
         except Exception as e:
-            await interaction.response.send_message(
+            await respond(
+                interaction,
                 f"❌ Ошибка при создании тикета: {e}",
                 ephemeral=True
             )
             return
         
-        # Создание записи о тикете
-        ticket = self.ticket_manager.create_ticket(
-            ticket_channel.id,
-            interaction.user.id,
-            interaction.guild.id
-        )
+        if ticket_channel is None:
+            # Канал создан параллельным нажатием того же пользователя
+            await respond(
+                interaction,
+                f"✅ Тикет создан: <#{ticket.channel_id}>",
+                ephemeral=True
+            )
+            return
         
-        # Отправка приветственного сообщения
-        embed_color = discord.Color.from_str(settings.get("embed_color", "#3498db"))
-        embed = discord.Embed(
-            title="📝 Тикет отзыва",
-            description=settings.get("ticket_message", "Пожалуйста, напишите ваш отзыв здесь."),
-            color=embed_color
-        )
-        embed.add_field(name="👤 Автор", value=interaction.user.mention, inline=True)
-        embed.add_field(name="📅 Создан", value=discord.utils.format_dt(interaction.created_at, 'R'), inline=True)
-        embed.set_footer(text="Администрация ответит вам в ближайшее время")
+        # Отправка приветственного сообщения (из шаблона сервера)
+        content, embed = get_template_cache().welcome(interaction.guild.id, interaction.user, interaction.created_at)
         
         # View для управления тикетом (виден только админам)
-        control_view = TicketControlView(self.config, self.ticket_manager, ticket.creator_id)
+        control_view = TicketControlView(ticket.creator_id)
         
-        await ticket_channel.send(
-            content=f"{interaction.user.mention}, {settings.get('welcome_message', 'добро пожаловать!')}",
-            embed=embed,
-            view=control_view
+        await get_rest_scheduler().run(
+            route("send_message", ticket_channel.id),
+            lambda: ticket_channel.send(
+                content=content,
+                embed=embed,
+                view=control_view
+            )
         )
         
-        await interaction.response.send_message(
+        await respond(
+            interaction,
             f"✅ Тикет создан: {ticket_channel.mention}",
             ephemeral=True
         )
         
         # Логирование
-        from utils.logger import TicketLogger
-        logger = TicketLogger(interaction.client)
+        logger = get_ticket_logger(interaction.client)
         await logger.log_action(
             interaction.guild,
             "Тикет создан",
@@ -113,81 +152,97 @@ class CreateTicketView(ui.View):
             channel=ticket_channel
         )
 
-class TicketControlView(ui.View):
-    """View для управления тикетом (только для админов)"""
-    def __init__(self, config_handler, ticket_manager, creator_id):
-        super().__init__(timeout=None)
-        self.config = config_handler
-        self.ticket_manager = ticket_manager
+class PublishTicketButton(ui.DynamicItem[ui.Button], template=PUBLISH_TICKET_TEMPLATE):
+    """Кнопка публикации отзыва, ID создателя тикета хранится в custom_id"""
+    def __init__(self, creator_id: int = None):
+        custom_id = f"publish_ticket:{creator_id}" if creator_id else "publish_ticket"
+        super().__init__(ui.Button(
+            label="✅ Опубликовать",
+            style=discord.ButtonStyle.success,
+            custom_id=custom_id,
+            emoji="📢"
+        ))
         self.creator_id = creator_id
     
-    @ui.button(label="✅ Опубликовать", style=discord.ButtonStyle.success, custom_id="publish_ticket", emoji="📢")
-    async def publish_ticket(self, interaction: discord.Interaction, button: ui.Button):
+    @classmethod
+    async def from_custom_id(cls, interaction: discord.Interaction, item: ui.Button, match):
+        creator_id = match["creator_id"]
+        return cls(int(creator_id) if creator_id else None)
+    
+    async def callback(self, interaction: discord.Interaction):
+        # Нажатие подтверждается сразу, работа идет в пуле обработчиков
+        return await get_interaction_pipeline().handle(
+            interaction, "publish_ticket", lambda: self.publish(interaction)
+        )
+    
+    async def publish(self, interaction: discord.Interaction):
         # Проверка прав (админ или создатель тикета)
-        if not await self._check_admin_permissions(interaction):
+        if not await _check_admin_permissions(interaction):
             return
         
+        ticket_manager = get_ticket_manager()
+        
         # Получение истории сообщений
-        ticket = self.ticket_manager.get_ticket(interaction.channel.id)
+        ticket = ticket_manager.get_ticket(interaction.channel.id)
         if not ticket:
-            await interaction.response.send_message("❌ Тикет не найден!", ephemeral=True)
+            await respond(interaction, "❌ Тикет не найден!", ephemeral=True)
+            return
+        
+        if not ticket.is_open:
+            await respond(interaction, "❌ Тикет уже закрывается!", ephemeral=True)
             return
         
+        # В сообщениях старого формата ID создателя нет в custom_id
+        creator_id = self.creator_id or ticket.creator_id
+        
         # Получение всех сообщений от создателя
-        creator_messages = []
-        async for message in interaction.channel.history(limit=200, oldest_first=True):
-            if message.author.id == self.creator_id and message.content and not message.author.bot:
-                creator_messages.append(message.content)
+        creator_messages = await _collect_creator_messages(interaction.channel, ticket, creator_id)
         
         if not creator_messages:
-            await interaction.response.send_message("❌ Не найдено сообщений для публикации!", ephemeral=True)
+            await respond(interaction, "❌ Не найдено сообщений для публикации!", ephemeral=True)
             return
         
         # Получение настроек
-        settings = self.config.get_guild_settings(interaction.guild.id)
-        publish_channel_id = settings.get("publish_channel_id")
-        
-        if not publish_channel_id:
-            await interaction.response.send_message("❌ Канал для публикации не настроен!", ephemeral=True)
+        settings = get_config_handler().get_guild_settings(interaction.guild.id)
+        if not settings.publish_channel_id:
+            await respond(interaction, "❌ Канал для публикации не настроен!", ephemeral=True)
             return
         
-        publish_channel = interaction.guild.get_channel(int(publish_channel_id))
+        publish_channel = get_guild_cache().channel(interaction.guild, "publish_channel_id")
         if not publish_channel:
-            await interaction.response.send_message("❌ Канал для публикации не найден!", ephemeral=True)
+            await respond(interaction, "❌ Канал для публикации не найден!", ephemeral=True)
             return
         
-        # Получение информации о создателе
-        creator = await interaction.guild.fetch_member(self.creator_id)
+        # Получение информации о создателе (из кэша, запрос к API только при промахе)
+        creator = interaction.guild.get_member(creator_id)
+        if creator is None:
+            try:
+                creator = await interaction.guild.fetch_member(creator_id)
+            except discord.HTTPException:
+                creator = None
         
         # Создание embed для публикации
-        embed_color = discord.Color.from_str(settings.get("embed_color", "#3498db"))
-        publish_embed = discord.Embed(
-            title="📢 Новый отзыв",
-            description="\n\n".join(creator_messages),
-            color=embed_color,
-            timestamp=interaction.created_at
+        publish_embed = get_template_cache().publish(
+            interaction.guild.id,
+            "\n\n".join(creator_messages)[:EMBED_DESCRIPTION_LIMIT],
+            interaction.created_at,
+            creator
         )
         
-        if creator:
-            publish_embed.set_author(
-                name=f"Отзыв от {creator.display_name}",
-                icon_url=creator.avatar.url if creator.avatar else None
-            )
-        
-        publish_embed.set_footer(text="Спасибо за ваш отзыв!")
-        
         # Публикация отзыва
         try:
-            await publish_channel.send(embed=publish_embed)
+            await get_rest_scheduler().run(
+                route("send_message", publish_channel.id),
+                lambda: publish_channel.send(embed=publish_embed)
+            )
             
             # Обновление статуса тикета
-            ticket.publish()
+            ticket_manager.publish_ticket(ticket.channel_id)
             
-            await interaction.response.send_message("✅ Отзыв опубликован! Тикет будет закрыт через 5 секунд...")
+            await respond(interaction, "✅ Отзыв опубликован! Тикет будет закрыт через 5 секунд...")
             
             # Логирование
-            from utils.logger import TicketLogger
-            logger = TicketLogger(interaction.client)
+            logger = get_ticket_logger(interaction.client)
             await logger.log_action(
                 interaction.guild,
                 "Отзыв опубликован",
@@ -198,23 +253,49 @@ class TicketControlView(ui.View):
             )
             
             # Закрытие тикета через 5 секунд
-            await asyncio.sleep(5)
-            await self._close_ticket(interaction.channel)
+            schedule_ticket_close(interaction.channel, PUBLISH_CLOSE_DELAY)
             
         except Exception as e:
-            await interaction.response.send_message(f"❌ Ошибка при публикации: {e}", ephemeral=True)
+            await respond(interaction, f"❌ Ошибка при публикации: {e}", ephemeral=True)
+
+class CloseTicketButton(ui.DynamicItem[ui.Button], template=CLOSE_TICKET_ID):
+    """Кнопка закрытия тикета без публикации"""
+    def __init__(self):
+        super().__init__(ui.Button(
+            label="❌ Закрыть",
+            style=discord.ButtonStyle.danger,
+            custom_id=CLOSE_TICKET_ID,
+            emoji="🔒"
+        ))
     
-    @ui.button(label="❌ Закрыть", style=discord.ButtonStyle.danger, custom_id="close_ticket", emoji="🔒")
-    async def close_ticket(self, interaction: discord.Interaction, button: ui.Button):
+    @classmethod
+    async def from_custom_id(cls, interaction: discord.Interaction, item: ui.Button, match):
+        return cls()
+    
+    async def callback(self, interaction: discord.Interaction):
+        # Нажатие подтверждается сразу, работа идет в пуле обработчиков
+        return await get_interaction_pipeline().handle(
+            interaction, "close_ticket", lambda: self.close(interaction)
+        )
+    
+    async def close(self, interaction: discord.Interaction):
         # Проверка прав
-        if not await self._check_admin_permissions(interaction):
+        if not await _check_admin_permissions(interaction):
+            return
+        
+        ticket_manager = get_ticket_manager()
+        
+        # Повторное нажатие не должно снова запускать закрытие
+        ticket = ticket_manager.get_ticket(interaction.channel.id)
+        if ticket and not ticket.is_open:
+            await respond(interaction, "❌ Тикет уже закрывается!", ephemeral=True)
             return
+        ticket_manager.close_ticket(interaction.channel.id)
         
-        await interaction.response.send_message("🔒 Тикет будет закрыт через 3 секунды...")
+        await respond(interaction, "🔒 Тикет будет закрыт через 3 секунды...")
         
         # Логирование
-        from utils.logger import TicketLogger
-        logger = TicketLogger(interaction.client)
+        logger = get_ticket_logger(interaction.client)
         await logger.log_action(
             interaction.guild,
             "Тикет закрыт",
@@ -223,58 +304,195 @@ class TicketControlView(ui.View):
             channel=interaction.channel
         )
         
-        await asyncio.sleep(3)
-        await self._close_ticket(interaction.channel)
+        schedule_ticket_close(interaction.channel, CLOSE_DELAY)
+
+# Кнопки, которые регистрируются у бота при запуске (bot.add_dynamic_items)
+DYNAMIC_ITEMS = (CreateTicketButton, PublishTicketButton, CloseTicketButton)
+
+class CreateTicketView(ui.View):
+    """View для создания тикета"""
+    def __init__(self, button_label: str = "Оставить отзыв"):
+        super().__init__(timeout=None)
+        self.add_item(CreateTicketButton(button_label))
+
+class TicketControlView(ui.View):
+    """View для управления тикетом (только для админов)"""
+    def __init__(self, creator_id: int):
+        super().__init__(timeout=None)
+        self.add_item(PublishTicketButton(creator_id))
+        self.add_item(CloseTicketButton())
+
+async def _collect_creator_messages(channel, ticket, creator_id) -> list:
+    """Сообщения создателя из сохраненной истории тикета
     
-    async def _check_admin_permissions(self, interaction: discord.Interaction) -> bool:
-        """Проверка прав пользователя"""
-        settings = self.config.get_guild_settings(interaction.guild.id)
-        admin_role_name = settings.get("admin_role_name", "Admin")
-        admin_role = discord.utils.get(interaction.guild.roles, name=admin_role_name)
-        
-        has_permission = (
-            interaction.user.guild_permissions.administrator or
-            (admin_role and admin_role in interaction.user.roles)
-        )
-        
-        if not has_permission:
-            await interaction.response.send_message(
-                "❌ У вас нет прав для управления тикетами!",
-                ephemeral=True
-            )
-            return False
-        
-        return True
+    Канал запрашивается у API только если в истории есть пропуск
+    (например, бот был выключен): пропуск дочитывается страницами до
+    последнего сообщения канала, но не больше HISTORY_MAX_PAGES страниц.
+    """
+    ticket_manager = get_ticket_manager()
+    creator_messages = []
+    length = 0
+    last_captured_id = None
     
-    async def _close_ticket(self, channel):
-        """Закрытие тикета"""
-        ticket = self.ticket_manager.get_ticket(channel.id)
-        if ticket:
-            ticket.close()
-        
-        # Перемещение в категорию закрытых тикетов (если настроена)
-        settings = self.config.get_guild_settings(channel.guild.id)
-        closed_category_id = settings.get("closed_category_id")
+    def collect(content):
+        nonlocal length
+        # Описание embed ограничено, дальше собирать нет смысла
+        if content and length < EMBED_DESCRIPTION_LIMIT:
+            creator_messages.append(content)
+            length += len(content) + 2
+    
+    async for record in ticket_manager.iter_transcript(channel.id):
+        last_captured_id = record.get("id") or last_captured_id
+        if record["author_id"] == creator_id:
+            collect(record["content"])
+    
+    # Пропуск: в канале есть сообщения новее последнего увиденного ботом
+    if ticket.last_message_id is None or channel.last_message_id != ticket.last_message_id:
+        target_id = channel.last_message_id
+        after_id = last_captured_id
+        reached = False
+        for _ in range(HISTORY_MAX_PAGES):
+            after = discord.Object(id=after_id) if after_id else None
+            fetched = 0
+            async for message in channel.history(limit=HISTORY_PAGE_SIZE, after=after, oldest_first=True):
+                fetched += 1
+                after_id = message.id
+                if message.author.bot:
+                    continue
+                ticket_manager.add_message(
+                    channel.id, message.author.id, message.content, message.created_at, message.id
+                )
+                if message.author.id == creator_id:
+                    collect(message.content)
+            # Неполная страница - сообщений в канале больше нет
+            if fetched < HISTORY_PAGE_SIZE or (target_id is not None and after_id >= target_id):
+                reached = True
+                break
         
-        if closed_category_id:
-            closed_category = discord.utils.get(channel.guild.categories, id=int(closed_category_id))
-            if closed_category:
-                try:
-                    await channel.edit(category=closed_category, name=f"закрыто-{channel.name}")
-                    
-                    # Удаление прав на отправку сообщений
-                    overwrites = channel.overwrites
-                    for target, overwrite in overwrites.items():
-                        if isinstance(target, discord.Member) and target.id != channel.guild.me.id:
-                            overwrite.send_messages = False
-                            await channel.set_permissions(target, overwrite=overwrite)
-                    
-                    await asyncio.sleep(60)  # Даем время для просмотра
-                    await channel.delete()
-                    
-                except:
-                    pass
-            else:
-                await channel.delete()
+        if reached:
+            ticket_manager.mark_seen(channel.id, target_id)
         else:
-            await channel.delete()
\ No newline at end of file
+            # Остаток пропуска дочитается при следующем обращении
+            ticket_manager.mark_seen(channel.id, after_id)
+            print(
+                f"⚠️ История тикета {channel.id} дочитана не полностью: "
+                f"{HISTORY_MAX_PAGES * HISTORY_PAGE_SIZE} сообщений, остановились на {after_id}"
+            )
+    
+    return creator_messages
+
+async def _open_ticket_channel(guild, name, category, overwrites, topic):
+    """Канал для нового тикета: свободный из пула или новый"""
+    pool = get_channel_pool()
+    channel = pool.acquire(guild, category)
+    if channel is not None:
+        # Одно изменение вместо создания канала
+        try:
+            await get_rest_scheduler().run(
+                route("edit_channel", channel.id),
+                lambda: channel.edit(name=name, overwrites=overwrites, topic=topic)
+            )
+            return channel
+        except discord.NotFound:
+            pass
+        except Exception:
+            pool.release(channel)
+        except BaseException:
+            # Обработчик отменен (или истек таймаут) посреди изменения:
+            # канал удаляется в фоне, иначе он потерялся бы для пула
+            pool.retire(channel)
+            raise
+    
+    return await get_rest_scheduler().run(
+        route("create_channel", guild.id),
+        lambda: guild.create_text_channel(name=name, category=category, overwrites=overwrites, topic=topic)
+    )
+
+async def _check_admin_permissions(interaction: discord.Interaction) -> bool:
+    """Проверка прав пользователя"""
+    if not get_guild_cache().is_admin(interaction.user):
+        await respond(
+            interaction,
+            "❌ У вас нет прав для управления тикетами!",
+            ephemeral=True
+        )
+        return False
+    
+    return True
+
+def schedule_ticket_close(channel, delay: float):
+    """Планирование закрытия тикета (выполнится и после перезапуска бота)"""
+    payload = {"channel_id": channel.id, "guild_id": channel.guild.id}
+    get_deadline_scheduler().schedule("close_ticket", channel.id, delay, payload)
+
+def closed_channel_state(channel, closed_category) -> dict:
+    """Итоговое состояние канала закрытого тикета для одного вызова edit
+    
+    Результат не зависит от того, применялся ли он уже: повторное
+    вычисление для заблокированного канала дает то же состояние.
+    """
+    name = channel.name if channel.name.startswith(CLOSED_PREFIX) else f"{CLOSED_PREFIX}{channel.name}"[:100]
+    
+    # Запрет на отправку сообщений для всех участников, кроме бота
+    overwrites = {}
+    for target, overwrite in channel.overwrites.items():
+        if isinstance(target, discord.Member) and target.id != channel.guild.me.id:
+            overwrite = discord.PermissionOverwrite.from_pair(*overwrite.pair())
+            overwrite.send_messages = False
+        overwrites[target] = overwrite
+    
+    return {"name": name, "category": closed_category, "overwrites": overwrites}
+
+async def close_ticket_channel(channel):
+    """Перевод тикета в состояние closed: перенос и блокировка канала
+    
+    Переход можно безопасно повторять: если канал уже в итоговом
+    состоянии, запрос к API не отправляется.
+    """
+    ticket_manager = get_ticket_manager()
+    ticket = ticket_manager.get_ticket(channel.id)
+    status = ticket.status if ticket else None
+    
+    if status is STATUS_OPEN:
+        ticket_manager.close_ticket(channel.id)
+    elif status is STATUS_CLOSED:
+        # Канал уже заблокирован, осталось удаление
+        _schedule_delete(channel)
+        return
+    elif status is STATUS_DELETED:
+        await delete_ticket_channel(channel)
+        return
+    
+    # Перемещение в категорию закрытых тикетов (если настроена)
+    closed_category = get_guild_cache().category(channel.guild, "closed_category_id")
+    
+    if not closed_category:
+        await delete_ticket_channel(channel)
+        return
+    
+    state = closed_channel_state(channel, closed_category)
+    if (channel.name != state["name"] or channel.category != closed_category
+            or channel.overwrites != state["overwrites"]):
+        await get_rest_scheduler().run(
+            route("edit_channel", channel.id),
+            lambda: channel.edit(**state),
+            PRIORITY_CLEANUP
+        )
+    
+    ticket_manager.transition(channel.id, STATUS_CLOSED)
+    _schedule_delete(channel)
+
+def _schedule_delete(channel):
+    # Даем время для просмотра
+    deadlines = get_deadline_scheduler()
+    if not deadlines.is_scheduled("delete_channel", channel.id):
+        payload = {"channel_id": channel.id, "guild_id": channel.guild.id}
+        deadlines.schedule("delete_channel", channel.id, CLOSED_CHANNEL_TTL, payload)
+
+async def delete_ticket_channel(channel):
+    """Перевод тикета в состояние deleted: удаление канала"""
+    try:
+        await get_rest_scheduler().run(route("delete_channel", channel.id), channel.delete, PRIORITY_CLEANUP)
+    except discord.NotFound:
+        pass
+    get_ticket_manager().transition(channel.id, STATUS_DELETED)